@@ -3,6 +3,7 @@ from .cli import main
 from .local import LocalFileReader
 from .ssh import SshClient
 from .securessh import SecureSshClient
+from .aiossh import AsyncSshClient
 from .pdfreader import read_pdf_to_dataframe,read_pdf_as_text
 from importlib.metadata import version, PackageNotFoundError
 from pyalma.debug import setup_paramiko
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .ssh import SshClient
+
+DEFAULT_MAX_CONCURRENCY = 64
+DEFAULT_SFTP_CHANNELS = 8
+
+
+class AsyncSshClient:
+    """
+    Asyncio front end to `SshClient`.
+
+    Every operation runs on a private thread pool, so awaiting it never blocks the event loop.
+    Remote commands open their own channel on the shared SSH connection; SFTP operations borrow
+    one of up to `sftp_channels` SFTP channels multiplexed over the shared SFTP connection. At most
+    `max_concurrency` operations run at once, later ones wait their turn.
+
+    Timeouts and cancellation close the channel the operation was using, which aborts the
+    blocked transfer; the channel is replaced on the next request.
+
+    Usage:
+        async with await AsyncSshClient.connect(server, username, password) as ssh:
+            results = await asyncio.gather(*(ssh.read_file(path) for path in paths))
+    """
+
+    def __init__(self, client, max_concurrency=DEFAULT_MAX_CONCURRENCY, sftp_channels=DEFAULT_SFTP_CHANNELS,
+                 timeout=None):
+        """
+        :param client: Connected client whose connections are shared.
+        :type client: SshClient
+        :param max_concurrency: Maximum number of operations running at once.
+        :type max_concurrency: int
+        :param sftp_channels: Maximum number of SFTP channels opened for concurrent file operations.
+        :type sftp_channels: int
+        :param timeout: Default timeout in seconds for every operation (None waits forever).
+        :type timeout: float | None
+        """
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.sftp_channels = sftp_channels
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="pyalma-aio")
+        self._semaphore = None
+        self._views = queue.Queue()
+        self._opened = 0
+        self._pool_lock = threading.Lock()
+
+    @classmethod
+    async def connect(cls, *args, max_concurrency=DEFAULT_MAX_CONCURRENCY, sftp_channels=DEFAULT_SFTP_CHANNELS,
+                      timeout=None, client_class=SshClient, **kwargs):
+        """
+        Connects a new client without blocking the event loop.
+
+        Positional and keyword arguments are passed to `client_class` (e.g. server, username, password).
+
+        :return: Connected asynchronous client.
+        :rtype: AsyncSshClient
+        """
+        loop = asyncio.get_running_loop()
+        client = await loop.run_in_executor(None, lambda: client_class(*args, **kwargs))
+        return cls(client, max_concurrency=max_concurrency, sftp_channels=sftp_channels, timeout=timeout)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """
+        Closes the extra SFTP channels and the underlying client's connections.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._shutdown)
+
+    def _shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        while True:
+            try:
+                view = self._views.get_nowait()
+            except queue.Empty:
+                break
+            self._close_view(view)
+        self.client.disconnect()
+
+    # ---------- Channel pool ----------
+
+    def _acquire_view(self):
+        while True:
+            try:
+                return self._views.get_nowait()
+            except queue.Empty:
+                pass
+            with self._pool_lock:
+                grow = self._opened < self.sftp_channels
+                if grow:
+                    self._opened += 1
+            if grow:
+                try:
+                    return self.client._channel_view(self.client._open_sftp_channel())
+                except Exception:
+                    with self._pool_lock:
+                        self._opened -= 1
+                    raise
+            # Poll, so that a channel closed by an aborted operation frees a slot for a new one
+            try:
+                return self._views.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _close_view(self, view):
+        with self._pool_lock:
+            self._opened -= 1
+        try:
+            view.sftp_client.close()
+        except Exception as e:
+            logging.error(f"❌ [AsyncSshClient]: Error closing SFTP channel: {e}")
+
+    # ---------- Scheduling ----------
+
+    async def _run(self, work, timeout=None):
+        """
+        Runs `work(state)` on the thread pool, bounded by the concurrency limit and the timeout.
+
+        `work` stores in `state["abort"]` a callable that interrupts it; it is called when the
+        operation times out or is cancelled.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        timeout = self.timeout if timeout is None else timeout
+        state = {"aborted": False, "abort": None}
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, work, state)
+            try:
+                return await asyncio.wait_for(future, timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                state["aborted"] = True
+                if state["abort"] is not None:
+                    state["abort"]()
+                raise
+
+    async def _sftp_call(self, method, *args, timeout=None, **kwargs):
+        """
+        Calls an `SshClient` method on a borrowed SFTP channel.
+        """
+        def work(state):
+            if state["aborted"]:
+                return None
+            view = self._acquire_view()
+            state["abort"] = view.sftp_client.close
+            try:
+                return getattr(view, method)(*args, **kwargs)
+            finally:
+                if state["aborted"]:
+                    self._close_view(view)
+                else:
+                    self._views.put(view)
+
+        return await self._run(work, timeout)
+
+    # ---------- Operations ----------
+
+    async def run_cmd(self, command, timeout=None):
+        """
+        Run a command on the remote server via SSH.
+
+        :param command: Command to execute.
+        :type command: str
+        :param timeout: Seconds to wait before closing the command's channel (defaults to `self.timeout`).
+        :type timeout: float | None
+        :return: Dictionary with 'output' and 'err' keys.
+        :rtype: dict
+        :raises asyncio.TimeoutError: If the command does not complete within `timeout`.
+        """
+        def work(state):
+            if state["aborted"]:
+                return None
+            try:
+                _, stdout, _ = self.client._exec_command(command)
+                state["abort"] = stdout.channel.close
+                output = stdout.read().decode("utf-8", errors="replace")
+                return {"output": self.client.filter_output(output), "err": None}
+            except Exception as e:
+                if not state["aborted"]:
+                    logging.error(f"❌ [run_cmd]: Error executing SSH command {command}: {e}")
+                return {"output": None, "err": str(e)}
+
+        return await self._run(work, timeout)
+
+    async def read_file(self, path, type=None, as_dataframe=False, as_binary=False, timeout=None, **kwargs):
+        """
+        Read a remote file; see `FileReader.read_file`.
+
+        :raises asyncio.TimeoutError: If the read does not complete within `timeout`.
+        """
+        return await self._sftp_call("read_file", path, type, as_dataframe, as_binary, timeout=timeout, **kwargs)
+
+    async def read_file_into_df(self, path, type=None, timeout=None, **kwargs):
+        """
+        Read a remote file into a DataFrame; see `FileReader.read_file_into_df`.
+        """
+        return await self._sftp_call("read_file_into_df", path, type, timeout=timeout, **kwargs)
+
+    async def listdir(self, path, timeout=None):
+        """
+        List files and directories at a remote path.
+
+        :return: Tuple of (directories, files).
+        :rtype: tuple[list[str], list[str]]
+        """
+        return await self._sftp_call("listdir", path, timeout=timeout)
+
+    async def isfile(self, path, timeout=None):
+        """
+        Check whether the given remote path points to a file.
+
+        :rtype: bool
+        """
+        return await self._sftp_call("isfile", path, timeout=timeout)
+
+    async def get_file_size(self, path, timeout=None):
+        """
+        Get the size of a file on the remote server.
+
+        :return: Size in bytes, or None if error.
+        :rtype: int | None
+        """
+        return await self._sftp_call("get_file_size", path, timeout=timeout)
+
+    async def download_remote_file(self, remote_path, local_path, timeout=None, **kwargs):
+        """
+        Download a remote file; see `SshClient.download_remote_file`.
+        """
+        return await self._sftp_call("download_remote_file", remote_path, local_path, timeout=timeout, **kwargs)
+
+    async def write_to_remote_file(self, data, remote_path, file_format="csv", timeout=None, **kwargs):
+        """
+        Write data (string or DataFrame) to a file on the remote server; see `SshClient.write_to_remote_file`.
+        """
+        return await self._sftp_call("write_to_remote_file", data, remote_path, file_format, timeout=timeout, **kwargs)
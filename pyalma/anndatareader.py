@@ -1,11 +1,16 @@
-import scanpy as sc
+# Parts of an h5ad file that `read_adata_subset` can load
+ADATA_ELEMENTS = ("obs", "var", "uns", "X")
 
-def read_adata(path):
+
+def read_adata(path, backed=None):
     """
     Reads an AnnData object from an H5AD file using Scanpy.
 
     :param path: Path to the `.h5ad` file.
     :type path: str
+    :param backed: 'r' (or 'r+') to keep `X` on disk and load only the annotations;
+        slices of `adata.X` are then read from the file on access.
+    :type backed: str | None
     :return: The loaded AnnData object.
     :rtype: anndata.AnnData
 
@@ -13,13 +18,106 @@ def read_adata(path):
 
         >>> adata = read_adata("dataset.h5ad")
         >>> print(adata.shape)  # e.g., (10000, 2000)
+        >>> adata = read_adata("dataset.h5ad", backed="r")  # obs/var in memory, X on disk
 
     :Notes:
 
-        - If you want to access data without loading it all into memory, 
-          consider using ``backed='r'`` with ``sc.read_h5ad(path, backed='r')``.
         - AnnData is a popular format for storing single-cell data.
+        - For remote files, see `SshClient.read_h5ad_subset`, which reads only selected
+          elements and slices.
     """
-    adata = sc.read_h5ad(path)
+    import scanpy as sc  # heavy import, deferred until an h5ad file is actually read
+
+    adata = sc.read_h5ad(path, backed=backed)
     return adata
 
+
+def _positions(selector, names):
+    """
+    Resolves an obs/var selector into sorted positions, or a slice kept as is.
+
+    :param selector: None (everything), a slice, integer positions, a boolean mask or names.
+    :param names: Index of the axis, used to resolve names.
+    :type names: pd.Index
+    """
+    import numpy as np
+
+    if selector is None:
+        return slice(None)
+    if isinstance(selector, slice):
+        return selector
+    selector = np.asarray(selector)
+    if selector.dtype == bool:
+        return np.flatnonzero(selector)
+    if selector.dtype.kind in "iu":
+        positions = selector
+    else:
+        positions = names.get_indexer(selector)
+        if (positions < 0).any():
+            missing = list(selector[positions < 0][:5])
+            raise KeyError(f"❌ [read_adata_subset]: Names not found: {missing}")
+    return np.unique(positions)
+
+
+def _read_matrix(element, rows, columns):
+    """
+    Reads a slice of a dense or sparse (CSR/CSC) matrix element, touching only the needed parts.
+    """
+    import h5py
+    import anndata as ad
+
+    if isinstance(element, h5py.Dataset):
+        return element[rows][:, columns]
+    matrix = ad.io.sparse_dataset(element)
+    if matrix.format == "csr":
+        return matrix[rows][:, columns]
+    return matrix[:, columns][rows]
+
+
+def _read_axis(group, full):
+    """
+    Reads an obs/var dataframe, or only its index when `full` is False.
+    """
+    import pandas as pd
+    import anndata as ad
+
+    if full:
+        return ad.io.read_elem(group)
+    index = group.attrs["_index"]
+    return pd.DataFrame(index=pd.Index(ad.io.read_elem(group[index]), name=None if index == "_index" else index))
+
+
+def read_adata_subset(source, elements=("obs", "var"), obs=None, var=None):
+    """
+    Reads selected elements of an h5ad file, and optionally a slice of its cells and genes,
+    without loading the rest of the file.
+
+    :param source: Path or seekable binary file object (e.g. a `RemoteFile`).
+    :param elements: Elements to load, among 'obs', 'var', 'uns' and 'X'.
+    :type elements: tuple[str]
+    :param obs: Cells to keep: a slice, integer positions, a boolean mask or obs names.
+    :param var: Genes to keep, specified as for `obs`.
+    :return: AnnData holding the requested elements (`X` is None unless requested, and obs/var
+        hold only their index unless requested). Selected cells and genes are returned in file order.
+    :rtype: anndata.AnnData
+    """
+    import h5py
+    import anndata as ad
+
+    unknown = set(elements) - set(ADATA_ELEMENTS)
+    if unknown:
+        raise ValueError(f"❌ [read_adata_subset]: Unsupported elements {sorted(unknown)}. "
+                         f"Use some of {', '.join(ADATA_ELEMENTS)}.")
+    with h5py.File(source, "r") as file:
+        # The obs/var indexes are always read: they give the shape and resolve names
+        obs_df = _read_axis(file["obs"], "obs" in elements)
+        var_df = _read_axis(file["var"], "var" in elements)
+        rows = _positions(obs, obs_df.index)
+        columns = _positions(var, var_df.index)
+        X = _read_matrix(file["X"], rows, columns) if "X" in elements else None
+        uns = ad.io.read_elem(file["uns"]) if "uns" in elements and "uns" in file else {}
+    obs_df = obs_df.iloc[rows]
+    var_df = var_df.iloc[columns]
+    if X is None:
+        return ad.AnnData(obs=obs_df, var=var_df, uns=uns)
+    return ad.AnnData(X=X, obs=obs_df, var=var_df, uns=uns)
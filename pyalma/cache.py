@@ -0,0 +1,476 @@
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pyalma")
+DEFAULT_MAX_SIZE = 10 * 1024 ** 3
+DEFAULT_MAX_MEMORY = 1024 ** 3
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive inter-process lock held on `path` for the duration of the block.
+
+    :param path: Lock file path (created if missing).
+    :type path: str
+    """
+    with open(path, "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as handle:
+        json.dump(data, handle)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, "r") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+class DiskCache:
+    """
+    Persistent local cache of remote file contents, shared between processes.
+
+    Entries are keyed by (namespace, remote path) and validated against the remote
+    size and mtime (and optionally a checksum). Each entry is written to a `.part`
+    file, which lets an interrupted download resume, and is published with an atomic
+    rename under a per-entry file lock. Least recently used entries are evicted once
+    the cache grows beyond `max_size` bytes.
+    """
+
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE):
+        """
+        :param directory: Cache directory, defaults to ``~/.cache/pyalma``.
+        :type directory: str | None
+        :param max_size: Size cap in bytes for all cached files.
+        :type max_size: int
+        """
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _entry_paths(self, namespace, path):
+        key = hashlib.sha256(f"{namespace}:{path}".encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return {
+            "data": base + ".data",
+            "meta": base + ".json",
+            "part": base + ".part",
+            "part_meta": base + ".part.json",
+            "lock": base + ".lock",
+        }
+
+    @staticmethod
+    def _signature(path, size, mtime, checksum):
+        return {"path": path, "size": size, "mtime": mtime, "checksum": checksum}
+
+    def _lookup(self, paths, signature):
+        if _read_json(paths["meta"]) == signature and os.path.isfile(paths["data"]):
+            os.utime(paths["data"])  # data file mtime is the LRU clock
+            return paths["data"]
+        return None
+
+    def get(self, namespace, path, size, mtime, checksum=None):
+        """
+        Returns the local copy of a remote file if it is cached and still valid.
+
+        :return: Local path of the cached copy, or None on a miss.
+        :rtype: str | None
+        """
+        paths = self._entry_paths(namespace, path)
+        with file_lock(paths["lock"]):
+            return self._lookup(paths, self._signature(path, size, mtime, checksum))
+
+    def fetch(self, namespace, path, size, mtime, download, checksum=None):
+        """
+        Returns a valid local copy of a remote file, downloading it on a miss.
+
+        :param namespace: Identifies the remote host/user the path belongs to.
+        :type namespace: str
+        :param path: Remote path.
+        :type path: str
+        :param size: Current remote size in bytes.
+        :type size: int
+        :param mtime: Current remote modification time.
+        :type mtime: int | float
+        :param download: Callable ``download(part_path, offset)`` appending the remote
+            content from `offset` onwards to `part_path`.
+        :type download: callable
+        :param checksum: Optional remote checksum, validated along with size and mtime.
+        :type checksum: str | None
+        :return: Local path of the cached copy.
+        :rtype: str
+        """
+        paths = self._entry_paths(namespace, path)
+        signature = self._signature(path, size, mtime, checksum)
+        with file_lock(paths["lock"]):
+            hit = self._lookup(paths, signature)
+            if hit:
+                return hit
+
+            offset = 0
+            if _read_json(paths["part_meta"]) == signature and os.path.isfile(paths["part"]):
+                offset = min(os.path.getsize(paths["part"]), size)
+                logging.info(f"✅ [DiskCache.fetch]: Resuming {path} from byte {offset}")
+            else:
+                open(paths["part"], "wb").close()
+                _write_json_atomic(paths["part_meta"], signature)
+
+            download(paths["part"], offset)
+            received = os.path.getsize(paths["part"])
+            if received != size:
+                raise IOError(f"❌ [DiskCache.fetch]: Incomplete download of {path}: {received} of {size} bytes")
+
+            _write_json_atomic(paths["meta"], signature)
+            os.replace(paths["part"], paths["data"])
+            os.remove(paths["part_meta"])
+
+        self.evict()
+        return paths["data"]
+
+    def invalidate(self, namespace, path):
+        """
+        Removes the cached copy of a remote file, if any.
+        """
+        paths = self._entry_paths(namespace, path)
+        with file_lock(paths["lock"]):
+            for name in ("data", "meta", "part", "part_meta"):
+                if os.path.exists(paths[name]):
+                    os.remove(paths[name])
+
+    def size(self):
+        """
+        :return: Total size in bytes of the cached files.
+        :rtype: int
+        """
+        return sum(size for _, _, size in self._entries())
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(".data"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def evict(self):
+        """
+        Deletes least recently used entries until the cache fits within `max_size`.
+        The most recently used entry is always kept.
+        """
+        with file_lock(os.path.join(self.directory, "evict.lock")):
+            entries = sorted(self._entries())
+            total = sum(size for _, _, size in entries)
+            for _, data_path, size in entries[:-1]:
+                if total <= self.max_size:
+                    break
+                base = data_path[:-len(".data")]
+                with file_lock(base + ".lock"):
+                    for stale in (data_path, base + ".json"):
+                        if os.path.exists(stale):
+                            os.remove(stale)
+                total -= size
+                logging.info(f"✅ [DiskCache.evict]: Evicted {data_path}")
+
+    def clear(self):
+        """
+        Deletes every cached entry.
+        """
+        for _, data_path, _ in self._entries():
+            base = data_path[:-len(".data")]
+            with file_lock(base + ".lock"):
+                for stale in (data_path, base + ".json"):
+                    if os.path.exists(stale):
+                        os.remove(stale)
+
+
+def estimate_size(obj):
+    """
+    Estimates the memory footprint of a decoded object in bytes.
+
+    :param obj: DataFrame, NumPy array, PIL image, str/bytes or any other object.
+    :return: Approximate size in bytes.
+    :rtype: int
+    """
+    if isinstance(obj, (bytes, bytearray, str)):
+        return len(obj)
+    if hasattr(obj, "memory_usage"):  # pandas DataFrame / Series
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if hasattr(obj, "nbytes"):  # NumPy arrays, Arrow tables
+        return int(obj.nbytes)
+    if hasattr(obj, "getbands") and hasattr(obj, "size"):  # PIL images
+        width, height = obj.size
+        return width * height * len(obj.getbands())
+    return sys.getsizeof(obj)
+
+
+class ObjectCache:
+    """
+    Thread-safe, memory-bounded LRU cache of decoded file contents.
+
+    Each entry remembers the signature (size, mtime) of the file it was decoded from.
+    Entries validated less than `revalidate_after` seconds ago are returned without
+    touching the file system; older ones are revalidated with a single stat. Concurrent
+    misses for the same key are coalesced so the file is transferred and parsed once.
+    Cached objects are shared between callers and should be treated as read-only.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_MEMORY, revalidate_after=5.0):
+        """
+        :param max_bytes: Upper bound on the estimated size of all cached objects.
+        :type max_bytes: int
+        :param revalidate_after: Seconds during which a hit is served without a stat.
+        :type revalidate_after: float
+        """
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, signature, load):
+        """
+        Returns the cached value for `key`, loading it on a miss.
+
+        :param key: Hashable cache key; its first item is the file path.
+        :param signature: Callable returning the current file signature (e.g. size and mtime).
+        :type signature: callable
+        :param load: Callable producing the decoded value; None results are not cached.
+        :type load: callable
+        :return: Cached or freshly loaded value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry["validated"] < self.revalidate_after:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["value"]
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = Future()
+        if not leader:
+            return call.result()
+
+        try:
+            value = self._refresh(key, entry, signature, load)
+            call.set_result(value)
+            return value
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _refresh(self, key, entry, signature, load):
+        current = signature()
+        if entry is not None and entry["signature"] == current:
+            with self._lock:
+                entry["validated"] = time.monotonic()
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                self.hits += 1
+            return entry["value"]
+
+        value = load()
+        nbytes = estimate_size(value)
+        with self._lock:
+            self.misses += 1
+            self._discard(key)
+            if value is not None and nbytes <= self.max_bytes:
+                self._entries[key] = {"value": value, "nbytes": nbytes, "signature": current,
+                                      "validated": time.monotonic()}
+                self.total_bytes += nbytes
+                while self.total_bytes > self.max_bytes:
+                    self._discard(next(iter(self._entries)))
+        return value
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry["nbytes"]
+
+    def invalidate(self, path=None):
+        """
+        Drops the entries decoded from `path`, or every entry when `path` is None.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if path is None or key[0] == path:
+                    self._discard(key)
+
+
+class MetadataCache:
+    """
+    Thread-safe, size-bounded cache of remote file metadata with a time to live.
+
+    Holds, per path, a dictionary with the entry 'type' (find letters: 'f', 'd', 'l', ...),
+    'size' and 'mtime', and per directory the names it contains. A fresh listing of a
+    directory also answers that a name it does not contain is missing. At most `max_entries`
+    paths and listed names are kept, least recently used first out.
+    """
+
+    def __init__(self, ttl=30.0, max_entries=100_000):
+        """
+        :param ttl: Seconds during which an entry is trusted.
+        :type ttl: float
+        :param max_entries: Upper bound on cached paths plus listed names.
+        :type max_entries: int
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # ("entry", path) -> (expiry, metadata) and ("listing", directory) -> (expiry, names)
+        self._items = OrderedDict()
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(path):
+        return posixpath.normpath(path)
+
+    @staticmethod
+    def _weight(key, value):
+        return len(value) if key[0] == "listing" else 1
+
+    def _fresh(self, key):
+        item = self._items.get(key)
+        if item is None:
+            return None
+        if time.monotonic() > item[0]:
+            self._drop(key)
+            return None
+        self._items.move_to_end(key)
+        return item[1]
+
+    def _drop(self, key):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._count -= self._weight(key, item[1])
+
+    def _store(self, key, value):
+        self._drop(key)
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._count += self._weight(key, value)
+        while self._count > self.max_entries and len(self._items) > 1:
+            self._drop(next(iter(self._items)))
+
+    def lookup(self, path):
+        """
+        :return: Tuple (known, info): `info` is the cached metadata, or None when a fresh listing
+            of the parent directory shows the path does not exist. `known` is False on a miss.
+        :rtype: tuple[bool, dict | None]
+        """
+        path = self._normalize(path)
+        with self._lock:
+            info = self._fresh(("entry", path))
+            if info is not None:
+                self.hits += 1
+                return True, info
+            names = self._fresh(("listing", posixpath.dirname(path)))
+            if names is not None and posixpath.basename(path) not in names:
+                self.hits += 1
+                return True, None
+            self.misses += 1
+            return False, None
+
+    def put(self, path, info):
+        """
+        Caches the metadata of one path.
+        """
+        with self._lock:
+            self._store(("entry", self._normalize(path)), info)
+
+    def listing(self, directory):
+        """
+        :return: Dictionary mapping each name in `directory` to its metadata, or None on a miss.
+        :rtype: dict | None
+        """
+        directory = self._normalize(directory)
+        with self._lock:
+            names = self._fresh(("listing", directory))
+            children = {}
+            for name in names or ():
+                info = self._fresh(("entry", posixpath.join(directory, name)))
+                if info is None:
+                    names = None
+                    break
+                children[name] = info
+            if names is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return children
+
+    def put_listing(self, directory, children):
+        """
+        Caches a complete directory listing and the metadata of every entry in it.
+
+        :param children: Dictionary mapping each name in `directory` to its metadata.
+        :type children: dict
+        """
+        directory = self._normalize(directory)
+        with self._lock:
+            for name, info in children.items():
+                self._store(("entry", posixpath.join(directory, name)), info)
+            self._store(("listing", directory), frozenset(children))
+
+    def invalidate(self, path=None, recursive=False):
+        """
+        Forgets `path` and the listing of its parent directory, and with `recursive` everything
+        below `path`. Forgets everything when `path` is None.
+        """
+        with self._lock:
+            if path is None:
+                self._items.clear()
+                self._count = 0
+                return
+            path = self._normalize(path)
+            prefix = path.rstrip("/") + "/"
+            for key in list(self._items):
+                if key[1] == path or (recursive and key[1].startswith(prefix)):
+                    self._drop(key)
+            self._drop(("listing", posixpath.dirname(path)))
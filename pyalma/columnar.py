@@ -0,0 +1,43 @@
+# File types read with pyarrow (Feather v2 files are Arrow IPC files)
+COLUMNAR_TYPES = {"parquet", "pq", "feather", "arrow", "ipc"}
+
+
+def read_columnar(source, type, columns=None, row_groups=None, filters=None, as_arrow=False):
+    """
+    Reads a Parquet or Feather/Arrow IPC file, transferring only what the selection needs
+    when `source` is seekable: the footer, then the requested columns (and row groups).
+
+    :param source: Path or seekable binary file object.
+    :param type: File type, one of `COLUMNAR_TYPES`.
+    :type type: str
+    :param columns: Columns to read (all by default).
+    :type columns: list[str] | None
+    :param row_groups: Parquet row groups to read (all by default).
+    :type row_groups: list[int] | None
+    :param filters: Row predicates in the `pyarrow.parquet` format, e.g. ``[("chrom", "==", "chr1")]``;
+        for Parquet, row groups whose statistics exclude every match are skipped.
+    :type filters: list[tuple] | None
+    :param as_arrow: Return the `pyarrow.Table` as read, without converting it to pandas.
+    :type as_arrow: bool
+    :rtype: pd.DataFrame | pyarrow.Table
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(f"❌ [read_columnar]: Reading {type} files requires the `pyarrow` package") from e
+
+    if type in ("parquet", "pq"):
+        if row_groups is not None:
+            table = pq.ParquetFile(source).read_row_groups(row_groups, columns=columns)
+            if filters:
+                table = table.filter(pq.filters_to_expression(filters))
+        else:
+            table = pq.read_table(source, columns=columns, filters=filters)
+    else:
+        import pyarrow.feather as feather
+        if row_groups is not None:
+            raise ValueError("❌ [read_columnar]: row_groups only applies to Parquet files")
+        table = feather.read_table(source, columns=columns, memory_map=False)
+        if filters:
+            table = table.filter(pq.filters_to_expression(filters))
+    return table if as_arrow else table.to_pandas()
@@ -1,11 +1,23 @@
-import pysam
-import pandas as pd
 import os
 from io import StringIO, BytesIO
-from .pdfreader import read_pdf_to_dataframe
-from .anndatareader import read_adata
-from .imageReader import read_image
 import logging
+from contextlib import contextmanager
+from .cache import DEFAULT_MAX_MEMORY, ObjectCache
+from .columnar import COLUMNAR_TYPES, read_columnar
+from .genotypes import DEFAULT_BATCH_BYTES, read_genotypes_file
+from .imageReader import DEFAULT_IMAGE_WORKERS, read_images
+from .intervals import INDEX_SUFFIX, BedIndex, read_bed
+from .query import apply_query, default_separator
+from .remotefile import HDF5_BLOCK_SIZE
+from .tree import filter_tree, split_glob, tree_to_dataframe
+from .vcf import (BGZIP_SUFFIXES, GZIP_MAGIC, INDEX_SUFFIXES, read_index, read_vcf, read_vcf_region,
+                  text_stream)
+
+# Format backends (pandas, pyarrow, scanpy, PyMuPDF, Pillow) are imported inside the
+# methods that need them, so that `import pyalma` stays cheap for SSH-only users.
+
+# Rows per DataFrame chunk when a table is read with `iterator=True` and no `chunksize`
+DEFAULT_CHUNK_ROWS = 100_000
 
 class FileReader:
     """
@@ -21,10 +33,12 @@ class FileReader:
             - `files_to_clean`: Tracks temporary files that may need deletion.
             - `remote`: Flag indicating remote operation.
             - `clean_on_destruction`: Determines whether to delete files on object destruction.
+            - `object_cache`: In-memory cache of decoded files, disabled until `enable_object_cache`.
         """
         self.files_to_clean = []
         self.remote = False
         self.clean_on_destruction = True
+        self.object_cache = None
 
     def __del__(self):
         """
@@ -47,6 +61,34 @@ class FileReader:
         """
         return self.remote
 
+    def enable_object_cache(self, max_bytes=DEFAULT_MAX_MEMORY, revalidate_after=5.0):
+        """
+        Keeps decoded `read_file` results in memory, keyed by path, type and reader arguments.
+
+        Hits are revalidated against the file size and mtime at most every `revalidate_after`
+        seconds, and concurrent reads of the same file are coalesced into one read and parse.
+        Returned objects are shared between callers and should not be modified in place.
+
+        :param max_bytes: Memory budget for cached objects, in bytes.
+        :type max_bytes: int
+        :param revalidate_after: Seconds during which a hit is served without a stat.
+        :type revalidate_after: float
+        """
+        self.object_cache = ObjectCache(max_bytes, revalidate_after)
+
+    def disable_object_cache(self):
+        """
+        Drops the in-memory cache of decoded files.
+        """
+        self.object_cache = None
+
+    def _file_signature(self, path):
+        """
+        Returns the (size, mtime) pair used to validate cached objects.
+        """
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
     def set_clean_on_dest(self, value):
         """
         Sets the `clean_on_destruction` flag.
@@ -63,6 +105,9 @@ class FileReader:
         :param type: Optional file type override (generic types: pdf, image, text, csv, zip).
         :param as_dataframe: Force a parsing into a DataFrame.
         :param as_binary: Force raw binary return.
+        :param kwargs: Extra arguments for `pandas.read_csv`. For csv/tsv/bed, passing `chunksize`
+            (or `iterator=True`) streams the file and returns an iterator of DataFrame chunks;
+            the file is only opened once iteration starts, so errors are raised while iterating.
         """
         return self.read_file(path, type, as_dataframe=True, as_binary=as_binary, **kwargs)        
     def _is_binary_type(self, type):
@@ -73,9 +118,15 @@ class FileReader:
         text_types = {"txt", "text", "out", "log", "err", "json"}
         return type in text_types
 
+    def _is_table_type(self, type):
+        return type in {"csv", "tsv", "bed"}
+
+    def _is_columnar_type(self, type):
+        return type in COLUMNAR_TYPES
+
     def _is_auto_dataframe_type(self, type):
         #force the below types to be read as dataframe
-        dataframe_types = {"csv", "tsv", "bed", "pdf", "vcf"}
+        dataframe_types = {"csv", "tsv", "bed", "pdf", "vcf"} | COLUMNAR_TYPES
         return type in dataframe_types
 
     def read_file(self, path, type=None, as_dataframe=False, as_binary=False, **kwargs):
@@ -87,19 +138,118 @@ class FileReader:
         :param as_binary: Force raw binary return.
         """
         type = type or self.get_file_extension(path)
-        is_binary = as_binary or self._is_binary_type(type)
-        mode = "rb" if is_binary else "r"
         as_dataframe = self._is_auto_dataframe_type(type) or as_dataframe
         try:
-            if as_dataframe and type == "vcf":
-                return self._read_vcf_as_dataframe(path)
-            content = self._read_file_content(path, mode, self._is_text_type(type))
-            return self.decode_content_by_type(content, type, as_dataframe, as_binary, **kwargs)
+            if self._is_table_type(type) and (kwargs.get("chunksize") or kwargs.get("iterator")):
+                return self._iter_table_chunks(path, **kwargs)
+            if self.object_cache is not None:
+                key = (path, type, as_dataframe, as_binary, repr(sorted(kwargs.items())))
+                return self.object_cache.get(
+                    key,
+                    lambda: self._file_signature(path),
+                    lambda: self._load_file(path, type, as_dataframe, as_binary, **kwargs))
+            return self._load_file(path, type, as_dataframe, as_binary, **kwargs)
 
         except Exception as e:
             logging.error(f"❌ [read_file]: Error reading file {path}: {e}")
             return None
 
+    def _load_file(self, path, type, as_dataframe, as_binary, **kwargs):
+        """
+        Reads and decodes a file; `read_file` without the caching and error handling.
+        """
+        is_binary = as_binary or self._is_binary_type(type)
+        mode = "rb" if is_binary else "r"
+        if as_dataframe and type == "vcf":
+            return self._read_vcf_as_dataframe(path, **kwargs)
+        if self._is_columnar_type(type) and not as_binary:
+            return self._read_columnar(path, type, **kwargs)
+        content = self._read_file_content(path, mode, self._is_text_type(type))
+        return self.decode_content_by_type(content, type, as_dataframe, as_binary, **kwargs)
+
+    def _open_stream(self, path):
+        """
+        Opens a file as a binary, sequentially readable file object.
+        """
+        return open(path, "rb")
+
+    @contextmanager
+    def _random_access(self, path, block_size=None):
+        """
+        Yields a seekable source for `path`: the path itself for local files. Remote readers
+        yield a file object, caching `block_size` blocks if given.
+        """
+        yield path
+
+    def _read_columnar(self, path, type, **kwargs):
+        """
+        Reads a Parquet or Feather/Arrow file; see `pyalma.columnar.read_columnar` for the options
+        (`columns`, `row_groups`, `filters`, `as_arrow`). Seekable sources are read in place, so
+        only the footer and the selected columns and row groups are transferred.
+        """
+        with self._random_access(path) as source:
+            return read_columnar(source, type, **kwargs)
+
+    def _iter_table_chunks(self, path, chunksize=None, iterator=False, **kwargs):
+        """
+        Parses a delimited file into DataFrame chunks of `chunksize` rows.
+
+        The file is opened on the first chunk and the parser reads straight from it, so memory
+        use depends on the chunk size rather than the file size. The file is closed once the
+        iterator is exhausted or discarded; errors (missing file, parse errors) are raised by the
+        iteration, not by `read_file`.
+        """
+        import pandas as pd
+
+        with self._open_stream(path) as stream:
+            with pd.read_csv(stream, chunksize=chunksize or DEFAULT_CHUNK_ROWS, **kwargs) as reader:
+                yield from reader
+
+    def query_table(self, path, type=None, usecols=None, where=None, nrows=None, sample=None, seed=None,
+                    sep=None, header=True):
+        """
+        Reads selected columns and rows of a csv/tsv/bed table.
+
+        :param path: File path.
+        :param type: Optional file type override (csv, tsv, bed).
+        :param usecols: Columns to return, in this order (names, or 0-based positions without header).
+        :type usecols: list | None
+        :param where: Row predicates as (column, op, value) tuples combined with AND;
+            op is one of ==, !=, <, <=, >, >=.
+        :type where: list[tuple] | None
+        :param nrows: Maximum number of rows to return.
+        :type nrows: int | None
+        :param sample: Number of matching rows to draw at random.
+        :type sample: int | None
+        :param seed: Random seed for `sample`.
+        :type seed: int | None
+        :param sep: Field separator, defaults to ',' for csv and tab otherwise.
+        :param header: Whether the first line is a header.
+        :type header: bool
+        :return: DataFrame of the selected data, or None if the file could not be read.
+        :rtype: pd.DataFrame | None
+        """
+        type = type or self.get_file_extension(path)
+        sep = sep or default_separator(type)
+        read_cols = None
+        if usecols:
+            read_cols = list(dict.fromkeys(list(usecols) + [column for column, _, _ in where or []]))
+        df = self.read_file_into_df(path, type, sep=sep, header=0 if header else None, usecols=read_cols)
+        if df is None:
+            return None
+        return apply_query(df, usecols, where, nrows, sample, seed)
+
+    def count_rows(self, path, type=None, where=None, sep=None, header=True):
+        """
+        Counts the data rows of a csv/tsv/bed table, optionally only those matching `where`.
+
+        :return: Number of rows, or None if the file could not be read.
+        :rtype: int | None
+        """
+        usecols = list(dict.fromkeys(column for column, _, _ in where or [])) or None
+        df = self.query_table(path, type, usecols=usecols, where=where, sep=sep, header=header)
+        return None if df is None else len(df)
+
     def listdir(self, path):
         """
         Abstract method. Should be implemented by subclasses to list directory contents.
@@ -108,6 +258,36 @@ class FileReader:
         """
         raise NotImplementedError("Subclasses must implement listdir")
 
+    def walk(self, path, max_depth=None, as_dataframe=False):
+        """
+        Abstract method. Should be implemented by subclasses to list a directory tree.
+
+        :raises NotImplementedError: Always.
+        """
+        raise NotImplementedError("Subclasses must implement walk")
+
+    def glob(self, pattern, as_dataframe=False):
+        """
+        Lists the entries matching a glob pattern, e.g. ``"project/**/*.csv"``.
+
+        `*`, `?` and `[...]` match within a path component and ``**`` matches any number of
+        directories. The tree below the pattern's literal prefix is listed once with `walk`.
+
+        :param pattern: Glob pattern.
+        :type pattern: str
+        :param as_dataframe: Return a DataFrame instead of a dictionary of lists.
+        :type as_dataframe: bool
+        :return: Matching entries, as for `walk` but with paths including the literal prefix,
+            or None if the tree cannot be listed.
+        :rtype: dict | pd.DataFrame | None
+        """
+        base, relative, max_depth = split_glob(pattern)
+        tree = self.walk(base, max_depth=max_depth)
+        if tree is None:
+            return None
+        matched = filter_tree(tree, relative, base)
+        return tree_to_dataframe(matched) if as_dataframe else matched
+
     def download_remote_file(self, remote_path, local_path):
         """
         Abstract method. Downloads a file from a remote location.
@@ -137,6 +317,8 @@ class FileReader:
         :return: File extension without the dot.
         :rtype: str
         """
+        if file_path.endswith(BGZIP_SUFFIXES):
+            return "vcf"
         return os.path.splitext(file_path)[1].lstrip('.')
 
     def decode_content_by_type(self, content, type, as_dataframe = False, as_binary=False, **kwargs):
@@ -144,24 +326,36 @@ class FileReader:
         Decodes content based on file type, returning a DataFrame or raw string.
 
         :param content: Raw content (str, bytes, or file path).
-        :param type: File type (file extension generic types: pdf, image, text, csv, zip).
-        :param kwargs: Extra arguments for `pandas.read_csv`.
-        :return: Decoded content (DataFrame, str, or bytes).
+        :param type: File type (file extension generic types: pdf, image, text, csv, zip, parquet, feather).
+        :param kwargs: Extra arguments for `pandas.read_csv`, or `pyalma.columnar.read_columnar`
+            options for Parquet and Feather.
+        :return: Decoded content (DataFrame, pyarrow.Table, str, or bytes).
         """
         if type in ["csv", "tsv", "bed"]:
+            import pandas as pd
             # Accepts both string/bytes or file-like
-            is_path = isinstance(content, str) and os.path.isfile(content)
-            if not is_path:
-                content = StringIO(content.decode( "utf-8"))
+            if isinstance(content, bytes):
+                # Parse the bytes in place rather than through a decoded str copy
+                content = BytesIO(content)
+            elif isinstance(content, str) and not os.path.isfile(content):
+                content = StringIO(content)
             #sep = kwargs.get('sep', "\t" if type in ["tsv", "bed"] else ",")
             return pd.read_csv(content, **kwargs)
 
+        if type in COLUMNAR_TYPES and not as_binary:
+            return read_columnar(BytesIO(content) if isinstance(content, bytes) else content, type, **kwargs)
+
+        if type == "vcf" and isinstance(content, bytes) and not as_binary:
+            return read_vcf(text_stream(BytesIO(content), content[:2] == GZIP_MAGIC))
+
         if type == "pdf":
-            return read_pdf_to_dataframe(BytesIO(content) if isinstance(content, bytes) else content)
+            from .pdfreader import read_pdf_to_dataframe
+            return read_pdf_to_dataframe(content, **kwargs)
         
         if type in ["png", "jpg", "jpeg"]:
             try:
-                return read_image(content)
+                from .imageReader import read_image
+                return read_image(content, **kwargs)
             except Exception as e:
                 logging.error(f"❌ [decode_content_by_type]: Failed to decode image: {e}")
                 return content
@@ -174,32 +368,201 @@ class FileReader:
                 return content  # binary fallback
         return content
 
-    def read_vcf_file_into_df(self, path):
+    def read_vcf_file_into_df(self, path, region=None):
         """
-        Reads a VCF (Variant Call Format) file using `pysam`.
+        Reads a local VCF (Variant Call Format) file, plain or bgzipped, into a DataFrame.
 
         :param path: Path to the VCF file.
         :type path: str
+        :param region: Region such as "chr1:1-1000000"; needs a bgzipped file with a .tbi or .csi
+            index next to it, and only the indexed blocks overlapping the region are read.
+        :type region: str | None
+
+        :return: One row per record: the fixed VCF columns ('POS' as integers, 'QUAL' as floats)
+            followed by FORMAT and one column per sample.
+        :rtype: pd.DataFrame
+        """
+        if region is not None:
+            index_path = next((path + suffix for suffix in INDEX_SUFFIXES if os.path.isfile(path + suffix)), None)
+            if index_path is None:
+                raise FileNotFoundError(f"❌ [read_vcf_file_into_df]: No .tbi or .csi index for {path}")
+            with open(index_path, "rb") as index_file:
+                index = read_index(index_file.read())
+            with open(path, "rb") as file:
+                return read_vcf_region(file, index, region)
+        with open(path, "rb") as file:
+            compressed = file.read(2) == GZIP_MAGIC
+            file.seek(0)
+            return read_vcf(text_stream(file, compressed))
+
+    def read_vcf_genotypes(self, path, samples=None, info=(), region=None, batch_bytes=DEFAULT_BATCH_BYTES,
+                           processes=None):
+        """
+        Reads the variants and genotype matrix of a local VCF (plain or bgzipped) or BCF file.
+
+        Records are parsed `batch_bytes` of text at a time, and the genotype calls are decoded
+        with NumPy rather than one record at a time; see `pyalma.genotypes`.
+
+        :param path: Path to the VCF or BCF file.
+        :type path: str
+        :param samples: Sample names to keep, in this order; all samples by default.
+        :type samples: list[str] | None
+        :param info: INFO fields to add as variant columns, e.g. ("DP", "AF").
+        :type info: tuple[str]
+        :param region: Region such as "chr1:1-1000000"; needs a .tbi or .csi index.
+        :type region: str | None
+        :param batch_bytes: VCF text parsed at a time; memory use follows it.
+        :type batch_bytes: int
+        :param processes: Parse the sequences of an indexed, bgzipped VCF in this many processes.
+        :type processes: int | None
+
+        :return: Dictionary with 'variants' (DataFrame: CHROM, POS, ID, REF, ALT, QUAL, FILTER and
+            the INFO fields), 'samples' (names) and 'genotypes' (int8 array of shape
+            (samples, variants): number of alternate alleles per call, -1 if missing).
+        :rtype: dict
+        """
+        return read_genotypes_file(path, samples, info, region, batch_bytes, processes)
+
+    def read_images(self, paths, max_size=None, mode=None, as_array=False, workers=DEFAULT_IMAGE_WORKERS):
+        """
+        Reads many images at once, e.g. to show a gallery of thumbnails. Files are fetched and
+        decoded by `workers` threads, and with `max_size` they are decoded straight to thumbnail
+        size (JPEG draft mode, `Image.reduce`); see `pyalma.imageReader.read_images`.
+
+        :param paths: Image paths.
+        :type paths: list[str]
+        :param max_size: Largest (width, height) of the decoded images; the aspect ratio is kept.
+        :type max_size: tuple[int, int] | None
+        :param mode: Pillow mode to convert to, e.g. "RGB" or "L".
+        :type mode: str | None
+        :param as_array: Stack the images into one uint8 NumPy array of shape
+            (images, height, width, channels) instead of returning Pillow images.
+        :type as_array: bool
+        :param workers: Number of concurrent reads and decodes.
+        :type workers: int
+
+        :return: List of images in the order of `paths` (None for unreadable files) or, with
+            `as_array`, dictionary with 'images' (the batch) and 'sizes' (width and height of each image).
+        :rtype: list | dict
+        """
+        with self._concurrent_reader() as read:
+            return read_images(paths, read, max_size, mode, as_array, workers)
+
+    @contextmanager
+    def _concurrent_reader(self):
+        """
+        Yields a function returning the binary content of a path, safe to call from several threads.
+        """
+        yield lambda path: self._read_file_content(path, "rb", False)
+
+    def read_bed(self, path):
+        """
+        Reads a BED file into a typed DataFrame with the specification's column names; see
+        `pyalma.intervals.read_bed`. `read_file` keeps returning BED files as plain `pandas.read_csv`
+        tables.
+
+        :param path: Path to the BED file.
+        :type path: str
+        :rtype: pd.DataFrame
+        """
+        with self._open_stream(path) as stream:
+            return read_bed(stream)
 
-        :return: VCF file as a `pysam.VariantFile` object.
-        :rtype: pysam.VariantFile
+    def read_bed_index(self, path, cache=True):
         """
-        return pysam.VariantFile(path)
+        Reads a BED file into an interval index for vectorised overlap, nearest and coverage
+        queries; see `pyalma.intervals.BedIndex`.
 
-    def read_h5ad(self, path):
+        With `cache`, the index is saved next to the file (`<path>.pyalma-index.npz`) and reused
+        as long as the BED file keeps its size and modification time.
+
+        :param path: Path to the BED file.
+        :type path: str
+        :param cache: Load the saved index when it is current, and save a newly built one.
+        :type cache: bool
+        :rtype: BedIndex
+        """
+        signature = tuple(int(value) for value in self._file_signature(path))
+        index_path = path + INDEX_SUFFIX
+        if cache:
+            try:
+                index = BedIndex.load(BytesIO(self._read_sidecar(index_path)))
+                if index.signature == signature:
+                    return index
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.warning(f"⚠️ [read_bed_index]: Ignoring unreadable index {index_path}: {e}")
+        with self._open_stream(path) as stream:
+            index = BedIndex(read_bed(stream), signature)
+        if cache:
+            buffer = BytesIO()
+            index.save(buffer)
+            try:
+                self._write_sidecar(index_path, buffer.getvalue())
+            except Exception as e:
+                logging.warning(f"⚠️ [read_bed_index]: Could not save index {index_path}: {e}")
+        return index
+
+    def _read_sidecar(self, path):
+        """
+        Reads a small file kept next to a data file (e.g. a saved index).
+
+        :raises FileNotFoundError: If it does not exist.
+        """
+        with open(path, "rb") as handle:
+            return handle.read()
+
+    def _write_sidecar(self, path, data):
+        """
+        Writes a file next to a data file, replacing any previous version atomically.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+
+    def read_h5ad(self, path, backed=None):
         """
         Reads an H5AD file using `anndatareader`.
 
         :param path: Path to the `.h5ad` file.
         :type path: str
+        :param backed: 'r' to keep `X` on disk and read slices of it on access.
+        :type backed: str | None
 
         :return: Loaded `AnnData` object.
         :rtype: AnnData
         """
+        from .anndatareader import read_adata
+
         print("reading h5ad file", path)
-        adata = read_adata(path)
+        adata = read_adata(path, backed=backed)
         return adata
 
+    def read_h5ad_subset(self, path, elements=("obs", "var"), obs=None, var=None):
+        """
+        Reads selected elements of an H5AD file ('obs', 'var', 'uns', 'X') and optionally a
+        slice of its cells and genes, without loading the rest of the file.
+
+        :param path: Path to the `.h5ad` file.
+        :type path: str
+        :param elements: Elements to load.
+        :type elements: tuple[str]
+        :param obs: Cells to keep: a slice, integer positions, a boolean mask or obs names.
+        :param var: Genes to keep, specified as for `obs`.
+        :return: AnnData holding the requested elements, or None on error.
+        :rtype: AnnData | None
+        """
+        from .anndatareader import read_adata_subset
+
+        try:
+            with self._random_access(path, block_size=HDF5_BLOCK_SIZE) as source:
+                return read_adata_subset(source, elements, obs, var)
+        except Exception as e:
+            logging.error(f"❌ [read_h5ad_subset]: Error reading h5ad file {path}: {e}")
+            return None
+
     def clean_tmp_files(self, path):
         """
         Deletes a temporary file.
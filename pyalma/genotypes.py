@@ -0,0 +1,380 @@
+import functools
+import gzip
+import io
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from .vcf import (GZIP_MAGIC, INDEX_SUFFIXES, MAX_POSITION, VCF_COLUMNS, contig_chunks, iter_chunk, parse_region,
+                  read_header, read_index, read_records, region_chunks)
+
+# Decompressed VCF text parsed at a time: memory use follows this, not the file size
+DEFAULT_BATCH_BYTES = 64 * 1024 * 1024
+# Genotype code of missing calls ('.', './.', no GT field)
+MISSING = -1
+BCF_SUFFIX = ".bcf"
+INFO_HEADER = re.compile(r"^##INFO=<ID=([^,>]+),Number=([^,>]+),Type=([^,>]+)", re.MULTILINE)
+TAB, NEWLINE = b"\t"[0], b"\n"[0]
+# Flags of the `call_tables` entries
+HAPLOID, MISSING_CALL, IRREGULAR = 2, 4, 8
+
+
+def parse_header(header):
+    """
+    Extracts the column names and the INFO field definitions from a VCF header.
+
+    :param header: Header lines, up to and including `#CHROM`.
+    :type header: str
+    :return: Tuple (column names, dictionary mapping INFO IDs to their (Number, Type)).
+    :rtype: tuple[list[str], dict]
+    """
+    columns = header.rstrip("\r\n").rpartition("\n")[2][1:].split("\t")
+    info = {key: (number, type) for key, number, type in INFO_HEADER.findall(header)}
+    return columns, info
+
+
+def read_header_lines(stream):
+    """
+    Reads the header of an uncompressed binary VCF stream, leaving it at the first record.
+
+    :rtype: str
+    :raises ValueError: If the `#CHROM` header line is missing.
+    """
+    lines = []
+    while not lines or not lines[-1].startswith(b"#CHROM"):
+        line = stream.readline()
+        if not line.startswith(b"#"):
+            raise ValueError("❌ [read_header_lines]: Missing #CHROM header line")
+        lines.append(line)
+    return b"".join(lines).decode("utf-8")
+
+
+def line_batches(pieces, batch_bytes=DEFAULT_BATCH_BYTES):
+    """
+    Regroups pieces of VCF text into batches of about `batch_bytes` ending on a line boundary.
+
+    :param pieces: Iterable of bytes, split anywhere.
+    """
+    parts, size = [], 0
+    for piece in pieces:
+        parts.append(piece)
+        size += len(piece)
+        if size >= batch_bytes:
+            data = b"".join(parts)
+            cut = data.rfind(b"\n") + 1
+            if cut:
+                yield data[:cut]
+            parts, size = [data[cut:]], len(data) - cut
+    data = b"".join(parts)
+    if data.strip():
+        yield data if data.endswith(b"\n") else data + b"\n"
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_genotype(call):
+    """
+    Alternate allele count of one GT value ("0/1", "1|2", "10/10", "0/1/1", "1", ...); used for
+    the calls the vectorised path does not handle.
+    """
+    alleles = re.split(rb"[/|]", call.strip())
+    if not all(allele.isdigit() for allele in alleles):
+        return MISSING
+    return sum(allele.strip(b"0") != b"" for allele in alleles)
+
+
+@functools.lru_cache(maxsize=None)
+def call_tables():
+    """
+    Lookup tables decoding a GT value from the 4 bytes starting it, as two little-endian 16-bit
+    keys: (first allele, separator) and (second allele, following byte).
+
+    Entries hold the alternate allele count (0/1) plus the flags HAPLOID, MISSING_CALL and
+    IRREGULAR (a value the tables do not cover, see `parse_genotype`).
+
+    :return: Tuple of two uint8 arrays of 65536 entries.
+    """
+    import numpy as np
+
+    codes = np.arange(1 << 16)
+    allele, following = codes & 0xFF, codes >> 8
+    digit = (allele >= b"0"[0]) & (allele <= b"9"[0])
+    known = digit | (allele == b"."[0])
+    value = np.where(digit, (allele > b"0"[0]).astype(np.uint8), MISSING_CALL).astype(np.uint8)
+    ends = np.isin(following, list(b":\t\n"))
+    phased = np.isin(following, list(b"/|"))
+    first = np.where(known & ends, value | HAPLOID, np.where(known & phased, value, IRREGULAR)).astype(np.uint8)
+    second = np.where(known & ends, value, IRREGULAR).astype(np.uint8)
+    return first, second
+
+
+def parse_info(info, keys, definitions):
+    """
+    Extracts INFO fields into columns: Flag fields become booleans, single Integer and Float
+    values numbers (missing values are NA), anything else the raw strings.
+
+    :param info: The INFO column.
+    :type info: pd.Series
+    :rtype: dict[str, pd.Series]
+    """
+    import pandas as pd
+
+    columns = {}
+    for key in keys:
+        number, type = definitions.get(key, (".", "String"))
+        if type == "Flag":
+            columns[key] = info.str.contains(rf"(?:^|;){re.escape(key)}(?:;|$)", regex=True).astype(bool)
+            continue
+        values = info.str.extract(rf"(?:^|;){re.escape(key)}=([^;]*)", expand=False)
+        if number == "1" and type == "Integer":
+            values = pd.to_numeric(values, errors="coerce").astype("Int64")
+        elif number == "1" and type == "Float":
+            values = pd.to_numeric(values, errors="coerce").astype("float64")
+        columns[key] = values
+    return columns
+
+
+def parse_batch(data, columns, sample_index, info=(), definitions=None):
+    """
+    Parses a batch of VCF records into variant columns and a genotype matrix.
+
+    The sample fields are never split into Python strings: the GT calls are decoded from the
+    raw bytes with NumPy, using the tab positions of every line. Only calls with more than two
+    alleles or allele numbers above 9 go through `parse_genotype`.
+
+    :param data: Complete records, each ending with a newline.
+    :type data: bytes
+    :param columns: Column names, from the `#CHROM` line.
+    :type columns: list[str]
+    :param sample_index: Positions of the samples to decode among the sample columns.
+    :type sample_index: list[int]
+    :param info: INFO fields to extract, see `parse_info`.
+    :param definitions: INFO definitions, see `parse_header`.
+    :return: Tuple (variants DataFrame, int8 array of alternate allele counts, variants x samples).
+    :rtype: tuple[pd.DataFrame, np.ndarray]
+    :raises ValueError: If a record does not have one field per column.
+    """
+    import numpy as np
+
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(buffer == NEWLINE)
+    tabs = np.flatnonzero(buffer == TAB)
+    if len(tabs) != len(newlines) * (len(columns) - 1):
+        raise ValueError(f"❌ [parse_batch]: Records do not all have {len(columns)} columns")
+    delimiters = np.concatenate([tabs.reshape(len(newlines), len(columns) - 1), newlines[:, None]], axis=1)
+    if len(newlines) and ((delimiters[1:, 0] < newlines[:-1]).any() or (delimiters[:, -2] > newlines).any()):
+        raise ValueError(f"❌ [parse_batch]: Records do not all have {len(columns)} columns")
+
+    # Hand only the eight fixed fields of every line to pandas
+    line_starts = np.concatenate([[0], newlines[:-1] + 1]).astype(np.int64)
+    fixed_ends = delimiters[:, len(VCF_COLUMNS) - 1]
+    fixed = read_records(io.BytesIO(b"".join(data[start:end] + b"\n" for start, end
+                                             in zip(line_starts.tolist(), fixed_ends.tolist()))),
+                         list(VCF_COLUMNS))
+    variants = fixed.drop(columns="INFO")
+    for key, values in parse_info(fixed["INFO"], info, definitions or {}).items():
+        variants[key] = values
+
+    sample_index = np.asarray(sample_index, dtype=np.int64)
+    padded = np.concatenate([buffer, np.zeros(4, dtype=np.uint8)])
+    # Every byte offset of the batch read as the word of the 4 bytes starting there
+    words = np.ndarray(shape=(len(buffer) + 1,), dtype="<u4", buffer=padded, strides=(1,))
+    format_start = fixed_ends + 1 if len(columns) > len(VCF_COLUMNS) else line_starts
+    format_bytes = words[format_start].view(np.uint8).reshape(-1, 4)
+    has_gt = ((format_bytes[:, 0] == b"G"[0]) & (format_bytes[:, 1] == b"T"[0])
+              & np.isin(format_bytes[:, 2], list(b":\t\n")))
+    if np.array_equal(sample_index, np.arange(len(columns) - len(VCF_COLUMNS) - 1)):
+        sample_delimiters = delimiters[:, len(VCF_COLUMNS):-1]  # all samples, in file order: no copy
+    else:
+        sample_delimiters = delimiters[:, len(VCF_COLUMNS) + sample_index]
+    starts = sample_delimiters + 1
+    # With a subset of samples `starts` is not C-contiguous, and the gathered words keep its layout
+    halves = np.ascontiguousarray(words[starts]).view(np.uint16).reshape(starts.shape + (2,))
+    first_table, second_table = call_tables()
+    first = first_table[halves[..., 0]]
+    # The second half only counts for diploid calls
+    second = np.where(first & HAPLOID, 0, second_table[halves[..., 1]]).astype(np.uint8)
+    flags = first | second
+    genotypes = ((first & 1) + (second & 1)).view(np.int8)
+    genotypes[(flags & MISSING_CALL) != 0] = MISSING
+    rows, cells = np.nonzero(((flags & IRREGULAR) != 0) & has_gt[:, None])
+    if len(rows):
+        ends = delimiters[rows, len(VCF_COLUMNS) + 1 + sample_index[cells]]
+        genotypes[rows, cells] = [parse_genotype(data[start:end].partition(b":")[0])
+                                  for start, end in zip(starts[rows, cells].tolist(), ends.tolist())]
+    genotypes[~has_gt] = MISSING
+    return variants, genotypes
+
+
+def collect(header, batches, samples=None, info=(), region=None):
+    """
+    Parses batches of VCF records into the result of `read_genotypes`.
+
+    :param header: Header lines, up to and including `#CHROM`.
+    :type header: str
+    :param batches: Iterable of record batches, see `line_batches`.
+    :param region: Optional (chromosome, start, end) keeping only the overlapping records.
+    :type region: tuple | None
+    :raises ValueError: If a requested sample is not in the file.
+    """
+    import numpy as np
+    import pandas as pd
+
+    columns, definitions = parse_header(header)
+    names = columns[len(VCF_COLUMNS) + 1:]
+    if samples is None:
+        samples = names
+    unknown = [sample for sample in samples if sample not in names]
+    if unknown:
+        raise ValueError(f"❌ [collect]: Samples not in the file: {', '.join(unknown[:5])}")
+    positions = {name: i for i, name in enumerate(names)}
+    sample_index = [positions[sample] for sample in samples]
+
+    frames, matrices = [], []
+    for data in batches:
+        variants, genotypes = parse_batch(data, columns, sample_index, info, definitions)
+        if region is not None:
+            chrom, start, end = region
+            begin = variants["POS"] - 1
+            overlap = ((variants["CHROM"] == chrom) & (begin < end)
+                       & (begin + variants["REF"].str.len() > start)).to_numpy()
+            variants, genotypes = variants[overlap], genotypes[overlap]
+        frames.append(variants)
+        matrices.append(genotypes.T)
+    if not frames:
+        variants, genotypes = parse_batch(b"", columns, sample_index, info, definitions)
+        frames.append(variants)
+        matrices.append(genotypes.T)
+    return {"variants": pd.concat(frames, ignore_index=True),
+            "samples": list(samples),
+            "genotypes": matrices[0] if len(matrices) == 1 else np.concatenate(matrices, axis=1)}
+
+
+def combine(results):
+    """
+    Concatenates `read_genotypes` results holding the same samples, in order.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if len(results) == 1:
+        result = results[0]
+    else:
+        result = {"variants": pd.concat([result["variants"] for result in results], ignore_index=True),
+                  "samples": results[0]["samples"],
+                  "genotypes": np.concatenate([result["genotypes"] for result in results], axis=1)}
+    result["variants"]["CHROM"] = result["variants"]["CHROM"].astype("category")
+    return result
+
+
+def read_genotypes(stream, samples=None, info=(), batch_bytes=DEFAULT_BATCH_BYTES):
+    """
+    Reads the variants and genotype matrix of an uncompressed VCF stream, in batches.
+
+    :param stream: Binary stream positioned at the start of the header.
+    :param samples: Sample names to keep, in this order; all samples by default.
+    :type samples: list[str] | None
+    :param info: INFO fields to add as variant columns.
+    :type info: tuple[str]
+    :param batch_bytes: VCF text parsed at a time.
+    :type batch_bytes: int
+    :return: Dictionary with 'variants' (CHROM, POS, ID, REF, ALT, QUAL, FILTER and the INFO
+        fields, one row per record), 'samples' (names) and 'genotypes', an int8 array of shape
+        (samples, variants) holding the number of alternate alleles of each call, -1 if missing.
+    :rtype: dict
+    """
+    header = read_header_lines(stream)
+    pieces = iter(lambda: stream.read(batch_bytes), b"")
+    return combine([collect(header, line_batches(pieces, batch_bytes), samples, info)])
+
+
+def read_genotypes_region(source, index, region, samples=None, info=(), batch_bytes=DEFAULT_BATCH_BYTES):
+    """
+    Reads the variants and genotypes of a bgzipped, indexed VCF overlapping a region,
+    decompressing only the BGZF blocks the index points to.
+
+    :param source: Seekable binary file object (e.g. a `RemoteFile`).
+    :param index: Parsed index, see `pyalma.vcf.read_index`.
+    :type index: dict
+    :param region: Region, see `pyalma.vcf.parse_region`.
+    :type region: str
+    :return: See `read_genotypes`.
+    :rtype: dict
+    """
+    chrom, start, end = (region, 0, MAX_POSITION) if region in index["names"] else parse_region(region)
+    header = read_header(source)
+    pieces = chain.from_iterable(iter_chunk(source, chunk_start, chunk_end)
+                                 for chunk_start, chunk_end in region_chunks(index, chrom, start, end))
+    return combine([collect(header, line_batches(pieces, batch_bytes), samples, info, (chrom, start, end))])
+
+
+def read_genotypes_bcf(path, index_path=None, region=None, samples=None, info=(), batch_bytes=DEFAULT_BATCH_BYTES):
+    """
+    Reads the variants and genotypes of a local BCF file, decoded to VCF text by pysam.
+
+    :return: See `read_genotypes`.
+    :rtype: dict
+    """
+    import pysam
+
+    with pysam.VariantFile(path, index_filename=index_path) as variant_file:
+        header = str(variant_file.header)
+        records = variant_file.fetch(region=region) if region is not None else variant_file
+        pieces = (str(record).encode("utf-8") for record in records)
+        return combine([collect(header, line_batches(pieces, batch_bytes), samples, info)])
+
+
+def find_index(path):
+    """
+    :return: Path of the .tbi or .csi index next to a local file, or None.
+    :rtype: str | None
+    """
+    return next((path + suffix for suffix in INDEX_SUFFIXES if os.path.isfile(path + suffix)), None)
+
+
+def _read_sequence(path, index, name, samples, info, batch_bytes):
+    with open(path, "rb") as source:
+        return read_genotypes_region(source, index, name, samples, info, batch_bytes)
+
+
+def read_genotypes_file(path, samples=None, info=(), region=None, batch_bytes=DEFAULT_BATCH_BYTES, processes=None,
+                        index_path=None):
+    """
+    Reads the variants and genotype matrix of a local VCF (plain or bgzipped) or BCF file.
+
+    With `processes` above 1, an indexed bgzipped VCF is split by sequence and the sequences
+    are parsed in parallel worker processes.
+
+    :param region: Region such as "chr1:1-1000000"; needs an index.
+    :type region: str | None
+    :param processes: Number of worker processes.
+    :type processes: int | None
+    :param index_path: Index file, if not next to `path`.
+    :type index_path: str | None
+    :return: See `read_genotypes`.
+    :rtype: dict
+    :raises FileNotFoundError: If a region is requested and there is no index.
+    """
+    index_path = index_path or find_index(path)
+    if path.endswith(BCF_SUFFIX):
+        return read_genotypes_bcf(path, index_path, region, samples, info, batch_bytes)
+    with open(path, "rb") as file:
+        compressed = file.read(2) == GZIP_MAGIC
+    parallel = processes is not None and processes > 1
+    if (region is not None or parallel) and (index_path is None or not compressed):
+        if region is not None:
+            raise FileNotFoundError(f"❌ [read_genotypes_file]: Region queries need a bgzipped file and an index: {path}")
+        logging.warning(f"⚠️ [read_genotypes_file]: No index for {path}, reading it in a single process")
+        parallel = False
+    if region is not None or parallel:
+        with open(index_path, "rb") as index_file:
+            index = read_index(index_file.read())
+    if region is not None:
+        return _read_sequence(path, index, region, samples, info, batch_bytes)
+    names = [name for name, _, _ in contig_chunks(index)] if parallel else []
+    if len(names) > 1:
+        with ProcessPoolExecutor(min(processes, len(names))) as pool:
+            return combine(list(pool.map(_read_sequence, repeat(path), repeat(index), names, repeat(samples),
+                                         repeat(info), repeat(batch_bytes))))
+    with open(path, "rb") as file:
+        return read_genotypes(gzip.GzipFile(fileobj=file) if compressed else file, samples, info, batch_bytes)
@@ -1,6 +1,145 @@
-from PIL import Image
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
- 
-                
-def read_image(content):
+
+# Pillow releases the GIL while decoding and resizing, so threads decode images in parallel
+DEFAULT_IMAGE_WORKERS = 8
+# Images are first shrunk by an integer factor (JPEG draft scale or `Image.reduce`) to within
+# this factor of the target size, then resampled; the default of `Image.thumbnail`
+REDUCING_GAP = 2.0
+# Modes that can be stacked into a uint8 array, with their number of channels
+ARRAY_MODES = {"L": 1, "RGB": 3, "RGBA": 4}
+
+
+def open_image(content):
+    """
+    Opens an image lazily: only the header is parsed until the pixels are needed.
+
+    :param content: Encoded image bytes, a file path or a binary file object.
+    :type content: bytes | str | file
+    :rtype: PIL.Image.Image
+    """
+    from PIL import Image  # Pillow is imported here to keep `import pyalma` light
+
     return Image.open(BytesIO(content)) if isinstance(content, bytes) else Image.open(content)
+
+
+def fit_image(image, max_size=None, mode=None):
+    """
+    Decodes an opened image, shrunk to fit within `max_size` and converted to `mode`.
+
+    JPEGs are decoded straight at a reduced scale (1/2, 1/4 or 1/8) through the draft mode,
+    and other formats are reduced by block averaging before the final resampling, so a
+    thumbnail costs a fraction of a full decode.
+
+    :param image: Image from `open_image`, not yet loaded.
+    :type image: PIL.Image.Image
+    :param max_size: Largest (width, height); the aspect ratio is kept and images are never enlarged.
+    :type max_size: tuple[int, int] | None
+    :param mode: Pillow mode to convert to, e.g. "RGB" or "L".
+    :type mode: str | None
+    :rtype: PIL.Image.Image
+    """
+    if max_size is not None:
+        if mode == "L":
+            # JPEGs can decode luminance only; other modes are converted after resizing
+            image.draft("L", (int(max_size[0] * REDUCING_GAP), int(max_size[1] * REDUCING_GAP)))
+        image.thumbnail(max_size, reducing_gap=REDUCING_GAP)
+    if mode is not None and image.mode != mode:
+        return image.convert(mode)
+    image.load()
+    return image
+
+
+def read_image(content, max_size=None, mode=None):
+    """
+    Opens an image; with `max_size` or `mode` it is decoded right away, see `fit_image`.
+
+    :param content: Encoded image bytes, a file path or a binary file object.
+    :type content: bytes | str | file
+    :rtype: PIL.Image.Image
+    """
+    image = open_image(content)
+    if max_size is None and mode is None:
+        return image
+    return fit_image(image, max_size, mode)
+
+
+def read_images(paths, read, max_size=None, mode=None, as_array=False, workers=DEFAULT_IMAGE_WORKERS):
+    """
+    Reads and decodes many images in a thread pool; each worker fetches a file with `read`
+    and decodes it, so transfers overlap with decoding.
+
+    With `as_array`, the images are written into one preallocated uint8 array of shape
+    (images, height, width, channels), each in the top-left corner of its slot. The slot size
+    is `max_size`, or without it the largest image (whose headers are then read first).
+
+    :param paths: Image paths.
+    :type paths: list[str]
+    :param read: Function giving the encoded content of a path (bytes, local path or file object).
+    :type read: Callable
+    :param max_size: Largest (width, height) of the decoded images.
+    :type max_size: tuple[int, int] | None
+    :param mode: Pillow mode to convert to; "RGB" by default with `as_array`, which accepts
+        "L", "RGB" and "RGBA".
+    :type mode: str | None
+    :param as_array: Return a NumPy batch instead of a list of images.
+    :type as_array: bool
+    :param workers: Number of threads.
+    :type workers: int
+
+    :return: List of images in the order of `paths` (None for unreadable files) or, with
+        `as_array`, dictionary with 'images' (the uint8 batch) and 'sizes' (int array of shape
+        (images, 2): width and height of each image in its slot, 0 for unreadable files).
+    :rtype: list | dict
+    :raises ValueError: If `mode` cannot be stacked into a uint8 array.
+    """
+    if as_array:
+        mode = mode or "RGB"
+        if mode not in ARRAY_MODES:
+            raise ValueError(f"❌ [read_images]: mode must be one of {sorted(ARRAY_MODES)} with as_array, got {mode}")
+    paths = list(paths)
+    images = [None] * len(paths)
+
+    def run(task, indices):
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(indices)))) as pool:
+            for i, future in zip(indices, [pool.submit(task, i) for i in indices]):
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.warning(f"⚠️ [read_images]: Failed to read image {paths[i]}: {e}")
+                    images[i] = None
+
+    def load(i):
+        if images[i] is None:
+            images[i] = open_image(read(paths[i]))
+        images[i] = fit_image(images[i], max_size, mode)
+
+    if not as_array:
+        run(load, range(len(paths)))
+        return images
+
+    import numpy as np
+
+    if max_size is None:
+        def open_header(i):
+            images[i] = open_image(read(paths[i]))
+
+        run(open_header, range(len(paths)))
+        opened = [image.size for image in images if image is not None]
+        max_size = tuple(int(n) for n in np.max(opened, axis=0)) if opened else (0, 0)
+        indices = [i for i, image in enumerate(images) if image is not None]
+    else:
+        indices = range(len(paths))
+    batch = np.zeros((len(paths), max_size[1], max_size[0], ARRAY_MODES[mode]), dtype=np.uint8)
+    sizes = np.zeros((len(paths), 2), dtype=np.int64)
+
+    def store(i):
+        load(i)
+        width, height = images[i].size
+        batch[i, :height, :width] = np.asarray(images[i]).reshape(height, width, -1)
+        sizes[i] = width, height
+        images[i] = None
+
+    run(store, indices)
+    return {"images": batch, "sizes": sizes}
@@ -0,0 +1,344 @@
+import csv
+
+# Standard BED columns, in order; a file holds the first 3 to 12 of them
+BED_COLUMNS = ("chrom", "start", "end", "name", "score", "strand", "thickStart", "thickEnd", "itemRgb",
+               "blockCount", "blockSizes", "blockStarts")
+BED_DTYPES = {"chrom": str, "start": "int64", "end": "int64", "name": str, "score": "float64", "strand": str,
+              "thickStart": "int64", "thickEnd": "int64", "itemRgb": str, "blockCount": "int64",
+              "blockSizes": str, "blockStarts": str}
+HEADER_PREFIXES = ("#", "track", "browser")
+# Suffix of the index file saved next to a BED file
+INDEX_SUFFIX = ".pyalma-index.npz"
+# Intervals containing the starts of at least this many following intervals are moved to a
+# further component, as in an augmented interval list, so that long intervals do not make
+# every query scan all the intervals after them
+MIN_COVERAGE = 20
+MAX_COMPONENTS = 8
+
+
+def read_bed(source):
+    """
+    Reads a BED file into a typed DataFrame.
+
+    Header lines (`track`, `browser`, `#` comments, or a column header such as "chrom start
+    end") before the first interval are skipped. Columns are named after the
+    BED specification ('chrom', 'start', 'end', 'name', 'score', 'strand', ...); coordinates
+    are 0-based, half-open int64 values, and columns past the twelfth are named 'extra_<n>'.
+
+    :param source: Local path, or seekable text or binary stream.
+    :type source: str | io.IOBase
+    :rtype: pd.DataFrame
+    """
+    import pandas as pd
+
+    if isinstance(source, str):
+        with open(source, "rb") as stream:
+            return read_bed(stream)
+    while True:
+        position = source.tell()
+        line = source.readline()
+        text = line.decode("utf-8", errors="replace") if isinstance(line, bytes) else line
+        fields = text.split("\t")
+        # The first interval is the first line whose start and end are integers
+        if not text.startswith(HEADER_PREFIXES) and len(fields) >= 3 and all(
+                field.strip().isdigit() for field in fields[1:3]):
+            break
+        if not line:
+            return pd.DataFrame({column: pd.Series(dtype=BED_DTYPES[column]) for column in BED_COLUMNS[:3]})
+    source.seek(position)
+    count = len(text.rstrip("\r\n").split("\t"))
+    names = list(BED_COLUMNS[:count]) + [f"extra_{i}" for i in range(len(BED_COLUMNS), count)]
+    dtype = {name: BED_DTYPES.get(name, str) for name in names}
+    # No `comment`: pandas would cut any field containing "#" (e.g. a name "gene#1")
+    return pd.read_csv(source, sep="\t", header=None, names=names, dtype=dtype, quoting=csv.QUOTE_NONE,
+                       na_values={"score": ["."]}, keep_default_na=False)
+
+
+def decompose(starts, ends, rows):
+    """
+    Splits intervals sorted by start into components in which no interval contains the starts
+    of `MIN_COVERAGE` or more following intervals (the last component takes what is left).
+
+    :return: List of (starts, ends, rows) arrays, each sorted by start.
+    :rtype: list[tuple]
+    """
+    import numpy as np
+
+    components = []
+    for _ in range(MAX_COMPONENTS - 1):
+        covered = np.searchsorted(starts, ends, "left") - np.arange(len(starts)) - 1
+        long = covered >= MIN_COVERAGE
+        if not long.any():
+            break
+        components.append((starts[~long], ends[~long], rows[~long]))
+        starts, ends, rows = starts[long], ends[long], rows[long]
+    components.append((starts, ends, rows))
+    return components
+
+
+def build_chromosome(starts, ends, rows):
+    """
+    Builds the query arrays of one chromosome.
+
+    :param starts: Interval starts, sorted.
+    :param ends: Interval ends, in the same order.
+    :param rows: Row numbers of the intervals in the BED table, in the same order.
+    :return: Dictionary of arrays: the components of `decompose` concatenated ('starts', 'ends',
+        'rows', 'max_ends' the running maximum of the ends within each component, 'bounds' the
+        component offsets), starts and ends sorted on their own with their rows, and the union
+        of the intervals ('union_starts', 'union_ends', 'union_before' the bases covered before
+        each union interval).
+    :rtype: dict
+    """
+    import numpy as np
+
+    components = decompose(starts, ends, rows)
+    chromosome = {name: np.concatenate([component[i] for component in components])
+                  for i, name in enumerate(("starts", "ends", "rows"))}
+    chromosome["max_ends"] = np.concatenate([np.maximum.accumulate(component[1]) for component in components])
+    chromosome["bounds"] = np.cumsum([0] + [len(component[0]) for component in components])
+    chromosome["sorted_starts"], chromosome["start_rows"] = starts, rows
+    by_end = np.argsort(ends, kind="stable")
+    chromosome["sorted_ends"], chromosome["end_rows"] = ends[by_end], rows[by_end]
+
+    # Union: a new interval begins wherever a start lies past every end seen so far
+    max_ends = np.maximum.accumulate(ends)
+    new = np.ones(len(starts), dtype=bool)
+    new[1:] = starts[1:] > max_ends[:-1]
+    first = np.flatnonzero(new)
+    union_starts = starts[first]
+    union_ends = max_ends[np.append(first[1:] - 1, len(starts) - 1)]
+    chromosome["union_starts"], chromosome["union_ends"] = union_starts, union_ends
+    chromosome["union_before"] = np.concatenate([[0], np.cumsum(union_ends - union_starts)[:-1]]).astype(np.int64)
+    return chromosome
+
+
+class BedIndex:
+    """
+    Interval index over a BED table, answering overlap, nearest and coverage queries for whole
+    arrays of query intervals at once.
+
+    Intervals are grouped by chromosome and sorted by start. Overlap counts and coverage are
+    binary searches over sorted starts, sorted ends and the merged union of the intervals;
+    overlapping pairs are found per component of an augmented interval list (sorted starts
+    plus a running maximum of the ends). All coordinates are 0-based and half-open, as in BED.
+    """
+
+    def __init__(self, intervals, signature=None):
+        """
+        :param intervals: BED table, see `read_bed`; at least 'chrom', 'start' and 'end'.
+        :type intervals: pd.DataFrame
+        :param signature: (size, mtime) of the BED file the index was built from.
+        :type signature: tuple | None
+        """
+        import numpy as np
+        import pandas as pd
+
+        self.intervals = intervals.reset_index(drop=True)
+        self.signature = signature
+        self.chromosomes = {}
+        codes, names = pd.factorize(self.intervals["chrom"])
+        starts = self.intervals["start"].to_numpy(dtype=np.int64)
+        ends = self.intervals["end"].to_numpy(dtype=np.int64)
+        order = np.lexsort((starts, codes))
+        bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+        for code, name in enumerate(names):
+            rows = order[bounds[code]:bounds[code + 1]]
+            self.chromosomes[name] = build_chromosome(starts[rows], ends[rows], rows.astype(np.int64))
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def _groups(self, chrom, start, end):
+        """
+        Yields (query positions, chromosome arrays or None, starts, ends) per query chromosome.
+        """
+        import numpy as np
+        import pandas as pd
+
+        start = np.atleast_1d(np.asarray(start, dtype=np.int64))
+        end = np.atleast_1d(np.asarray(end, dtype=np.int64))
+        chrom = np.full(len(start), chrom, dtype=object) if np.isscalar(chrom) else np.asarray(chrom, dtype=object)
+        codes, names = pd.factorize(chrom)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+        for code, name in enumerate(names):
+            positions = order[bounds[code]:bounds[code + 1]]
+            yield positions, self.chromosomes.get(name), start[positions], end[positions]
+
+    def count_overlaps(self, chrom, start, end):
+        """
+        Counts the intervals overlapping each query interval.
+
+        :param chrom: Chromosome of every query, or one chromosome for all.
+        :type chrom: str | array-like
+        :param start: Query starts.
+        :type start: int | array-like
+        :param end: Query ends.
+        :type end: int | array-like
+        :rtype: np.ndarray
+        """
+        import numpy as np
+
+        counts = np.zeros(len(np.atleast_1d(start)), dtype=np.int64)
+        for positions, chromosome, starts, ends in self._groups(chrom, start, end):
+            if chromosome is not None:
+                # Intervals starting before the query end, minus those also ending before its start
+                counts[positions] = (np.searchsorted(chromosome["sorted_starts"], ends, "left")
+                                     - np.searchsorted(chromosome["sorted_ends"], starts, "right"))
+        return counts
+
+    def overlaps(self, chrom, start, end):
+        """
+        Finds all (query, interval) pairs that overlap.
+
+        :return: Tuple (query positions, interval rows in `intervals`), int64 arrays sorted by
+            query then row.
+        :rtype: tuple[np.ndarray, np.ndarray]
+        """
+        import numpy as np
+
+        queries, rows = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+        for positions, chromosome, starts, ends in self._groups(chrom, start, end):
+            if chromosome is None:
+                continue
+            bounds = chromosome["bounds"]
+            for low, high in zip(bounds[:-1], bounds[1:]):
+                # Candidates: from the first interval whose running max end passes the query
+                # start, to the last one starting before the query end
+                first = low + np.searchsorted(chromosome["max_ends"][low:high], starts, "right")
+                last = low + np.searchsorted(chromosome["starts"][low:high], ends, "left")
+                counts = np.maximum(last - first, 0)
+                query = np.repeat(np.arange(len(positions)), counts)
+                candidate = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+                hit = chromosome["ends"][candidate] > starts[query]
+                queries.append(positions[query[hit]])
+                rows.append(chromosome["rows"][candidate[hit]])
+        # One int64 key per pair: sorting it orders the pairs by query, then row
+        keys = np.concatenate(queries) * max(len(self.intervals), 1) + np.concatenate(rows)
+        keys.sort()
+        return np.divmod(keys, max(len(self.intervals), 1))
+
+    def intersect(self, queries):
+        """
+        Joins a table of query intervals with the intervals overlapping them.
+
+        :param queries: Table with 'chrom', 'start' and 'end' columns (e.g. from `read_bed`).
+        :type queries: pd.DataFrame
+        :return: One row per overlapping pair: the query columns, then the interval columns
+            suffixed with '_b'.
+        :rtype: pd.DataFrame
+        """
+        import pandas as pd
+
+        query, row = self.overlaps(queries["chrom"].to_numpy(), queries["start"], queries["end"])
+        left = queries.iloc[query].reset_index(drop=True)
+        right = self.intervals.iloc[row].reset_index(drop=True).add_suffix("_b")
+        return pd.concat([left, right], axis=1)
+
+    def nearest(self, chrom, start, end):
+        """
+        Finds the closest interval to each query interval.
+
+        Overlapping intervals are at distance 0; otherwise the distance is the number of bases
+        between the two intervals (0 for book-ended ones). Ties go to the upstream interval.
+
+        :return: Tuple (interval rows, distances), int64 arrays; -1 for queries on chromosomes
+            without intervals.
+        :rtype: tuple[np.ndarray, np.ndarray]
+        """
+        import numpy as np
+
+        count = len(np.atleast_1d(start))
+        rows, distances = np.full(count, -1, dtype=np.int64), np.full(count, -1, dtype=np.int64)
+        far = np.iinfo(np.int64).max
+        for positions, chromosome, starts, ends in self._groups(chrom, start, end):
+            if chromosome is None:
+                continue
+            sorted_starts, sorted_ends = chromosome["sorted_starts"], chromosome["sorted_ends"]
+            # Upstream: the interval ending last at or before the query start
+            before = np.searchsorted(sorted_ends, starts, "right") - 1
+            upstream = np.where(before >= 0, starts - sorted_ends[np.maximum(before, 0)], far)
+            # Downstream: the interval starting first at or after the query end
+            after = np.searchsorted(sorted_starts, ends, "left")
+            downstream = np.where(after < len(sorted_starts),
+                                  sorted_starts[np.minimum(after, len(sorted_starts) - 1)] - ends, far)
+            rows[positions] = np.where(upstream <= downstream, chromosome["end_rows"][np.maximum(before, 0)],
+                                       chromosome["start_rows"][np.minimum(after, len(sorted_starts) - 1)])
+            distances[positions] = np.minimum(upstream, downstream)
+        query, row = self.overlaps(chrom, start, end)
+        query, first = np.unique(query, return_index=True)
+        rows[query], distances[query] = row[first], 0
+        return rows, distances
+
+    def coverage(self, chrom, start, end):
+        """
+        Counts the bases of each query interval covered by at least one interval.
+
+        :return: Covered bases, int64 (divide by `end - start` for the covered fraction).
+        :rtype: np.ndarray
+        """
+        import numpy as np
+
+        covered = np.zeros(len(np.atleast_1d(start)), dtype=np.int64)
+        for positions, chromosome, starts, ends in self._groups(chrom, start, end):
+            if chromosome is None:
+                continue
+            covered[positions] = (self._covered_before(chromosome, ends)
+                                  - self._covered_before(chromosome, starts))
+        return covered
+
+    @staticmethod
+    def _covered_before(chromosome, positions):
+        """
+        Bases of the union of the intervals lying before each position.
+        """
+        import numpy as np
+
+        union_starts = chromosome["union_starts"]
+        index = np.searchsorted(union_starts, positions, "right") - 1
+        inside = np.maximum(index, 0)
+        partial = np.minimum(positions, chromosome["union_ends"][inside]) - union_starts[inside]
+        return np.where(index >= 0, chromosome["union_before"][inside] + partial, 0)
+
+    def save(self, handle):
+        """
+        Writes the index and its BED table to a binary file object (NumPy `.npz`, no pickles).
+        """
+        import numpy as np
+
+        arrays = {"names": np.array(list(self.chromosomes), dtype=str),
+                  "columns": np.array(list(self.intervals.columns), dtype=str)}
+        if self.signature is not None:
+            arrays["signature"] = np.array(self.signature, dtype=np.int64)
+        for i, column in enumerate(self.intervals.columns):
+            values = self.intervals[column]
+            arrays[f"column_{i}"] = values.to_numpy(dtype=str) if values.dtype == object else values.to_numpy()
+        for i, chromosome in enumerate(self.chromosomes.values()):
+            for key, values in chromosome.items():
+                arrays[f"{i}_{key}"] = values
+        np.savez(handle, **arrays)
+
+    @classmethod
+    def load(cls, handle):
+        """
+        Reads an index written by `save`.
+
+        :param handle: Binary file object or path.
+        :rtype: BedIndex
+        """
+        import numpy as np
+        import pandas as pd
+
+        with np.load(handle, allow_pickle=False) as data:
+            index = cls.__new__(cls)
+            columns = data["columns"].tolist()
+            index.intervals = pd.DataFrame({column: data[f"column_{i}"] for i, column in enumerate(columns)})
+            for column in index.intervals.columns:
+                if index.intervals[column].dtype.kind == "U":
+                    index.intervals[column] = index.intervals[column].astype(object)
+            index.signature = tuple(data["signature"].tolist()) if "signature" in data else None
+            keys = [key.partition("_")[2] for key in data.files if key.startswith("0_")]
+            index.chromosomes = {name: {key: data[f"{i}_{key}"] for key in keys}
+                                 for i, name in enumerate(data["names"].tolist())}
+        return index
@@ -1,4 +1,5 @@
 from .fileReader import FileReader
+from .tree import scan_tree, tree_to_dataframe
 import logging
 import os
 
@@ -45,6 +46,27 @@ class LocalFileReader(FileReader):
             logging.error(f"❌ [listdir]: Error listing directory {path}: {e}")
             return []
 
+    def walk(self, path, max_depth=None, as_dataframe=False):
+        """
+        Lists the whole tree under a local directory, without following symbolic links.
+
+        :param path: Directory to list.
+        :type path: str
+        :param max_depth: Deepest level to list (1 lists `path` itself only), None for no limit.
+        :type max_depth: int | None
+        :param as_dataframe: Return a DataFrame instead of a dictionary of lists.
+        :type as_dataframe: bool
+        :return: Entries sorted by path, as parallel lists 'path' (relative to `path`), 'type'
+            (find letters: 'f', 'd', 'l', ...), 'size' and 'mtime'; None on error.
+        :rtype: dict | pd.DataFrame | None
+        """
+        try:
+            tree = scan_tree(path, max_depth)
+            return tree_to_dataframe(tree) if as_dataframe else tree
+        except Exception as e:
+            logging.error(f"❌ [walk]: Error listing directory tree {path}: {e}")
+            return None
+
     def run_cmd(self, command):
         """
         Executes a shell command locally and returns its output.
@@ -74,8 +96,8 @@ class LocalFileReader(FileReader):
                 return f.read()
         return path
 
-    def _read_vcf_as_dataframe(self, path):
-        return self.read_vcf_file_into_df(path)
+    def _read_vcf_as_dataframe(self, path, region=None):
+        return self.read_vcf_file_into_df(path, region)
 
     @staticmethod
     def get_local_file_size(file_path):
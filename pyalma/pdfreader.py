@@ -1,5 +1,8 @@
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+from itertools import repeat
+
+IMAGE_MODES = ("ref", "bytes", None)
 
 def get_doc(content):
     """
@@ -25,42 +28,133 @@ def get_doc(content):
         raise ValueError("Invalid content type. Expected a file path, bytes, or file-like object.")
 
 
-def read_pdf_to_dataframe(content):
+class PdfImage:
+    """
+    Lazy reference to an image of a PDF: its metadata, with the bytes extracted on `read()`.
+
+    Images are identified by their xref, so an image shown on several pages is a single object.
+    """
+
+    def __init__(self, source, xref, width, height, name):
+        """
+        :param source: The PDF (path or bytes, kept by reference).
+        :type source: str | bytes
+        :param xref: Cross-reference number of the image in the PDF.
+        :type xref: int
+        """
+        self.source = source
+        self.xref = xref
+        self.width = width
+        self.height = height
+        self.name = name
+
+    def read(self):
+        """
+        :return: The image, in its stored format (PNG, JPEG, ...).
+        :rtype: bytes
+        """
+        return extract_images(self.source, [self.xref])[self.xref]
+
+    def __bytes__(self):
+        return self.read()
+
+    def __repr__(self):
+        return f"PdfImage(xref={self.xref}, {self.width}x{self.height}, name={self.name!r})"
+
+
+def extract_images(content, xrefs):
+    """
+    Extracts images from a PDF, opening it once.
+
+    :param content: File path or binary content.
+    :type content: str | bytes
+    :param xrefs: Cross-reference numbers of the images.
+    :return: Dictionary mapping each xref to the image bytes.
+    :rtype: dict[int, bytes]
+    """
+    with get_doc(content) as doc:
+        return {xref: doc.extract_image(xref)["image"] for xref in set(xrefs)}
+
+
+def _extract_pages(content, numbers, with_images):
+    """
+    Extracts the text, and the image references, of some pages; runs in worker processes.
+
+    :return: One dictionary per page, with images as (xref, width, height, name) tuples.
+    :rtype: list[dict]
+    """
+    rows = []
+    with get_doc(content) as doc:
+        for number in numbers:
+            page = doc[number - 1]
+            row = {"Page": number, "Content": page.get_text("text")}
+            if with_images:
+                row["Images"] = [(image[0], image[2], image[3], image[7]) for image in page.get_images(full=True)]
+            rows.append(row)
+    return rows
+
+
+def read_pdf_to_dataframe(content, pages=None, images="ref", processes=1):
     """
     Extracts structured data from a PDF and loads it into a DataFrame.
 
     Each row includes:
         - Page number
         - Text content
-        - List of extracted images (as bytes)
+        - Images on the page (lazy `PdfImage` references by default)
+
+    With `processes` above 1, selected pages are split into contiguous ranges across a process
+    pool, each worker opening the document itself. Images are only listed while pages are read:
+    each distinct image is extracted at most once, and only with `images="bytes"`.
 
     :param content: Path to PDF or binary content.
-    :type content: str | bytes
+    :type content: str | bytes | BytesIO
+    :param pages: 1-based numbers of the pages to read (e.g. `range(1, 51)`); all pages by default.
+    :type pages: Iterable[int] | None
+    :param images: "ref" for `PdfImage` references, "bytes" for the image bytes (shared between
+        pages showing the same image), or None for text only (no 'Images' column).
+    :type images: str | None
+    :param processes: Number of worker processes; 1 (the default) reads in the calling process.
+    :type processes: int
 
     :return: DataFrame with columns ['Page', 'Content', 'Images'].
     :rtype: pd.DataFrame
+    :raises ValueError: If a page number is out of range or `images` is unknown.
     """
-    doc = get_doc(content)
-    data = []
-
-    for i, page in enumerate(doc):
-        text = page.get_text("text")
-        images = page.get_images(full=True)
-
-        extracted_images = []
-        for _, img in enumerate(images):
-            xref = img[0]
-            base_image = doc.extract_image(xref)
-            image_bytes = base_image["image"]
-            extracted_images.append(image_bytes)
-
-        data.append({
-            "Page": i + 1,
-            "Content": text,
-            "Images": extracted_images
-        })
-
-    return pd.DataFrame(data)
+    import pandas as pd
+
+    if images not in IMAGE_MODES:
+        raise ValueError(f"❌ [read_pdf_to_dataframe]: images must be one of {IMAGE_MODES}")
+    if isinstance(content, BytesIO):
+        content = content.getvalue()
+    with get_doc(content) as doc:
+        page_count = doc.page_count
+    numbers = list(range(1, page_count + 1)) if pages is None else [int(number) for number in pages]
+    invalid = [number for number in numbers if not 1 <= number <= page_count]
+    if invalid:
+        raise ValueError(f"❌ [read_pdf_to_dataframe]: Pages out of range 1-{page_count}: {invalid[:5]}")
+
+    if processes > 1 and len(numbers) > 1:
+        size = -(-len(numbers) // processes)
+        ranges = [numbers[i:i + size] for i in range(0, len(numbers), size)]
+        with ProcessPoolExecutor(len(ranges)) as pool:
+            rows = [row for part in pool.map(_extract_pages, repeat(content), ranges, repeat(images is not None))
+                    for row in part]
+    else:
+        rows = _extract_pages(content, numbers, images is not None)
+
+    columns = ["Page", "Content"]
+    if images is not None:
+        columns.append("Images")
+        references = {}
+        for row in rows:
+            row["Images"] = [references.setdefault(xref, PdfImage(content, xref, width, height, name))
+                             for xref, width, height, name in row["Images"]]
+        if images == "bytes":
+            data = extract_images(content, references)
+            for row in rows:
+                row["Images"] = [data[image.xref] for image in row["Images"]]
+    return pd.DataFrame(rows, columns=columns)
 
 
 def read_pdf_as_text(content):
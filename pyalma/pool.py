@@ -0,0 +1,174 @@
+import hashlib
+import logging
+import threading
+import time
+
+# Seconds between keepalive packets on pooled transports
+DEFAULT_KEEPALIVE = 30
+# Seconds an unused pooled connection stays open
+DEFAULT_MAX_IDLE = 600
+
+
+def credential_hash(password):
+    """
+    Digest identifying the credentials of a pooled connection without keeping them in the key.
+
+    :param password: Password, or None for key-based authentication.
+    :type password: str | None
+    :rtype: str
+    """
+    return hashlib.sha256((password or "").encode("utf-8")).hexdigest()
+
+
+def is_active(client):
+    """
+    Whether an SSH client still has a live transport.
+
+    :param client: Connected SSH client.
+    :type client: paramiko.SSHClient
+    :rtype: bool
+    """
+    transport = client.get_transport() if client is not None else None
+    return transport is not None and bool(transport.is_active())
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of authenticated SSH connections.
+
+    Connections are keyed by (host, port, username, credential hash) and shared by every
+    pooled `SshClient` using the same host and credentials, so only the first client pays
+    for the handshake. Pooled transports send keepalives; dead ones are detected on acquire
+    and replaced. Connections that no client uses are closed after `max_idle` seconds.
+    """
+
+    def __init__(self, keepalive=DEFAULT_KEEPALIVE, max_idle=DEFAULT_MAX_IDLE):
+        """
+        :param keepalive: Seconds between keepalive packets (0 disables them).
+        :type keepalive: int
+        :param max_idle: Seconds an unused connection is kept open.
+        :type max_idle: float
+        """
+        self.keepalive = keepalive
+        self.max_idle = max_idle
+        self._entries = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._counters = {"opened": 0, "reused": 0, "reconnects": 0, "closed": 0}
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def acquire(self, key, connect):
+        """
+        Returns a live connection for `key`, opening one with `connect()` if needed.
+        Every call must be balanced by `release`.
+
+        :param key: Connection key, see `SshClient._pool_key`.
+        :type key: tuple
+        :param connect: Callable returning a new connected `paramiko.SSHClient`.
+        :type connect: callable
+        :rtype: paramiko.SSHClient
+        """
+        self._prune()
+        # Handshakes for different keys run in parallel, those for the same key only once
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and is_active(entry["client"]):
+                    entry["refs"] += 1
+                    self._counters["reused"] += 1
+                    return entry["client"]
+                if entry is not None:
+                    del self._entries[key]
+                    self._counters["reconnects"] += 1
+            if entry is not None:
+                self._close(entry["client"])
+
+            client = connect()
+            if self.keepalive:
+                client.get_transport().set_keepalive(self.keepalive)
+            with self._lock:
+                self._entries[key] = {"client": client, "refs": 1, "last_used": time.monotonic()}
+                self._counters["opened"] += 1
+            return client
+
+    def release(self, client):
+        """
+        Gives back a connection obtained from `acquire`.
+        """
+        with self._lock:
+            for entry in self._entries.values():
+                if entry["client"] is client:
+                    entry["refs"] = max(0, entry["refs"] - 1)
+                    entry["last_used"] = time.monotonic()
+                    return
+        # Not found: the connection was discarded (and closed) after a failure
+
+    def discard(self, client):
+        """
+        Removes a connection found to be broken, so the next `acquire` opens a new one.
+        """
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry["client"] is client:
+                    del self._entries[key]
+                    self._counters["reconnects"] += 1
+        self._close(client)
+
+    def _prune(self):
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, entry in self._entries.items()
+                    if entry["refs"] == 0 and now - entry["last_used"] > self.max_idle]
+            clients = [self._entries.pop(key)["client"] for key in idle]
+        for client in clients:
+            self._close(client)
+
+    def _close(self, client):
+        try:
+            client.close()
+            with self._lock:
+                self._counters["closed"] += 1
+        except Exception as e:
+            logging.error(f"❌ [ConnectionPool]: Error closing pooled connection: {e}")
+
+    def stats(self):
+        """
+        :return: Dictionary with the number of pooled 'connections', how many are 'in_use', and
+            counters of connections 'opened', 'reused', replaced after failures ('reconnects') and 'closed'.
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["connections"] = len(self._entries)
+            stats["in_use"] = sum(1 for entry in self._entries.values() if entry["refs"] > 0)
+        return stats
+
+    def close(self):
+        """
+        Closes every pooled connection.
+        """
+        with self._lock:
+            clients = [entry["client"] for entry in self._entries.values()]
+            self._entries.clear()
+        for client in clients:
+            self._close(client)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the process-wide pool used by `SshClient(..., pooled=True)`.
+
+    :rtype: ConnectionPool
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+        return _default_pool
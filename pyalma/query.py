@@ -0,0 +1,139 @@
+import shlex
+
+# Comparison operators accepted in `where` predicates, with their pandas equivalents
+OPERATORS = {
+    "==": lambda column, value: column == value,
+    "!=": lambda column, value: column != value,
+    "<": lambda column, value: column < value,
+    "<=": lambda column, value: column <= value,
+    ">": lambda column, value: column > value,
+    ">=": lambda column, value: column >= value,
+}
+
+
+def default_separator(type):
+    """
+    Returns the field separator used for a delimited file type.
+
+    :param type: File type (csv, tsv, bed).
+    :type type: str
+    :rtype: str
+    """
+    return "," if type == "csv" else "\t"
+
+
+def _check_predicates(where):
+    for predicate in where or []:
+        if len(predicate) != 3 or predicate[1] not in OPERATORS:
+            raise ValueError(f"❌ [query]: Invalid predicate {predicate!r}, expected (column, op, value) "
+                             f"with op in {sorted(OPERATORS)}")
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _awk_string(value):
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def _column_index(columns):
+    columns = list(columns)
+
+    def index_of(column):
+        if column not in columns:
+            raise KeyError(f"❌ [query]: Unknown column {column!r}")
+        return columns.index(column) + 1
+    return index_of
+
+
+def _awk_condition(where, index_of):
+    terms = []
+    for column, op, value in where or []:
+        field = f"${index_of(column)}"
+        if _is_number(value):
+            # Empty fields are NaN in pandas and never match a numeric comparison
+            terms.append(f'({field} != "" && {field}+0 {op} {value!r})')
+        else:
+            terms.append(f"({field} \"\" {op} {_awk_string(value)})")
+    return " && ".join(terms) or "1"
+
+
+def build_remote_query(path, columns, sep, usecols=None, where=None, nrows=None, sample=None, header=True):
+    """
+    Compiles a table query into a shell pipeline (awk, shuf, head) run on the remote host.
+
+    Only the selected rows and columns are printed, without the header line. Fields are split
+    on `sep`, so quoted fields containing the separator are not supported.
+
+    :param path: Remote file path.
+    :type path: str
+    :param columns: Column names of the file, in file order.
+    :type columns: list
+    :param sep: Field separator.
+    :type sep: str
+    :param usecols: Columns to return, in the requested order (all columns if None).
+    :type usecols: list | None
+    :param where: Predicates as (column, op, value) tuples, combined with AND.
+    :type where: list[tuple] | None
+    :param nrows: Maximum number of rows to return.
+    :type nrows: int | None
+    :param sample: Number of rows to draw at random from the matching rows.
+    :type sample: int | None
+    :param header: Whether the first line of the file is a header.
+    :type header: bool
+    :return: Shell command.
+    :rtype: str
+    """
+    _check_predicates(where)
+    index_of = _column_index(columns)
+    condition = _awk_condition(where, index_of)
+    if header:
+        condition = f"NR > 1 && {condition}"
+    fields = ", ".join(f"${index_of(column)}" for column in usecols) if usecols else "$0"
+    program = f"{condition} {{ print {fields} }}"
+    awk_sep = "\\t" if sep == "\t" else sep
+    command = f"awk -F {shlex.quote(awk_sep)} -v OFS={shlex.quote(awk_sep)} {shlex.quote(program)} {shlex.quote(path)}"
+    if sample:
+        command += f" | shuf -n {int(sample)}"
+    if nrows is not None:
+        command += f" | head -n {int(nrows)}"
+    return command
+
+
+def build_remote_count(path, columns, sep, where=None, header=True):
+    """
+    Compiles a row count (optionally of the rows matching `where`) into a remote awk command.
+
+    :return: Shell command printing the number of data rows.
+    :rtype: str
+    """
+    _check_predicates(where)
+    condition = _awk_condition(where, _column_index(columns))
+    if header:
+        condition = f"NR > 1 && {condition}"
+    awk_sep = "\\t" if sep == "\t" else sep
+    program = f"{condition} {{ n++ }} END {{ print n + 0 }}"
+    return f"awk -F {shlex.quote(awk_sep)} {shlex.quote(program)} {shlex.quote(path)}"
+
+
+def apply_query(df, usecols=None, where=None, nrows=None, sample=None, seed=None):
+    """
+    Applies a table query to a DataFrame; the local equivalent of `build_remote_query`.
+
+    :param df: Full table.
+    :type df: pd.DataFrame
+    :return: Selected rows and columns, with a fresh index.
+    :rtype: pd.DataFrame
+    """
+    _check_predicates(where)
+    for column, op, value in where or []:
+        df = df[OPERATORS[op](df[column], value)]
+    if sample:
+        df = df.sample(n=min(int(sample), len(df)), random_state=seed)
+    if nrows is not None:
+        df = df.head(int(nrows))
+    if usecols:
+        df = df[list(usecols)]
+    return df.reset_index(drop=True)
@@ -23,14 +23,17 @@ class SecureSshClient(SshClient):
         sftp (str): The remote path or hostname for SFTP access.
                     Defaults to "alma-app.icr.ac.uk".
         port (int): SSH port number. Defaults to 22.
+        pooled (bool): Share connections through the process-wide pool. Defaults to False.
+        connect (str): "eager", "lazy" or "background" connection. Defaults to "eager".
 
     Usage:
         client = SecureSshClient(username="your_username")
         # Connects automatically on initialization using key-based auth.
     """
-    def __init__(self, server="alma.icr.ac.uk", username=None, sftp="alma-app.icr.ac.uk", port=22):
+    def __init__(self, server="alma.icr.ac.uk", username=None, sftp="alma-app.icr.ac.uk", port=22, pooled=False, connect="eager"):
         logging.info("🔐 Secure mode: only key-based login allowed.")
-        super().__init__(server=server, username=username, password=None, sftp=sftp, port=port)
+        super().__init__(server=server, username=username, password=None, sftp=sftp, port=port, pooled=pooled,
+                         connect=connect)
 
     def __del__(self):
         """
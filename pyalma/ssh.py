@@ -1,13 +1,42 @@
+import copy
+import errno
+import gzip
 import os
+import posixpath
+import queue
+import shlex
 import paramiko
 import logging
-from stat import S_ISDIR, S_ISREG
+from stat import S_ISDIR
+import shutil
+import tarfile
 import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from .cache import DiskCache, DEFAULT_MAX_SIZE, MetadataCache
+from .pool import credential_hash, get_pool, is_active
 from .fileReader import FileReader
-import pandas as pd
-from io import StringIO
+from .genotypes import BCF_SUFFIX, DEFAULT_BATCH_BYTES, read_genotypes, read_genotypes_file, read_genotypes_region
+from .remotefile import RemoteFile
+from .stream import ChannelReader, CommandStream, iter_output
+from .query import apply_query, build_remote_count, build_remote_query, default_separator
+from .sync import changed_files, index_files, local_checksum, sync_report
+from .tree import (add_entry, find_command, mode_type, new_tree, parse_find_output, scan_tree, sort_tree,
+                   tree_to_dataframe)
+from .transfer import (COMPRESSION_MAX_BANDWIDTH, COMPRESSION_MIN_SIZE, DEFAULT_CHUNK_SIZE, choose_codec,
+                       compress_command, compressing_writer, copy_decompressed, decompressing_reader, member_path,
+                       parallel_download, tar_create_command, tar_extract_command, transfer_stats)
+from .vcf import BGZIP_SUFFIXES, INDEX_SUFFIXES, read_index, read_vcf, read_vcf_region, text_stream
+from .writer import DEFAULT_CHUNK_ROWS, DEFAULT_COMPRESSION, write_dataframe
+from io import BytesIO
 import yaml
 
+# Printed before remote pipeline output, see `SshClient._exec_checked`
+EXEC_MARKER = "__PYALMA_EXEC__"
+# OpenSSH accepts 10 sessions per connection by default (MaxSessions)
+DEFAULT_MAX_CHANNELS = 8
 
 class SshClient(FileReader):
     """
@@ -15,7 +44,8 @@ class SshClient(FileReader):
     Enables reading, writing, listing, and transferring files on a remote server securely.
     """
 
-    def __init__(self, server="alma.icr.ac.uk", username=None, password=None, sftp="alma-app.icr.ac.uk", port=22):
+    def __init__(self, server="alma.icr.ac.uk", username=None, password=None, sftp="alma-app.icr.ac.uk", port=22,
+                 pooled=False, pool=None, connect="eager"):
         """
         Initialize SSH and SFTP connection parameters.
 
@@ -27,6 +57,16 @@ class SshClient(FileReader):
         :type password: str
         :param sftp: SFTP host (defaults to `server` if not specified).
         :type sftp: str
+        :param pooled: Share authenticated connections with the other pooled clients of this process
+            (see `pyalma.pool`), instead of opening new ones.
+        :type pooled: bool
+        :param pool: Pool to use when `pooled` is set, defaults to the process-wide pool.
+        :type pool: pyalma.pool.ConnectionPool | None
+        :param connect: When to connect: "eager" connects to both hosts before returning, "lazy" connects
+            to each host on first use, "background" starts both handshakes in parallel and returns at once
+            (the first use of a connection waits for its handshake). Connection errors of the "lazy" and
+            "background" modes are raised, as `ConnectionError`, on first use.
+        :type connect: str
         """
         super().__init__()
         self.remote = True
@@ -37,7 +77,92 @@ class SshClient(FileReader):
         self.port = port
         self.filter_file = os.path.join(os.path.dirname(__file__), "config", "messages.yaml")
         self.filtered_patterns = self._load_filtered_patterns()
-        self._connect(password=self.password)
+        self.last_transfer = None
+        self.cache = None
+        self.cache_checksum = False
+        self.metadata_cache = None
+        self.compression = None
+        self.compression_min_size = COMPRESSION_MIN_SIZE
+        self.compression_max_bandwidth = COMPRESSION_MAX_BANDWIDTH
+        self.measured_bandwidth = None
+        self._remote_codec_list = None
+        self.pool = (pool or get_pool()) if pooled else None
+        if connect == "eager":
+            self._connect(password=self.password)
+        elif connect in ("lazy", "background"):
+            self._connect_kwargs = {"password": self.password}
+            self._connect_lock = threading.Lock()
+            self._pending = {"ssh": None, "sftp": None}
+            if connect == "background":
+                executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pyalma-connect")
+                self._pending = {role: executor.submit(self._connect_role, role) for role in self._pending}
+                executor.shutdown(wait=False)
+        else:
+            raise ValueError(f"❌ [SshClient]: connect must be 'eager', 'lazy' or 'background', not {connect!r}")
+
+    # Connections are established on first access in the "lazy" and "background" modes
+    _ssh_client = None
+    _sftp_ssh_client = None
+    _sftp_client = None
+    _pending = None
+    # Client a channel view was made from, see `_channel_view`
+    _parent = None
+
+    @property
+    def ssh_client(self):
+        if self._ssh_client is None and self._pending and "ssh" in self._pending:
+            self._establish("ssh")
+        return self._ssh_client
+
+    @ssh_client.setter
+    def ssh_client(self, client):
+        self._ssh_client = client
+
+    @property
+    def sftp_ssh_client(self):
+        if self._sftp_ssh_client is None and self._pending and "sftp" in self._pending:
+            self._establish("sftp")
+        return self._sftp_ssh_client
+
+    @sftp_ssh_client.setter
+    def sftp_ssh_client(self, client):
+        self._sftp_ssh_client = client
+
+    @property
+    def sftp_client(self):
+        if self._sftp_client is None and self._pending and "sftp" in self._pending:
+            self._establish("sftp")
+        return self._sftp_client
+
+    @sftp_client.setter
+    def sftp_client(self, client):
+        self._sftp_client = client
+
+    def _establish(self, role):
+        """
+        Completes a deferred connection: waits for its background handshake, or connects now.
+        A channel view has the client it was made from connect, and uses that connection.
+        """
+        if self._parent is not None:
+            self._parent._establish(role)
+            if role == "ssh":
+                self._ssh_client = self._parent._ssh_client
+            else:
+                self._sftp_ssh_client = self._parent._sftp_ssh_client
+            return
+        with self._connect_lock:
+            if role not in self._pending:
+                return
+            handshake = self._pending[role]
+            try:
+                if handshake is not None:
+                    handshake.result()
+                else:
+                    self._connect_role(role)
+                del self._pending[role]
+            except Exception:
+                self._pending[role] = None  # retried on next use
+                raise
 
     def _create_ssh_client(self):
         client = paramiko.SSHClient()
@@ -51,21 +176,366 @@ class SshClient(FileReader):
 
         :raises ConnectionError: If authentication or connection fails.
         """
-        self.ssh_client = self._create_ssh_client()
-        self.sftp_ssh_client = self._create_ssh_client()
-        self.sftp_client = None
+        self._connect_kwargs = kwargs
+        self.ssh_client = self.sftp_ssh_client = self.sftp_client = None
+        self._connect_role("ssh")
+        self._connect_role("sftp")
 
+    def _connect_role(self, role):
+        """
+        Connect to the command host (`role` "ssh") or to the SFTP host (`role` "sftp").
+
+        :raises ConnectionError: If authentication or connection fails.
+        """
+        host = self.server if role == "ssh" else self.sftp
         try:
-            self.ssh_client.connect(self.server, username=self.username, timeout=30, port=self.port, **kwargs)
-            self.sftp_ssh_client.connect(self.sftp, username=self.username, timeout=30, port=self.port, **kwargs)
-            self.sftp_client = self.sftp_ssh_client.open_sftp()
+            client = self._acquire_connection(host) if self.pool is not None else self._open_connection(host)
+            if role == "ssh":
+                self.ssh_client = client
+            else:
+                self.sftp_client = client.open_sftp()
+                self.sftp_ssh_client = client
         except paramiko.AuthenticationException:
-            raise ConnectionError(f"❌ [_connect]: Authentication failed for {self.username}@{self.server}.")
+            raise ConnectionError(f"❌ [_connect]: Authentication failed for {self.username}@{host}.")
         except paramiko.SSHException as e:
             raise ConnectionError(f"❌ [_connect]: SSH connection error: {e}")
         except Exception as e:
             raise ConnectionError(f"❌ [_connect]: Unexpected SSH connection error: {e}")
 
+    def _open_connection(self, host):
+        client = self._create_ssh_client()
+        client.connect(host, username=self.username, timeout=30, port=self.port, **self._connect_kwargs)
+        return client
+
+    def _pool_key(self, host):
+        return (host, self.port, self.username, credential_hash(self.password))
+
+    def _acquire_connection(self, host):
+        return self.pool.acquire(self._pool_key(host), lambda: self._open_connection(host))
+
+    def _replace_connection(self, client, host):
+        """
+        Opens a new connection to `host` in place of the broken `client`.
+        """
+        if self.pool is not None:
+            self.pool.discard(client)
+            return self._acquire_connection(host)
+        try:
+            client.close()
+        except Exception:
+            pass
+        return self._open_connection(host)
+
+    def _sftp_alive(self):
+        # Only the transport tells: a channel may have been closed on purpose (aborted operation)
+        return is_active(self.sftp_ssh_client)
+
+    def _reconnect_sftp(self):
+        logging.warning(f"⚠️ [_reconnect_sftp]: Connection to {self.sftp} lost, reconnecting")
+        try:
+            self.sftp_client.close()
+        except Exception:
+            pass
+        old = self.sftp_ssh_client
+        self.sftp_ssh_client = self._replace_connection(old, self.sftp)
+        if self.ssh_client is old:
+            self.ssh_client = self._acquire_connection(self.server) if self.pool else self.sftp_ssh_client
+        self.sftp_client = self.sftp_ssh_client.open_sftp()
+
+    def _ensure_ssh_connection(self):
+        """
+        Reconnects to the command host if its transport has dropped.
+        Commands are not retried, as they may not be idempotent. Channel views never reconnect,
+        as the connections they use belong to the client they were made from.
+        """
+        if not is_active(self.ssh_client) and not getattr(self, "_is_view", False):
+            logging.warning(f"⚠️ [_ensure_ssh_connection]: Connection to {self.server} lost, reconnecting")
+            old = self.ssh_client
+            self.ssh_client = self._replace_connection(old, self.server)
+            if self.sftp_ssh_client is old:
+                self.sftp_ssh_client = self._acquire_connection(self.sftp) if self.pool else self.ssh_client
+                self.sftp_client = self.sftp_ssh_client.open_sftp()
+
+    def _sftp_retry(self, operation):
+        """
+        Runs the idempotent SFTP `operation()`; if it fails because the connection dropped,
+        reconnects and runs it once more. Channel views do not reconnect.
+        """
+        try:
+            return operation()
+        except (EOFError, OSError, paramiko.SSHException):
+            if self._sftp_alive() or getattr(self, "_is_view", False):
+                raise
+            self._reconnect_sftp()
+            return operation()
+
+    def _exec_command(self, command, **kwargs):
+        self._ensure_ssh_connection()
+        return self.ssh_client.exec_command(command, **kwargs)
+
+    def _open_sftp_channel(self, new_transport=False, opened_clients=None):
+        """
+        Open an additional SFTP channel for parallel transfers.
+
+        :param new_transport: Open the channel on a new SSH connection instead of multiplexing it
+            over the existing SFTP transport.
+        :type new_transport: bool
+        :param opened_clients: List collecting the extra SSH clients, so the caller can close them.
+        :type opened_clients: list | None
+        :return: A new SFTP client.
+        :rtype: paramiko.SFTPClient
+        """
+        if not new_transport:
+            return paramiko.SFTPClient.from_transport(self.sftp_ssh_client.get_transport())
+        client = self._create_ssh_client()
+        if opened_clients is not None:
+            opened_clients.append(client)
+        client.connect(self.sftp, username=self.username, password=self.password, timeout=30, port=self.port)
+        return client.open_sftp()
+
+    def _channel_view(self, sftp_client):
+        """
+        Shallow copy of this client that issues its SFTP requests on `sftp_client` and shares
+        everything else (SSH connection, caches, settings). Lets SFTP operations run concurrently
+        on separate channels; the copy never closes the shared connections.
+
+        :param sftp_client: SFTP channel used by the copy.
+        :type sftp_client: paramiko.SFTPClient
+        :rtype: SshClient
+        """
+        view = copy.copy(self)
+        view.sftp_client = sftp_client
+        view._is_view = True
+        view._parent = self
+        return view
+
+    def _parallel_download(self, remote_path, local_path, streams, chunk_size=None, new_transports=False):
+        """
+        Download a remote file over `streams` concurrent SFTP channels (see `pyalma.transfer`).
+
+        :return: Transfer report, also kept in `self.last_transfer`.
+        :rtype: dict
+        """
+        opened_clients = []
+        try:
+            size = self._sftp_retry(lambda: self.sftp_client.stat(remote_path)).st_size
+            self.last_transfer = parallel_download(
+                lambda: self._open_sftp_channel(new_transports, opened_clients),
+                remote_path, local_path, size, streams=streams, chunk_size=chunk_size or DEFAULT_CHUNK_SIZE)
+            self._record_bandwidth(self.last_transfer["bytes"], self.last_transfer["seconds"])
+            return self.last_transfer
+        finally:
+            for client in opened_clients:
+                client.close()
+
+    def enable_compression(self, mode="auto", min_size=COMPRESSION_MIN_SIZE, max_bandwidth=COMPRESSION_MAX_BANDWIDTH):
+        """
+        Transfer text files through a remote compressor (gzip, or zstd when available on both ends)
+        and decompress them locally as they arrive. Applies to `read_file`, `download_remote_file`,
+        VCF reads and cache fills; needs exec access on the server.
+
+        :param mode: "auto" compresses text types (csv, tsv, vcf, logs, json, ...) of at least `min_size`
+            bytes unless the measured SFTP bandwidth exceeds `max_bandwidth`; "gzip" or "zstd" force a codec.
+        :type mode: str
+        :param min_size: Smallest file size, in bytes, compressed in auto mode.
+        :type min_size: int
+        :param max_bandwidth: Link speed in bytes/s above which auto mode transfers raw.
+        :type max_bandwidth: float
+        """
+        self.compression = mode
+        self.compression_min_size = min_size
+        self.compression_max_bandwidth = max_bandwidth
+
+    def disable_compression(self):
+        """
+        Transfer every file raw over SFTP.
+        """
+        self.compression = None
+
+    def _remote_codecs(self):
+        """
+        Compressors installed on the remote host, probed once per client.
+        """
+        if self._remote_codec_list is None:
+            try:
+                output = self._exec_checked("for c in zstd gzip; do command -v $c; done; true")
+                output = output.decode("utf-8", errors="replace")
+                self._remote_codec_list = [os.path.basename(line.strip()) for line in output.splitlines() if line.strip()]
+            except Exception as e:
+                logging.warning(f"⚠️ [_remote_codecs]: Compressed transfers unavailable: {e}")
+                self._remote_codec_list = []
+        return self._remote_codec_list
+
+    def _record_bandwidth(self, nbytes, seconds):
+        # Small transfers are dominated by latency and say little about the link
+        if seconds > 0 and nbytes >= COMPRESSION_MIN_SIZE:
+            rate = nbytes / seconds
+            previous = self.measured_bandwidth
+            self.measured_bandwidth = rate if previous is None else 0.7 * previous + 0.3 * rate
+
+    def _transfer_codec(self, path, size=None):
+        """
+        Codec to use for transferring `path`, or None for a raw SFTP transfer.
+        """
+        if self.compression in (None, "off"):
+            return None
+        if size is None:
+            size = self._sftp_retry(lambda: self.sftp_client.stat(path)).st_size
+        return choose_codec(self.compression, self.get_file_extension(path), size, self._remote_codecs(),
+                            self.measured_bandwidth, self.compression_min_size, self.compression_max_bandwidth)
+
+    def _download_compressed(self, path, destination, codec):
+        """
+        Stream `path` through a remote compressor and write it decompressed to `destination`.
+
+        :param destination: Writable binary file object.
+        :return: Transfer report, also kept in `self.last_transfer` ('wire_bytes' is the compressed size).
+        :rtype: dict
+        """
+        start = time.perf_counter()
+        _, stdout, _ = self._exec_command(compress_command(codec, path))
+        output = ChannelReader(stdout.channel)
+        written, received = copy_decompressed(output, destination, codec)
+        error = output.finish()
+        status = stdout.channel.recv_exit_status()
+        if status != 0:
+            raise RuntimeError(f"❌ [_download_compressed]: {codec} failed for {path} (exit status {status}): {error}")
+        self.last_transfer = transfer_stats(written, time.perf_counter() - start, 1)
+        self.last_transfer["wire_bytes"] = received
+        return self.last_transfer
+
+    def _fetch_to_file(self, path, local_path):
+        """
+        Copy a remote file to `local_path`, compressed on the fly when the compression mode selects it.
+        """
+        codec = self._transfer_codec(path)
+        if codec:
+            with open(local_path, "wb") as local_file:
+                self._download_compressed(path, local_file, codec)
+            return
+        start = time.perf_counter()
+        self._sftp_retry(lambda: self.sftp_client.get(path, local_path))
+        if os.path.isfile(local_path):
+            self._record_bandwidth(os.path.getsize(local_path), time.perf_counter() - start)
+
+    def enable_metadata_cache(self, ttl=30.0, max_entries=100_000):
+        """
+        Answer `isfile`, `get_file_size` and `listdir` from memory for `ttl` seconds.
+
+        Every directory listing (`listdir`, `walk`) fills the cache with the metadata of all the
+        entries it returns, and the client's own writes invalidate what they change. Changes made
+        by other clients or processes are seen once entries expire, or after `refresh_metadata`.
+
+        :param ttl: Seconds during which cached metadata is trusted.
+        :type ttl: float
+        :param max_entries: Maximum number of cached paths and listed names.
+        :type max_entries: int
+        """
+        self.metadata_cache = MetadataCache(ttl=ttl, max_entries=max_entries)
+
+    def disable_metadata_cache(self):
+        """
+        Stop caching metadata and drop the cached entries.
+        """
+        self.metadata_cache = None
+
+    def invalidate_metadata(self, path=None, recursive=False):
+        """
+        Forget the cached metadata of `path` (and of everything below it with `recursive`),
+        or all cached metadata when `path` is None.
+        """
+        if self.metadata_cache is not None:
+            self.metadata_cache.invalidate(path, recursive)
+
+    def refresh_metadata(self, path):
+        """
+        Reload the metadata of `path` from the server; a directory is listed again.
+
+        :param path: Remote path.
+        :type path: str
+        """
+        self.invalidate_metadata(path, recursive=True)
+        attrs = self._sftp_retry(lambda: self.sftp_client.lstat(path))
+        self._remember(path, attrs)
+        if S_ISDIR(attrs.st_mode):
+            self.listdir(path)
+
+    def _remember(self, path, attrs):
+        if self.metadata_cache is not None:
+            self.metadata_cache.put(path, self._metadata(attrs))
+
+    @staticmethod
+    def _metadata(attrs):
+        return {"type": mode_type(attrs.st_mode), "size": attrs.st_size, "mtime": attrs.st_mtime}
+
+    def _invalidate_remote(self, path):
+        """
+        Drops what the client's caches know about `path` after the client changed it.
+        """
+        if self.object_cache is not None:
+            self.object_cache.invalidate(path)
+        self.invalidate_metadata(path, recursive=True)
+
+    def enable_cache(self, directory=None, max_size=DEFAULT_MAX_SIZE, checksum=False):
+        """
+        Enable the persistent on-disk cache for `read_file`, VCF reads and `load_h5ad_file`.
+
+        Cached copies are validated with one remote `stat` (size and mtime) per read and may be
+        shared by several processes on the same machine.
+
+        :param directory: Cache directory, defaults to ``~/.cache/pyalma``.
+        :type directory: str | None
+        :param max_size: Size cap in bytes; least recently used files are evicted beyond it.
+        :type max_size: int
+        :param checksum: Also validate entries against a server-side `sha256sum` (one extra command per read).
+        :type checksum: bool
+        """
+        self.cache = DiskCache(directory, max_size)
+        self.cache_checksum = checksum
+
+    def disable_cache(self):
+        """
+        Disable the on-disk cache. Cached files are left in place for later use.
+        """
+        self.cache = None
+
+    def _cache_namespace(self):
+        return f"{self.username}@{self.sftp}:{self.port}"
+
+    def _remote_checksum(self, path):
+        _, stdout, _ = self._exec_command(f"sha256sum {shlex.quote(path)}")
+        output = stdout.read().decode("utf-8", errors="replace").split()
+        return output[0] if output else None
+
+    def _download_from_offset(self, path, local_path, offset):
+        """
+        Append the remote file content from `offset` onwards to `local_path`.
+        """
+        codec = self._transfer_codec(path) if offset == 0 else None
+        if codec:
+            with open(local_path, "ab") as local_file:
+                self._download_compressed(path, local_file, codec)
+            return
+        with self.sftp_client.open(path, "rb") as remote_file, open(local_path, "ab") as local_file:
+            remote_file.seek(offset)
+            remote_file.prefetch()
+            for data in iter(lambda: remote_file.read(32768), b""):
+                local_file.write(data)
+
+    def _cached_copy(self, path):
+        """
+        Return the path of a valid local copy of a remote file, fetching it into the cache on a miss.
+
+        :param path: Remote file path.
+        :type path: str
+        :return: Local path inside the cache directory.
+        :rtype: str
+        """
+        attrs = self._sftp_retry(lambda: self.sftp_client.stat(path))
+        checksum = self._remote_checksum(path) if self.cache_checksum else None
+        return self.cache.fetch(self._cache_namespace(), path, attrs.st_size, attrs.st_mtime,
+                                lambda part, offset: self._download_from_offset(path, part, offset), checksum)
+
     def _load_filtered_patterns(self):
         """
         Load SSH output filter patterns from YAML configuration.
@@ -90,12 +560,50 @@ class SshClient(FileReader):
         :rtype: str
         """
         if output != "":
-            filters = self.filtered_patterns.get("filters", [])
-            return "\n".join(
-                line for line in output.splitlines() if not any(line.startswith(f) for f in filters)
-            )
+            prefixes = self._filter_prefixes()
+            return "\n".join(line for line in output.splitlines() if not line.startswith(prefixes))
         return ""
 
+    def _filter_prefixes(self):
+        """
+        Filter patterns as a tuple, so a line is matched with a single `str.startswith` call.
+        """
+        if not isinstance(self.filtered_patterns, dict):
+            return ()
+        return tuple(self.filtered_patterns.get("filters") or ())
+
+    def stream_cmd(self, command, timeout=None, stderr=True):
+        """
+        Run a command on the remote server and iterate over its output as it is produced.
+
+        Only the current line is kept in memory, so commands printing large logs can be followed
+        without buffering them. Lines matching the filter patterns are dropped.
+
+        Usage:
+            with ssh.stream_cmd("tail -n +1 job.log") as lines:
+                for stream, line in lines:
+                    print(stream, line)
+            print(lines.exit_status)
+
+        :param command: Command to execute.
+        :type command: str
+        :param timeout: Seconds after which the command is stopped and `TimeoutError` raised.
+        :type timeout: float | None
+        :param stderr: Also yield stderr lines.
+        :type stderr: bool
+        :return: Iterator of (stream, line) tuples, stream being "stdout" or "stderr"; its
+            `exit_status` attribute is set once the output is exhausted.
+        :rtype: CommandStream
+        """
+        try:
+            self._ensure_ssh_connection()
+            channel = self.ssh_client.get_transport().open_session()
+            channel.exec_command(command)
+        except Exception as e:
+            logging.error(f"❌ [stream_cmd]: Error executing SSH command {command}: {e}")
+            raise
+        return CommandStream(channel, self._filter_prefixes(), timeout, stderr)
+
     def run_cmd(self, command):
         """
         Run a command on the remote server via SSH.
@@ -106,14 +614,142 @@ class SshClient(FileReader):
         :rtype: dict
         """
         try:
-            _, stdout, _ = self.ssh_client.exec_command(command)
+            _, stdout, _ = self._exec_command(command)
             output = stdout.read().decode("utf-8", errors='replace')
             return {"output": self.filter_output(output), "err": None}
         except Exception as e:
             logging.error(f"❌ [run_cmd]: Error executing SSH command {command}: {e}")
             return {"output": None, "err": str(e)}
 
-    def load_h5ad_file(self, path, local_path):
+    def _run_one(self, command, timeout=None):
+        start = time.perf_counter()
+        result = {"command": command, "output": None, "stderr": None, "exit_status": None, "err": None}
+        try:
+            _, stdout, _ = self._exec_command(command, timeout=timeout)
+            pieces = {"stdout": [], "stderr": []}
+            try:
+                for name, data in iter_output(stdout.channel, timeout, idle=True):
+                    pieces[name].append(data)
+                result["exit_status"] = stdout.channel.recv_exit_status()
+            finally:
+                stdout.channel.close()
+            result["stderr"] = b"".join(pieces["stderr"]).decode("utf-8", errors="replace")
+            result["output"] = self.filter_output(b"".join(pieces["stdout"]).decode("utf-8", errors="replace"))
+        except Exception as e:
+            logging.error(f"❌ [run_cmds]: Error executing SSH command {command}: {e}")
+            result["err"] = str(e)
+        result["seconds"] = round(time.perf_counter() - start, 4)
+        return result
+
+    def run_cmds(self, commands, max_channels=DEFAULT_MAX_CHANNELS, timeout=None):
+        """
+        Run several commands concurrently, each on its own channel of the SSH connection.
+
+        :param commands: Commands to execute.
+        :type commands: list[str]
+        :param max_channels: Maximum number of commands running at once; keep it below the
+            server's MaxSessions setting (10 for a default OpenSSH server).
+        :type max_channels: int
+        :param timeout: Seconds a command may stay silent before it is reported as failed.
+        :type timeout: float | None
+        :return: One dictionary per command, in input order, with 'command', 'output' (filtered stdout),
+            'stderr', 'exit_status', 'err' (connection or timeout error) and 'seconds' keys.
+        :rtype: list[dict]
+        """
+        commands = list(commands)
+        if not commands:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_channels, len(commands)))) as pool:
+            return list(pool.map(lambda command: self._run_one(command, timeout), commands))
+
+    def _exec_checked(self, command):
+        """
+        Run a shell command on the remote server and return its raw stdout.
+
+        A marker line is echoed first, so that accounts limited to SFTP (whose forced command
+        prints a notice instead of running anything) and login noise are told apart from output.
+
+        :param command: Shell command or pipeline.
+        :type command: str
+        :return: Bytes printed by `command`.
+        :rtype: bytes
+        :raises RuntimeError: If the command cannot be executed or exits with a non-zero status.
+        """
+        marker = EXEC_MARKER.encode() + b"\n"
+        _, stdout, _ = self._exec_command(f"echo {EXEC_MARKER} && {command}")
+        pieces = {"stdout": [], "stderr": []}
+        for name, data in iter_output(stdout.channel):
+            pieces[name].append(data)
+        output = b"".join(pieces["stdout"])
+        status = stdout.channel.recv_exit_status()
+        if status != 0 or marker not in output:
+            error = b"".join(pieces["stderr"]).decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"❌ [_exec_checked]: Remote command failed (exit status {status}): {error or output[:200]!r}")
+        return output.split(marker, 1)[1]
+
+    def _remote_columns(self, path, sep, header):
+        import pandas as pd
+
+        first_line = self._exec_checked(f"head -n 1 {shlex.quote(path)}")
+        return list(pd.read_csv(BytesIO(first_line), sep=sep, header=0 if header else None).columns)
+
+    def query_table(self, path, type=None, usecols=None, where=None, nrows=None, sample=None, seed=None,
+                    sep=None, header=True, pushdown=True):
+        """
+        Read selected columns and rows of a remote csv/tsv/bed table.
+
+        With `pushdown` the selection is compiled to an awk/shuf/head pipeline run on the server,
+        so only the reduced result is transferred. Fields are split on `sep` without quote handling.
+        If the pipeline cannot run (e.g. SFTP-only accounts) the whole file is read and filtered
+        locally with pandas, which gives the same rows (unseeded random samples aside).
+        `shuf` cannot be seeded portably, so with a `seed` the server only selects the columns
+        and matching rows, and the sample is drawn locally.
+        See `FileReader.query_table` for the parameters.
+
+        :param pushdown: Run the selection on the server when possible.
+        :type pushdown: bool
+        :return: DataFrame of the selected data, or None if the file could not be read.
+        :rtype: pd.DataFrame | None
+        """
+        type = type or self.get_file_extension(path)
+        sep = sep or default_separator(type)
+        if pushdown:
+            try:
+                import pandas as pd
+
+                columns = self._remote_columns(path, sep, header)
+                names = list(usecols) if usecols else columns
+                sample_locally = bool(sample) and seed is not None
+                remote_rows = (None, None) if sample_locally else (nrows, sample)
+                output = self._exec_checked(
+                    build_remote_query(path, columns, sep, usecols, where, *remote_rows, header))
+                if not output.strip():
+                    return pd.DataFrame(columns=names)
+                df = pd.read_csv(BytesIO(output), sep=sep, header=None, names=names)
+                return apply_query(df, nrows=nrows, sample=sample, seed=seed) if sample_locally else df
+            except Exception as e:
+                logging.warning(f"⚠️ [query_table]: Remote query failed for {path}, filtering locally: {e}")
+        return super().query_table(path, type, usecols, where, nrows, sample, seed, sep, header)
+
+    def count_rows(self, path, type=None, where=None, sep=None, header=True, pushdown=True):
+        """
+        Count the data rows of a remote table on the server, optionally only those matching `where`.
+        Falls back to reading the file locally when the remote command cannot run.
+
+        :return: Number of rows, or None if the file could not be read.
+        :rtype: int | None
+        """
+        type = type or self.get_file_extension(path)
+        sep = sep or default_separator(type)
+        if pushdown:
+            try:
+                columns = self._remote_columns(path, sep, header) if where else []
+                return int(self._exec_checked(build_remote_count(path, columns, sep, where, header)))
+            except Exception as e:
+                logging.warning(f"⚠️ [count_rows]: Remote count failed for {path}, counting locally: {e}")
+        return super().count_rows(path, type, where, sep, header)
+
+    def load_h5ad_file(self, path, local_path, streams=1, chunk_size=None, new_transports=False):
         """
         Download an h5ad file from the remote server in chunks.
 
@@ -121,11 +757,23 @@ class SshClient(FileReader):
         :type path: str
         :param local_path: Destination on local machine.
         :type local_path: str
+        :param streams: Number of concurrent SFTP channels; above 1 the file is fetched as parallel byte ranges.
+        :type streams: int
+        :param chunk_size: Byte range size per stream request (parallel mode only).
+        :type chunk_size: int | None
+        :param new_transports: Open each stream on its own SSH connection (parallel mode only).
+        :type new_transports: bool
         :return: Local path of the saved file or None if failed.
         :rtype: str | None
         """
         self.files_to_clean.append(local_path)
         try:
+            if self.cache is not None:
+                self._copy_from_cache(path, local_path)
+                return local_path
+            if streams > 1:
+                self._parallel_download(path, local_path, streams, chunk_size, new_transports)
+                return local_path
             with self.sftp_client.open(path, 'r') as file:
                 with open(local_path, 'wb') as local_file:
                     file.prefetch()
@@ -136,15 +784,161 @@ class SshClient(FileReader):
             logging.error(f"❌ [load_h5ad_file]: Error reading SSH h5ad file {path}: {e}")
             return None
 
+    def _file_signature(self, path):
+        attrs = self._sftp_retry(lambda: self.sftp_client.stat(path))
+        return attrs.st_size, attrs.st_mtime
+
+    def _copy_from_cache(self, path, local_path):
+        # A copy rather than a hard link, so that writing to local_path cannot corrupt the cache
+        shutil.copyfile(self._cached_copy(path), local_path)
+
     def _read_file_content(self, path, mode, is_text):
+        if self.cache is not None:
+            with open(self._cached_copy(path), "rb") as file:
+                return file.read()
+        codec = self._transfer_codec(path)
+        if codec:
+            buffer = BytesIO()
+            self._download_compressed(path, buffer, codec)
+            return buffer.getvalue()
+        start = time.perf_counter()
+        content = self._sftp_retry(lambda: self._read_remote(path, mode))
+        self._record_bandwidth(len(content), time.perf_counter() - start)
+        return content
+
+    def _read_remote(self, path, mode):
         with self.sftp_client.open(path, mode) as file:
+            file.prefetch()
             return file.read()
 
-    def _read_vcf_as_dataframe(self, path):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            local_path = os.path.join(tmpdir, "tmp.vcf")
-            self.sftp_client.get(path, local_path)
-            return self.read_vcf_file_into_df(local_path)
+    def _open_stream(self, path):
+        """
+        Open a remote file for sequential streaming reads.
+
+        Read requests are pipelined with `prefetch`; the data buffered ahead of the reader is
+        bounded by the SSH channel window, not by the file size.
+        """
+        if self.cache is not None:
+            return open(self._cached_copy(path), "rb")
+        remote_file = self._sftp_retry(lambda: self.sftp_client.open(path, "rb"))
+        remote_file.prefetch()
+        return remote_file
+
+    @contextmanager
+    def _random_access(self, path, block_size=None):
+        """
+        Yields a seekable handle on a remote file (or its cached local copy), block-cached
+        when `block_size` is given.
+        """
+        if self.cache is not None:
+            yield self._cached_copy(path)
+            return
+        start = time.perf_counter()
+        with RemoteFile(self._sftp_retry(lambda: self.sftp_client.open(path, "rb")), block_size=block_size) as source:
+            yield source
+            self.last_transfer = transfer_stats(source.bytes_read, time.perf_counter() - start, 1)
+            self.last_transfer["file_size"] = source.size
+
+    def _read_vcf_as_dataframe(self, path, region=None):
+        if region is not None:
+            return self._read_vcf_region(path, region)
+        if self.cache is not None:
+            return self.read_vcf_file_into_df(self._cached_copy(path))
+        compressed = path.endswith(BGZIP_SUFFIXES)
+        codec = None if compressed else self._transfer_codec(path)
+        if codec:
+            with tempfile.TemporaryFile() as buffer:
+                self._download_compressed(path, buffer, codec)
+                buffer.seek(0)
+                return read_vcf(text_stream(buffer, False))
+        with self._open_stream(path) as stream:
+            return read_vcf(text_stream(stream, compressed))
+
+    def _read_vcf_region(self, path, region):
+        """
+        Read the records of an indexed, bgzipped VCF overlapping `region`: with `tabix` on the
+        server when available, otherwise by reading only the indexed BGZF blocks over SFTP.
+        """
+        try:
+            _, stdout, _ = self._exec_command(f"tabix -h {shlex.quote(path)} {shlex.quote(region)}")
+            output = ChannelReader(stdout.channel)
+            df = read_vcf(text_stream(output, False))
+            error = output.finish()
+            status = stdout.channel.recv_exit_status()
+            if status != 0:
+                raise RuntimeError(f"exit status {status}: {error}")
+            return df
+        except Exception as e:
+            logging.warning(f"⚠️ [_read_vcf_region]: Remote tabix unavailable for {path}, reading index over SFTP: {e}")
+        index = self._read_vcf_index(path)
+        with self._random_access(path) as source:
+            if isinstance(source, str):
+                with open(source, "rb") as file:
+                    return read_vcf_region(file, index, region)
+            return read_vcf_region(source, index, region)
+
+    def _read_vcf_index(self, path):
+        """
+        Read and parse the .tbi or .csi index of a remote VCF.
+
+        :raises FileNotFoundError: If there is neither.
+        """
+        for suffix in INDEX_SUFFIXES:
+            try:
+                return read_index(self._sftp_retry(lambda: self._read_remote(path + suffix, "rb")))
+            except FileNotFoundError:
+                continue
+        raise FileNotFoundError(f"❌ [_read_vcf_index]: No .tbi or .csi index for {path}")
+
+    @contextmanager
+    def _local_copy_with_index(self, path):
+        """
+        Yields (local path, local index path or None) for a remote file and its .tbi/.csi
+        index: cached copies when the cache is enabled, otherwise temporary downloads.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            def fetch(remote_path):
+                if self.cache is not None:
+                    return self._cached_copy(remote_path)
+                local_path = os.path.join(directory, posixpath.basename(remote_path))
+                self._fetch_to_file(remote_path, local_path)
+                return local_path
+
+            local_path, index_path = fetch(path), None
+            for suffix in INDEX_SUFFIXES:
+                try:
+                    index_path = fetch(path + suffix)
+                    break
+                except FileNotFoundError:
+                    continue
+            yield local_path, index_path
+
+    def read_vcf_genotypes(self, path, samples=None, info=(), region=None, batch_bytes=DEFAULT_BATCH_BYTES,
+                           processes=None):
+        """
+        Read the variants and genotype matrix of a remote VCF or BCF file.
+
+        VCFs are streamed and parsed batch by batch; with a region, only the BGZF blocks the
+        .tbi/.csi index points to are read. BCF files, and reads spread over `processes`, work
+        on a local copy (the cache when enabled, otherwise a temporary download).
+        See `FileReader.read_vcf_genotypes` for the parameters and the result.
+
+        :rtype: dict
+        """
+        if path.endswith(BCF_SUFFIX) or (processes is not None and processes > 1):
+            with self._local_copy_with_index(path) as (local_path, index_path):
+                return read_genotypes_file(local_path, samples, info, region, batch_bytes, processes, index_path)
+        if region is not None:
+            index = self._read_vcf_index(path)
+            with self._random_access(path) as source:
+                if isinstance(source, str):
+                    with open(source, "rb") as file:
+                        return read_genotypes_region(file, index, region, samples, info, batch_bytes)
+                return read_genotypes_region(source, index, region, samples, info, batch_bytes)
+        with self._open_stream(path) as stream:
+            if path.endswith(BGZIP_SUFFIXES):
+                stream = gzip.GzipFile(fileobj=stream)
+            return read_genotypes(stream, samples, info, batch_bytes)
 
     def listdir(self, path):
         """
@@ -156,70 +950,666 @@ class SshClient(FileReader):
         :rtype: tuple[list[str], list[str]]
         """
         try:
-            files, directories = [], []
-            for entry in self.sftp_client.listdir_attr(path):
-                if S_ISDIR(entry.st_mode):
-                    directories.append(entry.filename)
-                elif S_ISREG(entry.st_mode):
-                    files.append(entry.filename)
+            children = self.metadata_cache.listing(path) if self.metadata_cache is not None else None
+            if children is None:
+                children = {entry.filename: self._metadata(entry)
+                            for entry in self._sftp_retry(lambda: self.sftp_client.listdir_attr(path))}
+                if self.metadata_cache is not None:
+                    self.metadata_cache.put_listing(path, children)
+            directories = [name for name, info in children.items() if info["type"] == "d"]
+            files = [name for name, info in children.items() if info["type"] == "f"]
             return directories, files
         except Exception as e:
             logging.error(f"❌ [listdir]: Error listing SSH directory {path}: {e}")
             return [], []
 
-    def download_remote_file(self, remote_path, local_path):
+    def walk(self, path, max_depth=None, as_dataframe=False, workers=8):
+        """
+        List the whole tree under a remote directory in one round trip.
+
+        Runs a single `find -printf` on the server. Where remote commands are not allowed
+        (SFTP-only accounts), directories are listed with concurrent `listdir_attr` calls over
+        `workers` SFTP channels instead. Symbolic links are not followed.
+
+        :param path: Remote directory.
+        :type path: str
+        :param max_depth: Deepest level to list (1 lists `path` itself only), None for no limit.
+        :type max_depth: int | None
+        :param as_dataframe: Return a DataFrame instead of a dictionary of lists.
+        :type as_dataframe: bool
+        :param workers: Number of SFTP channels used by the fallback.
+        :type workers: int
+        :return: Entries sorted by path, as parallel lists 'path' (relative to `path`), 'type'
+            (find letters: 'f', 'd', 'l', ...), 'size' and 'mtime'; None on error.
+        :rtype: dict | pd.DataFrame | None
+        """
+        try:
+            try:
+                tree, unreadable = parse_find_output(self._exec_checked(find_command(path, max_depth)), path)
+            except RuntimeError as e:
+                logging.warning(f"⚠️ [walk]: Remote find unavailable, listing over SFTP: {e}")
+                tree, unreadable = self._walk_sftp(path, max_depth, workers)
+            tree = sort_tree(tree)
+            if self.metadata_cache is not None:
+                self._remember_tree(path, tree, max_depth, unreadable)
+            return tree_to_dataframe(tree) if as_dataframe else tree
+        except Exception as e:
+            logging.error(f"❌ [walk]: Error listing SSH directory tree {path}: {e}")
+            return None
+
+    def _remember_tree(self, path, tree, max_depth, unreadable=()):
+        """
+        Caches the listings of every directory `walk` has listed completely; directories in
+        `unreadable` (relative paths that could not be listed) are left out.
+        """
+        listings = {"": {}}
+        for relative, type, size, mtime in zip(tree["path"], tree["type"], tree["size"], tree["mtime"]):
+            parent, _, name = relative.rpartition("/")
+            listings.setdefault(parent, {})[name] = {"type": type, "size": size, "mtime": mtime}
+            if type == "d" and (max_depth is None or relative.count("/") + 1 < max_depth) \
+                    and relative not in unreadable:
+                listings.setdefault(relative, {})
+        for relative, children in listings.items():
+            self.metadata_cache.put_listing(posixpath.join(path, relative) if relative else path, children)
+
+    def _walk_sftp(self, path, max_depth, workers):
+        """
+        Lists a tree with `listdir_attr` calls, a new directory being requested as soon as its
+        parent is listed, over up to `workers` SFTP channels.
+
+        :return: The tree, and the set of directories (relative paths) that could not be listed.
+        :rtype: tuple[dict, set[str]]
+        """
+        tree = new_tree()
+        unreadable = set()
+        with self._channel_pool() as borrow, ThreadPoolExecutor(max_workers=workers) as pool:
+
+            def list_directory(relative, depth):
+                try:
+                    with borrow() as sftp:
+                        directory = posixpath.join(path, relative) if relative else path
+                        return relative, depth, sftp.listdir_attr(directory), None
+                except (IOError, OSError) as e:
+                    return relative, depth, [], e
+
+            pending = {pool.submit(list_directory, "", 1)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    relative, depth, entries, error = future.result()
+                    if error is not None:
+                        if not relative:
+                            raise error
+                        logging.warning(f"⚠️ [walk]: Skipping unreadable directory {relative}: {error}")
+                        unreadable.add(relative)
+                    for entry in entries:
+                        child = f"{relative}/{entry.filename}" if relative else entry.filename
+                        type = mode_type(entry.st_mode)
+                        add_entry(tree, child, type, entry.st_size, entry.st_mtime)
+                        if type == "d" and (max_depth is None or depth < max_depth):
+                            pending.add(pool.submit(list_directory, child, depth + 1))
+        return tree, unreadable
+
+    @contextmanager
+    def _channel_pool(self):
+        """
+        Lends extra SFTP channels to concurrent workers. Yields `borrow`, a context manager
+        giving a channel for exclusive use; channels are opened on demand and closed on exit.
+        """
+        idle = queue.Queue()
+        opened = []
+
+        @contextmanager
+        def borrow():
+            try:
+                sftp = idle.get_nowait()
+            except queue.Empty:
+                sftp = self._open_sftp_channel()
+                opened.append(sftp)
+            try:
+                yield sftp
+            finally:
+                idle.put(sftp)
+
+        try:
+            yield borrow
+        finally:
+            for sftp in opened:
+                sftp.close()
+
+    @contextmanager
+    def _concurrent_reader(self):
+        """
+        Yields a function reading a remote file's binary content; each call borrows its own SFTP
+        channel, so concurrent reads do not queue behind each other on one channel.
+        """
+        with self._channel_pool() as borrow:
+            def read(path):
+                with borrow() as sftp:
+                    return self._channel_view(sftp)._read_file_content(path, "rb", False)
+
+            yield read
+
+    def _run_transfers(self, paths, transfer, streams):
+        """
+        Runs `transfer(path, borrow)` for every path over up to `streams` SFTP channels.
+
+        :return: Tuple (transferred paths, failed paths mapped to their error, bytes moved).
+        :rtype: tuple[list[str], dict, int]
+        """
+        transferred, failed, nbytes = [], {}, 0
+        if not paths:
+            return transferred, failed, nbytes
+        with self._channel_pool() as borrow, ThreadPoolExecutor(max_workers=max(1, streams)) as pool:
+            futures = {pool.submit(transfer, path, borrow): path for path in paths}
+            for future in futures:
+                path = futures[future]
+                try:
+                    nbytes += future.result()
+                    transferred.append(path)
+                except Exception as e:
+                    logging.warning(f"⚠️ [sync]: Failed to transfer {path}: {e}")
+                    failed[path] = str(e)
+        return transferred, failed, nbytes
+
+    def _remote_checksums(self, root, paths, batch=200):
+        """
+        SHA-256 digests of files below `root`, computed on the server in batches.
+
+        :return: Dictionary mapping each relative path to its hex digest.
+        :rtype: dict
+        """
+        digests = {}
+        for i in range(0, len(paths), batch):
+            names = " ".join(shlex.quote(path) for path in paths[i:i + batch])
+            output = self._exec_checked(f"cd {shlex.quote(root)} && sha256sum -- {names}")
+            for line in output.decode("utf-8", errors="surrogateescape").splitlines():
+                digest, _, name = line.partition("  ")
+                digests[name] = digest
+        return digests
+
+    def _differing(self, source, destination, remote_root, local_root, checksum):
+        """
+        Files of `source` to copy over `destination`, compared by size and mtime, or by size
+        and content with `checksum`.
+        """
+        to_copy, same_size = changed_files(source, destination, compare_mtime=not checksum)
+        if checksum and same_size:
+            remote_digests = self._remote_checksums(remote_root, same_size)
+            to_copy += [path for path in same_size
+                        if remote_digests.get(path) != local_checksum(os.path.join(local_root, *path.split("/")))]
+        return sorted(to_copy)
+
+    def sync_down(self, remote_dir, local_dir, streams=4, checksum=False):
+        """
+        Copy a remote directory tree to a local directory, transferring only new or changed files.
+
+        Files are compared by size and modification time, or by size and SHA-256 digest
+        (computed on the server) with `checksum`. Changed files are downloaded concurrently,
+        written atomically and given the remote modification time. Local files absent from
+        the remote tree are kept.
+
+        :param remote_dir: Remote source directory.
+        :type remote_dir: str
+        :param local_dir: Local destination directory (created if missing).
+        :type local_dir: str
+        :param streams: Number of concurrent SFTP transfers.
+        :type streams: int
+        :param checksum: Compare file contents instead of modification times.
+        :type checksum: bool
+        :return: Report with 'files' (copied), 'skipped' (unchanged), 'failed', 'bytes', 'seconds',
+            'mb_per_s' and 'streams' keys, or None if the trees cannot be listed.
+        :rtype: dict | None
+        """
+        start = time.perf_counter()
+        try:
+            remote_tree = self.walk(remote_dir)
+            if remote_tree is None:
+                raise IOError(f"Cannot list {remote_dir}")
+            os.makedirs(local_dir, exist_ok=True)
+            remote_files = index_files(remote_tree)
+            to_copy = self._differing(remote_files, index_files(scan_tree(local_dir)), remote_dir, local_dir, checksum)
+            for relative, type in zip(remote_tree["path"], remote_tree["type"]):
+                if type == "d":
+                    os.makedirs(os.path.join(local_dir, *relative.split("/")), exist_ok=True)
+        except Exception as e:
+            logging.error(f"❌ [sync_down]: Error comparing {remote_dir} with {local_dir}: {e}")
+            return None
+
+        def fetch(relative, borrow):
+            local_path = os.path.join(local_dir, *relative.split("/"))
+            part_path = local_path + ".pyalma-part"
+            size, mtime = remote_files[relative]
+            try:
+                with borrow() as sftp:
+                    sftp.get(posixpath.join(remote_dir, relative), part_path)
+                os.utime(part_path, (mtime, mtime))
+                os.replace(part_path, local_path)
+            finally:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+            return size
+
+        transferred, failed, nbytes = self._run_transfers(to_copy, fetch, streams)
+        report = sync_report(transferred, len(remote_files) - len(to_copy), failed,
+                             transfer_stats(nbytes, time.perf_counter() - start, streams))
+        print(f"✅ Synced {remote_dir} → {local_dir}: {report['files']} files, {report['bytes']} bytes "
+              f"({report['mb_per_s']} MB/s), {report['skipped']} unchanged, {len(failed)} failed")
+        return report
+
+    def _makedirs_remote(self, path):
+        """
+        Creates a remote directory and its missing parents.
+        """
+        parts = path.rstrip("/").split("/")
+        for i in range(1, len(parts) + 1):
+            directory = "/".join(parts[:i])
+            if not directory:
+                continue
+            try:
+                self.sftp_client.stat(directory)
+            except FileNotFoundError:
+                self.sftp_client.mkdir(directory)
+
+    def sync_up(self, local_dir, remote_dir, streams=4, checksum=False):
+        """
+        Copy a local directory tree to a remote directory, transferring only new or changed files.
+
+        The counterpart of `sync_down`: files are compared the same way, uploaded concurrently,
+        renamed into place once complete and given the local modification time. Remote files
+        absent from the local tree are kept.
+
+        :param local_dir: Local source directory.
+        :type local_dir: str
+        :param remote_dir: Remote destination directory (created if missing).
+        :type remote_dir: str
+        :param streams: Number of concurrent SFTP transfers.
+        :type streams: int
+        :param checksum: Compare file contents instead of modification times.
+        :type checksum: bool
+        :return: Report as for `sync_down`, or None if the trees cannot be listed.
+        :rtype: dict | None
+        """
+        start = time.perf_counter()
+        try:
+            local_tree = scan_tree(local_dir)
+            local_files = index_files(local_tree)
+            try:
+                self.sftp_client.stat(remote_dir)
+                remote_tree = self.walk(remote_dir)
+                if remote_tree is None:
+                    raise IOError(f"Cannot list {remote_dir}")
+            except FileNotFoundError:
+                self._makedirs_remote(remote_dir)
+                remote_tree = new_tree()
+            to_copy = self._differing(local_files, index_files(remote_tree), remote_dir, local_dir, checksum)
+            remote_dirs = {path for path, type in zip(remote_tree["path"], remote_tree["type"]) if type == "d"}
+            for relative, type in zip(local_tree["path"], local_tree["type"]):
+                if type == "d" and relative not in remote_dirs:
+                    self.sftp_client.mkdir(posixpath.join(remote_dir, relative))
+        except Exception as e:
+            logging.error(f"❌ [sync_up]: Error comparing {local_dir} with {remote_dir}: {e}")
+            return None
+
+        def send(relative, borrow):
+            remote_path = posixpath.join(remote_dir, relative)
+            part_path = remote_path + ".pyalma-part"
+            size, mtime = local_files[relative]
+            with borrow() as sftp:
+                try:
+                    sftp.put(os.path.join(local_dir, *relative.split("/")), part_path)
+                    sftp.utime(part_path, (mtime, mtime))
+                    self._channel_view(sftp)._replace_remote(part_path, remote_path)
+                except Exception:
+                    try:
+                        sftp.remove(part_path)
+                    except IOError:
+                        pass
+                    raise
+            return size
+
+        transferred, failed, nbytes = self._run_transfers(to_copy, send, streams)
+        for relative in transferred:
+            self._invalidate_remote(posixpath.join(remote_dir, relative))
+        report = sync_report(transferred, len(local_files) - len(to_copy), failed,
+                             transfer_stats(nbytes, time.perf_counter() - start, streams))
+        print(f"✅ Synced {local_dir} → {remote_dir}: {report['files']} files, {report['bytes']} bytes "
+              f"({report['mb_per_s']} MB/s), {report['skipped']} unchanged, {len(failed)} failed")
+        return report
+
+    def _bulk_codec(self, compression):
+        """
+        Codec for a tar stream: `compression` if given, otherwise the client's compression mode.
+        """
+        mode = self.compression if compression is None else compression
+        if mode in (None, "off"):
+            return None
+        return choose_codec(mode, "tar", 0, self._remote_codecs(), self.measured_bandwidth, 0,
+                            self.compression_max_bandwidth)
+
+    @staticmethod
+    def _bulk_names(paths, base_dir, pathmodule):
+        """
+        Splits the paths of a bulk transfer into a base directory and member names relative to it.
+        A single string is taken as a directory whose whole content is transferred (names None).
+
+        :param pathmodule: `posixpath` for remote paths, `os.path` for local ones.
+        """
+        if isinstance(paths, str):
+            return paths, None
+        if not paths:
+            raise ValueError("No files to transfer")
+        if base_dir is None:
+            base_dir = pathmodule.commonpath([pathmodule.dirname(path) for path in paths]) or "."
+        return base_dir, [pathmodule.relpath(pathmodule.join(base_dir, path), base_dir).replace(os.sep, "/")
+                          for path in paths]
+
+    def _tar_members(self, remote_paths, base_dir, compression):
+        """
+        Streams remote files as one tar archive through a single exec channel.
+
+        Yields (relative path, tar member, readable file) for every regular file as it arrives;
+        the file is only readable until the next member is requested. Once exhausted, the
+        transfer report is in `self.last_transfer`, with the paths that could not be read
+        under 'failed'.
+        """
+        start = time.perf_counter()
+        base_dir, names = self._bulk_names(remote_paths, base_dir, posixpath)
+        codec = self._bulk_codec(compression)
+        stdin, stdout, _ = self._exec_command(tar_create_command(base_dir, codec))
+        output = ChannelReader(stdout.channel)
+
+        def send_names():
+            # In its own thread: a long list must not block while the archive fills the window
+            try:
+                stdin.write(b"".join(name.encode("utf-8", errors="surrogateescape") + b"\0"
+                                     for name in (names or ["."])))
+                stdin.channel.shutdown_write()
+            except OSError:
+                pass  # channel closed because the reader stopped early
+
+        sender = threading.Thread(target=send_names, daemon=True)
+        sender.start()
+        received, nbytes = set(), 0
+        try:
+            with tarfile.open(fileobj=decompressing_reader(output, codec), mode="r|") as archive:
+                for member in archive:
+                    relative = member_path(member.name)
+                    if relative is None or not member.isfile():
+                        continue
+                    received.add(relative)
+                    nbytes += member.size
+                    yield relative, member, archive.extractfile(member)
+            error = output.finish()
+            status = stdout.channel.recv_exit_status()
+        finally:
+            stdout.channel.close()
+            sender.join()
+        failed = {name: "not received" for name in (names or []) if name not in received}
+        if status != 0 or failed:
+            logging.warning(f"⚠️ [_tar_members]: tar stream from {base_dir} ended with exit status {status}: {error}")
+        self.last_transfer = transfer_stats(nbytes, time.perf_counter() - start, 1)
+        self.last_transfer.update({"files": len(received), "failed": failed, "codec": codec})
+        self._record_bandwidth(nbytes, self.last_transfer["seconds"])
+
+    def download_files(self, remote_paths, local_dir, base_dir=None, compression=None):
+        """
+        Download many (small) files through one remote `tar` stream instead of one SFTP
+        request sequence per file. Files are unpacked as the stream arrives, written atomically
+        and given their remote modification time.
+
+        :param remote_paths: Remote file paths, or a remote directory to download entirely.
+        :type remote_paths: list[str] | str
+        :param local_dir: Local destination directory; files keep their path relative to `base_dir`.
+        :type local_dir: str
+        :param base_dir: Remote directory the paths are relative to (default: their common parent).
+        :type base_dir: str | None
+        :param compression: None to follow the client's compression mode, "off", "auto", "gzip" or "zstd".
+        :type compression: str | None
+        :return: Report with 'files', 'failed', 'bytes', 'seconds', 'mb_per_s', 'streams' and 'codec'
+            keys, or None on error.
+        :rtype: dict | None
+        """
+        try:
+            os.makedirs(local_dir, exist_ok=True)
+            for relative, member, source in self._tar_members(remote_paths, base_dir, compression):
+                local_path = os.path.join(local_dir, *relative.split("/"))
+                part_path = local_path + ".pyalma-part"
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                try:
+                    with open(part_path, "wb") as local_file:
+                        shutil.copyfileobj(source, local_file)
+                    os.chmod(part_path, member.mode & 0o777)
+                    os.utime(part_path, (member.mtime, member.mtime))
+                    os.replace(part_path, local_path)
+                finally:
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+            report = self.last_transfer
+            print(f"✅ Downloaded {report['files']} files → {local_dir} ({report['bytes']} bytes, "
+                  f"{report['mb_per_s']} MB/s, {len(report['failed'])} failed)")
+            return report
+        except Exception as e:
+            logging.error(f"❌ [download_files]: Error downloading files to {local_dir}: {e}")
+            return None
+
+    def iter_files(self, remote_paths, base_dir=None, compression=None, as_dataframe=False, as_binary=False, **kwargs):
+        """
+        Read many (small) remote files through one `tar` stream, decoding each one in memory
+        with `decode_content_by_type` as it arrives. Nothing is written to disk.
+
+        :param remote_paths: Remote file paths, or a remote directory to read entirely.
+        :type remote_paths: list[str] | str
+        :param base_dir: Remote directory the yielded paths are relative to (default: common parent).
+        :type base_dir: str | None
+        :param compression: None to follow the client's compression mode, "off", "auto", "gzip" or "zstd".
+        :type compression: str | None
+        :param kwargs: Extra arguments for `decode_content_by_type` (e.g. `pandas.read_csv` options).
+        :return: Generator of (path relative to `base_dir`, decoded content) tuples.
+        :rtype: Iterator[tuple[str, object]]
+        """
+        for relative, member, source in self._tar_members(remote_paths, base_dir, compression):
+            yield relative, self.decode_content_by_type(source.read(), self.get_file_extension(relative),
+                                                        as_dataframe=as_dataframe, as_binary=as_binary, **kwargs)
+
+    def read_files(self, remote_paths, base_dir=None, compression=None, as_dataframe=False, as_binary=False, **kwargs):
+        """
+        Read many (small) remote files through one `tar` stream, see `iter_files`.
+
+        :return: Dictionary mapping paths relative to `base_dir` to their decoded content, or None on error.
+        :rtype: dict | None
+        """
+        try:
+            return dict(self.iter_files(remote_paths, base_dir, compression, as_dataframe, as_binary, **kwargs))
+        except Exception as e:
+            logging.error(f"❌ [read_files]: Error reading files over a tar stream: {e}")
+            return None
+
+    def upload_files(self, local_paths, remote_dir, base_dir=None, compression=None):
+        """
+        Upload many (small) files as one `tar` stream unpacked on the server, instead of one
+        SFTP request sequence per file. Modification times and permissions are kept.
+
+        :param local_paths: Local file paths, or a local directory to upload entirely.
+        :type local_paths: list[str] | str
+        :param remote_dir: Remote destination directory (created if missing).
+        :type remote_dir: str
+        :param base_dir: Local directory the paths are relative to (default: their common parent).
+        :type base_dir: str | None
+        :param compression: None to follow the client's compression mode, "off", "auto", "gzip" or "zstd".
+        :type compression: str | None
+        :return: Report with 'files', 'bytes', 'seconds', 'mb_per_s', 'streams' and 'codec' keys,
+            or None on error.
+        :rtype: dict | None
+        """
+        start = time.perf_counter()
+        try:
+            base_dir, names = self._bulk_names(local_paths, base_dir, os.path)
+            if names is None:
+                tree = scan_tree(base_dir)
+                names = [path for path, type in zip(tree["path"], tree["type"]) if type in ("f", "d")]
+            codec = self._bulk_codec(compression)
+            stdin, stdout, stderr = self._exec_command(tar_extract_command(remote_dir, codec))
+            writer = compressing_writer(stdin, codec)
+            nbytes = files = 0
+            with tarfile.open(fileobj=writer, mode="w|") as archive:
+                for name in names:
+                    member = archive.gettarinfo(os.path.join(base_dir, *name.split("/")), arcname=name)
+                    if member.isfile():
+                        with open(os.path.join(base_dir, *name.split("/")), "rb") as local_file:
+                            archive.addfile(member, local_file)
+                        nbytes += member.size
+                        files += 1
+                    elif member.isdir():
+                        archive.addfile(member)
+            if writer is not stdin:
+                writer.close()
+            stdin.channel.shutdown_write()
+            status = stdout.channel.recv_exit_status()
+            if status != 0:
+                error = stderr.read().decode("utf-8", errors="replace").strip()
+                raise RuntimeError(f"remote tar failed with exit status {status}: {error}")
+            for name in names:
+                self._invalidate_remote(posixpath.join(remote_dir, name))
+            self.last_transfer = transfer_stats(nbytes, time.perf_counter() - start, 1)
+            self.last_transfer.update({"files": files, "codec": codec})
+            print(f"✅ Uploaded {files} files → {remote_dir} ({nbytes} bytes, {self.last_transfer['mb_per_s']} MB/s)")
+            return self.last_transfer
+        except Exception as e:
+            logging.error(f"❌ [upload_files]: Error uploading files to {remote_dir}: {e}")
+            return None
+
+    def download_remote_file(self, remote_path, local_path, streams=1, chunk_size=None, new_transports=False):
         """
         Download a remote file via SFTP.
 
+        With `streams` above 1 the file is split into byte ranges fetched concurrently over
+        several SFTP channels; the transfer report is kept in `self.last_transfer`.
+
         :param remote_path: Path on the remote server.
         :type remote_path: str
         :param local_path: Local destination path.
         :type local_path: str
+        :param streams: Number of concurrent SFTP channels.
+        :type streams: int
+        :param chunk_size: Byte range size per stream request (parallel mode only).
+        :type chunk_size: int | None
+        :param new_transports: Open each stream on its own SSH connection instead of
+            multiplexing channels over one transport (parallel mode only).
+        :type new_transports: bool
         """
         try:
-            self.sftp_client.get(remote_path, local_path)
+            if streams > 1:
+                stats = self._parallel_download(remote_path, local_path, streams, chunk_size, new_transports)
+                print(f"✅ Downloaded: {remote_path} → {local_path} ({stats['mb_per_s']} MB/s, {stats['streams']} streams)")
+                return None
+            self._fetch_to_file(remote_path, local_path)
             print(f"✅ Downloaded: {remote_path} → {local_path}")
         except Exception as e:
             logging.error(f"❌ [download_remote_file]: Error copying SSH file to {local_path}: {e}")
             return None
 
-    def write_to_remote_file(self, data, remote_path, file_format="csv"):
+    def write_to_remote_file(self, data, remote_path, file_format="csv", chunk_size=DEFAULT_CHUNK_ROWS,
+                             compression=None, atomic=True, **kwargs):
         """
         Write data (string or DataFrame) to a file on the remote server.
 
+        DataFrames are serialised `chunk_size` rows at a time straight into a pipelined SFTP
+        handle, so memory use is bounded by one chunk. With `atomic`, the data goes to a
+        temporary file renamed over `remote_path` once complete, so readers never see a
+        partial file.
+
         :param data: The data to write.
         :type data: pd.DataFrame | str
         :param remote_path: Destination path on the remote server.
         :type remote_path: str
-        :param file_format: Format to use ('csv' supported for DataFrames).
+        :param file_format: Format to use for DataFrames: 'csv', 'tsv', 'parquet' or 'feather'.
         :type file_format: str
+        :param chunk_size: Rows serialised at a time.
+        :type chunk_size: int
+        :param compression: 'gzip' for CSV/TSV (the default for paths ending in '.gz'), or the
+            Parquet/Feather codec; see `pyalma.writer.write_dataframe`.
+        :type compression: str | None
+        :param atomic: Write to a temporary file, then rename it.
+        :type atomic: bool
+        :param kwargs: Extra arguments for `DataFrame.to_csv`.
         :raises ValueError: If unsupported DataFrame format is specified.
         :raises TypeError: If data is not string or DataFrame.
         """
+        import pandas as pd
+
         if isinstance(data, pd.DataFrame):
-            if file_format in ["csv"]:
-                buffer = StringIO()
-                data.to_csv(buffer, index=False)
-                file_content = buffer.getvalue()
-            elif file_format in ["tsv"]:
-                buffer = StringIO()
-                data.to_csv(buffer, index=False, sep="\t")
-                file_content = buffer.getvalue()            
-            else:
-                raise ValueError("❌ [write_to_remote_file]: Unsupported file format for DataFrame. Use 'csv' or 'tsv'.")
+            if file_format not in DEFAULT_COMPRESSION:
+                raise ValueError("❌ [write_to_remote_file]: Unsupported file format for DataFrame. "
+                                 "Use 'csv', 'tsv', 'parquet' or 'feather'.")
+            if compression is None and file_format in ("csv", "tsv") and remote_path.endswith(".gz"):
+                compression = "gzip"
+
+            def write(handle):
+                write_dataframe(data, handle, file_format, chunk_size, compression, **kwargs)
         elif isinstance(data, str):
-            file_content = data
+            def write(handle):
+                handle.write(data.encode("utf-8"))
         else:
             raise TypeError("❌ [write_to_remote_file]: Data must be a DataFrame or string.")
 
+        target = remote_path + ".pyalma-part" if atomic else remote_path
         try:
-            with self.sftp_client.open(remote_path, "w") as remote_file:
-                remote_file.write(file_content)
-                print(f"✅ Successfully wrote data to {remote_path}")
+            with self.sftp_client.open(target, "wb") as remote_file:
+                remote_file.set_pipelined(True)
+                write(remote_file)
+            if atomic:
+                self._replace_remote(target, remote_path)
+            self._invalidate_remote(remote_path)
+            print(f"✅ Successfully wrote data to {remote_path}")
         except Exception as e:
             logging.error(f"❌ [write_to_remote_file]: Error writing to remote file: {e}")
+            if atomic:
+                try:
+                    self.sftp_client.remove(target)
+                except Exception:
+                    pass
             return None
 
+    def _read_sidecar(self, path):
+        return self._sftp_retry(lambda: self._read_remote(path, "rb"))
+
+    def _write_sidecar(self, path, data):
+        target = path + ".pyalma-part"
+        with self.sftp_client.open(target, "wb") as remote_file:
+            remote_file.set_pipelined(True)
+            remote_file.write(data)
+        self._replace_remote(target, path)
+        self._invalidate_remote(path)
+
+    def _replace_remote(self, source, destination):
+        """
+        Renames `source` over `destination`, atomically when the server supports POSIX renames.
+        Otherwise an existing `destination` is moved aside, and only removed once `source` has
+        taken its place.
+        """
+        try:
+            self.sftp_client.posix_rename(source, destination)
+            return
+        except IOError as e:
+            # paramiko maps only "no such file" and "permission denied" to an errno
+            if e.errno is not None or "unsupported" not in str(e).lower():
+                raise
+        # posix-rename extension unsupported; plain SFTP rename refuses to overwrite a file
+        backup = destination + ".pyalma-old"
+        try:
+            self.sftp_client.rename(destination, backup)
+        except FileNotFoundError:
+            backup = None
+        try:
+            self.sftp_client.rename(source, destination)
+        except Exception:
+            if backup is not None:
+                self.sftp_client.rename(backup, destination)
+            raise
+        if backup is not None:
+            self.sftp_client.remove(backup)
+
     def isfile(self, path):
         """
         Check whether the given remote path points to a file.
@@ -230,12 +1620,29 @@ class SshClient(FileReader):
         :rtype: bool
         """
         try:
-            file_stat = self.sftp_client.lstat(path)
+            info = self._cached_metadata(path)
+            if info is not None:
+                return info["type"] == "f"
+            file_stat = self._sftp_retry(lambda: self.sftp_client.lstat(path))
+            self._remember(path, file_stat)
             return file_stat.st_mode & 0o170000 == 0o100000
         except Exception as e:
             logging.error(f"❌ [isfile]: Error checking SSH file type {path}: {e}")
             raise
 
+    def _cached_metadata(self, path):
+        """
+        Cached metadata of `path`, or None on a miss.
+
+        :raises FileNotFoundError: If a cached listing of the parent shows `path` does not exist.
+        """
+        if self.metadata_cache is None:
+            return None
+        known, info = self.metadata_cache.lookup(path)
+        if known and info is None:
+            raise FileNotFoundError(errno.ENOENT, "No such file", path)
+        return info
+
     def get_file_size(self, path):
         """
         Get the size of a file on the remote server.
@@ -246,7 +1653,16 @@ class SshClient(FileReader):
         :rtype: int | None
         """
         try:
-            return self.sftp_client.stat(path).st_size
+            if self.metadata_cache is None:
+                return self._sftp_retry(lambda: self.sftp_client.stat(path)).st_size
+            info = self._cached_metadata(path)
+            if info is None:
+                attrs = self._sftp_retry(lambda: self.sftp_client.lstat(path))
+                self._remember(path, attrs)
+                info = self._metadata(attrs)
+            if info["type"] == "l":  # the size of a link's target is not cached
+                return self._sftp_retry(lambda: self.sftp_client.stat(path)).st_size
+            return info["size"]
         except Exception as e:
             logging.error(f"❌ [get_file_size]: Error reading SSH file size for {path}: {e}")
             return None
@@ -255,6 +1671,8 @@ class SshClient(FileReader):
         """
         Destructor that closes SSH and SFTP connections and cleans up resources.
         """
+        if getattr(self, "_is_view", False):
+            return
         super().__del__()
         self.disconnect()
 
@@ -264,11 +1682,23 @@ class SshClient(FileReader):
         Logs an error if any issue occurs during the disconnection.
         """
         try:
-            if self.sftp_client:
-                self.sftp_client.close()
-            if self.sftp_ssh_client is not None:
-                self.sftp_ssh_client.close()
-            if self.ssh_client:
-                self.ssh_client.close()
+            # Never connect just to disconnect, but let running handshakes finish so they can be closed
+            for handshake in (self._pending or {}).values():
+                if handshake is not None:
+                    handshake.exception()
+            self._pending = None
+            if self._sftp_client:
+                self._sftp_client.close()
+            if getattr(self, "pool", None) is not None:
+                # Pooled connections stay open for the other clients
+                for client in (self._ssh_client, self._sftp_ssh_client):
+                    if client is not None:
+                        self.pool.release(client)
+                self.sftp_client = self.ssh_client = self.sftp_ssh_client = None
+                return
+            if self._sftp_ssh_client is not None:
+                self._sftp_ssh_client.close()
+            if self._ssh_client:
+                self._ssh_client.close()
         except Exception as e:
             logging.error(f"❌ [disconnect]: Error closing SSH/SFTP connections: {e}")
@@ -0,0 +1,188 @@
+import codecs
+import io
+import select
+import time
+
+# Bytes requested from the channel per read
+READ_SIZE = 32 * 1024
+
+
+class _LineSplitter:
+    """
+    Incrementally decodes a byte stream and splits it into lines, keeping only the
+    unfinished last line in memory.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+
+    def feed(self, data):
+        text = self._pending + self._decoder.decode(data)
+        lines = text.split("\n")
+        self._pending = lines.pop()
+        return [line.rstrip("\r") for line in lines]
+
+    def flush(self):
+        text = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        return [text.rstrip("\r")] if text else []
+
+
+class CommandStream:
+    """
+    Iterator over the output lines of a running remote command.
+
+    Yields ``(stream, line)`` tuples, where `stream` is "stdout" or "stderr", as soon as
+    each line arrives. Lines starting with one of the filter prefixes are dropped. Once the
+    iteration ends, `exit_status` holds the command's exit status.
+    """
+
+    def __init__(self, channel, prefixes=(), timeout=None, stderr=True):
+        """
+        :param channel: Channel on which the command has been started.
+        :type channel: paramiko.Channel
+        :param prefixes: Prefixes of the lines to drop.
+        :type prefixes: tuple[str]
+        :param timeout: Seconds after which the command is abandoned and `TimeoutError` raised.
+        :type timeout: float | None
+        :param stderr: Also yield stderr lines (otherwise stderr is read and discarded).
+        :type stderr: bool
+        """
+        self.channel = channel
+        self.prefixes = tuple(prefixes)
+        self.timeout = timeout
+        self.stderr = stderr
+        self.exit_status = None
+        self._iterator = None
+
+    def __iter__(self):
+        if self._iterator is None:
+            self._iterator = self._lines()
+        return self._iterator
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Closes the channel, stopping the remote command if it is still running.
+        """
+        self.channel.close()
+
+    def _keep(self, line):
+        return not line.startswith(self.prefixes)
+
+    def _emit(self, name, lines):
+        if name == "stderr" and not self.stderr:
+            return []
+        return [(name, line) for line in lines if self._keep(line)]
+
+    def _lines(self):
+        splitters = {"stdout": _LineSplitter(), "stderr": _LineSplitter()}
+        try:
+            for name, data in iter_output(self.channel, self.timeout):
+                yield from self._emit(name, splitters[name].feed(data))
+            for name, splitter in splitters.items():
+                yield from self._emit(name, splitter.flush())
+            self.exit_status = self.channel.recv_exit_status()
+        finally:
+            self.channel.close()
+
+
+class ChannelReader(io.RawIOBase):
+    """
+    Readable binary file over the stdout of a remote command, for parsers that take a file.
+
+    Reads go through `iter_output`, so the command's stderr is read along the way and kept
+    rather than left to stall the channel.
+    """
+
+    def __init__(self, channel, timeout=None):
+        """
+        :param channel: Channel on which the command has been started.
+        :type channel: paramiko.Channel
+        :param timeout: Seconds after which `TimeoutError` is raised.
+        :type timeout: float | None
+        """
+        super().__init__()
+        self.channel = channel
+        self._output = iter_output(channel, timeout)
+        self._stderr = []
+        self._pending = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            name, data = next(self._output, (None, None))
+            if name is None:
+                return 0
+            if name == "stderr":
+                self._stderr.append(data)
+            else:
+                self._pending = memoryview(data)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def finish(self):
+        """
+        Reads the rest of the output until the command exits, discarding stdout.
+
+        :return: Everything the command wrote to stderr.
+        :rtype: str
+        """
+        for name, data in self._output:
+            if name == "stderr":
+                self._stderr.append(data)
+        self._pending = memoryview(b"")
+        return b"".join(self._stderr).decode("utf-8", errors="replace").strip()
+
+
+def iter_output(channel, timeout=None, idle=False):
+    """
+    Yields the output of a remote command as ("stdout" | "stderr", bytes) pieces, as they arrive.
+
+    Both streams are read together: data left unread on either one stops the channel window
+    from refilling, which stalls the command once about a window (2 MB) is pending.
+
+    :param channel: Channel on which the command has been started.
+    :type channel: paramiko.Channel
+    :param timeout: Seconds after which `TimeoutError` is raised.
+    :type timeout: float | None
+    :param idle: Count `timeout` from the last output received instead of from the start.
+    :type idle: bool
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        # Checked before reading: output is queued before the exit status, so once the
+        # status was known and both buffers are found empty, nothing is left to read
+        finished = channel.exit_status_ready()
+        progressed = False
+        if channel.recv_ready():
+            yield "stdout", channel.recv(READ_SIZE)
+            progressed = True
+        if channel.recv_stderr_ready():
+            yield "stderr", channel.recv_stderr(READ_SIZE)
+            progressed = True
+        if progressed:
+            if idle and timeout is not None:
+                deadline = time.monotonic() + timeout
+            continue
+        if finished:
+            return
+        wait = 1.0
+        if deadline is not None:
+            wait = deadline - time.monotonic()
+            if wait <= 0:
+                if idle:
+                    raise TimeoutError(f"❌ [iter_output]: Command produced no output for {timeout}s")
+                raise TimeoutError(f"❌ [iter_output]: Command did not finish within {timeout}s")
+            wait = min(wait, 1.0)
+        select.select([channel], [], [], wait)
@@ -0,0 +1,73 @@
+import hashlib
+
+# Read size used when hashing local files
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def index_files(tree):
+    """
+    Maps the regular files of a tree listing to their (size, mtime).
+
+    :param tree: Tree listing (see `pyalma.tree.new_tree`).
+    :type tree: dict
+    :rtype: dict[str, tuple[int, float]]
+    """
+    return {path: (size, mtime)
+            for path, type, size, mtime in zip(tree["path"], tree["type"], tree["size"], tree["mtime"])
+            if type == "f"}
+
+
+def changed_files(source, destination, compare_mtime=True):
+    """
+    Lists the source files missing from the destination or differing from it.
+
+    Files differ when their sizes differ or, with `compare_mtime`, when their modification
+    times differ by a second or more (SFTP keeps whole seconds).
+
+    :param source: Files as returned by `index_files`.
+    :type source: dict
+    :param destination: Files as returned by `index_files`.
+    :type destination: dict
+    :param compare_mtime: Compare modification times as well as sizes.
+    :type compare_mtime: bool
+    :return: Tuple (paths to transfer, paths with the same size on both sides), sorted.
+    :rtype: tuple[list[str], list[str]]
+    """
+    changed, same_size = [], []
+    for path, (size, mtime) in source.items():
+        other = destination.get(path)
+        if other is None or other[0] != size:
+            changed.append(path)
+        elif compare_mtime and int(other[1]) != int(mtime):
+            changed.append(path)
+        else:
+            same_size.append(path)
+    return sorted(changed), sorted(same_size)
+
+
+def local_checksum(path):
+    """
+    :return: SHA-256 hex digest of a local file.
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def sync_report(transferred, skipped, failed, stats):
+    """
+    Builds the report returned by `SshClient.sync_down` and `SshClient.sync_up`.
+
+    :param transferred: Relative paths of the files copied.
+    :param skipped: Number of files left unchanged.
+    :param failed: Dictionary mapping relative paths to the error that stopped their transfer.
+    :param stats: Transfer report (see `pyalma.transfer.transfer_stats`).
+    :return: `stats` plus 'files', 'skipped' and 'failed' keys.
+    :rtype: dict
+    """
+    report = dict(stats)
+    report.update({"files": len(transferred), "skipped": skipped, "failed": failed})
+    return report
@@ -0,0 +1,284 @@
+import gzip
+import logging
+import os
+import posixpath
+import shlex
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Size of the byte range handed to a stream at a time
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+# Size of the reads copied from a range into the local file
+BLOCK_SIZE = 1024 * 1024
+
+# File types worth compressing on the fly (already-compressed formats are excluded)
+COMPRESSIBLE_TYPES = {"csv", "tsv", "bed", "vcf", "sam", "txt", "text", "out", "log", "err", "json", "tar"}
+# Files smaller than this are sent raw: the extra exec round trip costs more than it saves
+COMPRESSION_MIN_SIZE = 1024 * 1024
+# Above this measured link bandwidth (bytes/s) compression no longer pays off in auto mode
+COMPRESSION_MAX_BANDWIDTH = 50e6
+
+
+def split_ranges(size, chunk_size):
+    """
+    Splits a file of `size` bytes into consecutive (offset, length) ranges.
+
+    :param size: Total file size in bytes.
+    :type size: int
+    :param chunk_size: Maximum length of each range.
+    :type chunk_size: int
+    :return: List of (offset, length) tuples covering the file.
+    :rtype: list[tuple[int, int]]
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be a positive number of bytes")
+    return [(offset, min(chunk_size, size - offset)) for offset in range(0, size, chunk_size)]
+
+
+def transfer_stats(nbytes, seconds, streams):
+    """
+    Builds the transfer report returned by the download engines.
+
+    :return: Dictionary with 'bytes', 'seconds', 'mb_per_s' and 'streams' keys.
+    :rtype: dict
+    """
+    return {
+        "bytes": nbytes,
+        "seconds": round(seconds, 4),
+        "mb_per_s": round(nbytes / seconds / 1e6, 2) if seconds > 0 else None,
+        "streams": streams,
+    }
+
+
+def _fetch_ranges(sftp, remote_path, local_path, next_range):
+    """
+    Worker loop: pulls ranges until exhausted and writes each one at its offset.
+    """
+    nbytes = 0
+    with open(local_path, "r+b") as local_file:
+        while True:
+            item = next_range()
+            if item is None:
+                return nbytes
+            offset, length = item
+            local_file.seek(offset)
+            # A fresh handle per range: paramiko's prefetch state is not safely reusable
+            with sftp.open(remote_path, "rb") as remote_file:
+                remote_file.seek(offset)
+                remote_file.prefetch(offset + length)
+                remaining = length
+                while remaining > 0:
+                    data = remote_file.read(min(BLOCK_SIZE, remaining))
+                    if not data:
+                        break
+                    local_file.write(data)
+                    nbytes += len(data)
+                    remaining -= len(data)
+
+
+def parallel_download(open_channel, remote_path, local_path, size, streams=4, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Downloads a remote file as byte ranges fetched concurrently over several SFTP channels.
+
+    The local file is preallocated to `size` bytes and every range is written at its
+    own offset, so ranges can complete in any order.
+
+    :param open_channel: Callable returning a new `paramiko.SFTPClient` per stream.
+    :type open_channel: callable
+    :param remote_path: Path of the file on the remote server.
+    :type remote_path: str
+    :param local_path: Local destination path.
+    :type local_path: str
+    :param size: Size of the remote file in bytes.
+    :type size: int
+    :param streams: Number of concurrent channels.
+    :type streams: int
+    :param chunk_size: Size of the byte range a stream fetches at a time.
+    :type chunk_size: int
+    :return: Transfer report (see `transfer_stats`).
+    :rtype: dict
+    """
+    ranges = split_ranges(size, chunk_size)
+    streams = max(1, min(streams, len(ranges)))
+    lock = threading.Lock()
+    pending = iter(ranges)
+
+    def next_range():
+        with lock:
+            return next(pending, None)
+
+    def worker():
+        sftp = open_channel()
+        try:
+            return _fetch_ranges(sftp, remote_path, local_path, next_range)
+        finally:
+            sftp.close()
+
+    start = time.perf_counter()
+    with open(local_path, "wb") as local_file:
+        local_file.truncate(size)
+    if not ranges:
+        return transfer_stats(0, time.perf_counter() - start, 0)
+
+    with ThreadPoolExecutor(max_workers=streams) as pool:
+        futures = [pool.submit(worker) for _ in range(streams)]
+        nbytes = sum(future.result() for future in futures)
+
+    if nbytes != size:
+        raise IOError(f"❌ [parallel_download]: Short transfer for {remote_path}: got {nbytes} of {size} bytes")
+    stats = transfer_stats(nbytes, time.perf_counter() - start, streams)
+    logging.info(f"✅ [parallel_download]: {remote_path} {stats['bytes']} bytes in {stats['seconds']}s "
+                 f"({stats['mb_per_s']} MB/s, {streams} streams)")
+    return stats
+
+
+def local_codecs():
+    """
+    Lists the codecs that can be decompressed locally, fastest first.
+    zstd requires the optional `zstandard` package.
+
+    :rtype: list[str]
+    """
+    try:
+        import zstandard  # noqa: F401
+        return ["zstd", "gzip"]
+    except ImportError:
+        return ["gzip"]
+
+
+def choose_codec(mode, type, size, remote_codecs, bandwidth=None, min_size=COMPRESSION_MIN_SIZE,
+                 max_bandwidth=COMPRESSION_MAX_BANDWIDTH):
+    """
+    Picks the codec for a compressed transfer, or None for a raw transfer.
+
+    :param mode: None/"off", "auto", or an explicit codec ("gzip", "zstd").
+    :type mode: str | None
+    :param type: File type (extension).
+    :type type: str
+    :param size: File size in bytes.
+    :type size: int
+    :param remote_codecs: Compressors available on the remote host.
+    :type remote_codecs: list[str]
+    :param bandwidth: Measured raw transfer rate in bytes/s, if known (auto mode only).
+    :type bandwidth: float | None
+    :return: Codec name or None.
+    :rtype: str | None
+    """
+    usable = [codec for codec in local_codecs() if codec in remote_codecs]
+    if mode in (None, "off") or not usable:
+        return None
+    if mode != "auto":
+        return mode if mode in usable else None
+    if type not in COMPRESSIBLE_TYPES or size < min_size:
+        return None
+    if bandwidth is not None and bandwidth > max_bandwidth:
+        return None
+    return usable[0]
+
+
+def compress_command(codec, path):
+    """
+    Returns the remote command writing `path` compressed with `codec` to stdout.
+    Fast compression levels are used: the goal is throughput, not ratio.
+    """
+    if codec == "zstd":
+        return f"zstd -q -c -3 -T0 -- {shlex.quote(path)}"
+    return f"gzip -1 -c -- {shlex.quote(path)}"
+
+
+def _decompressor(codec):
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(wbits=31)  # gzip container
+
+
+def copy_decompressed(source, destination, codec, chunk_size=256 * 1024):
+    """
+    Decompresses a stream as it arrives into a writable file object.
+
+    :param source: Readable binary stream of compressed data (e.g. an exec channel's stdout).
+    :param destination: Writable binary file object.
+    :param codec: "gzip" or "zstd".
+    :type codec: str
+    :return: Tuple (decompressed bytes written, compressed bytes read).
+    :rtype: tuple[int, int]
+    """
+    decompressor = _decompressor(codec)
+    written = received = 0
+    for data in iter(lambda: source.read(chunk_size), b""):
+        received += len(data)
+        output = decompressor.decompress(data)
+        destination.write(output)
+        written += len(output)
+    output = decompressor.flush()
+    destination.write(output)
+    return written + len(output), received
+
+
+def tar_create_command(directory, codec=None):
+    """
+    Returns the remote command writing a tar stream of files below `directory` to stdout,
+    compressed with `codec` if given. The member names are read NUL-separated from stdin,
+    so the file list is not limited by the command line length.
+    """
+    command = f"cd {shlex.quote(directory)} && tar cf - --null -T -"
+    if codec == "zstd":
+        return command + " | zstd -q -c -3 -T0"
+    if codec == "gzip":
+        return command + " | gzip -1 -c"
+    return command
+
+
+def tar_extract_command(directory, codec=None):
+    """
+    Returns the remote command unpacking a tar stream read from stdin into `directory`
+    (created if missing), decompressing it with `codec` if given.
+    """
+    extract = f"mkdir -p {shlex.quote(directory)} && cd {shlex.quote(directory)} && "
+    if codec == "zstd":
+        return extract + "zstd -q -d -c | tar xf -"
+    if codec == "gzip":
+        return extract + "gzip -d -c | tar xf -"
+    return extract + "tar xf -"
+
+
+def decompressing_reader(source, codec=None):
+    """
+    Wraps a readable binary stream so that reads return its decompressed content.
+    """
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(source)
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=source, mode="rb")
+    return source
+
+
+def compressing_writer(destination, codec=None):
+    """
+    Wraps a writable binary stream so that written data is compressed with `codec`.
+    Closing the wrapper flushes the compressor without closing `destination`; without a
+    codec, `destination` itself is returned.
+    """
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).stream_writer(destination, closefd=False)
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=destination, mode="wb", compresslevel=1)
+    return destination
+
+
+def member_path(name):
+    """
+    Normalises a tar member name into a relative '/'-separated path.
+
+    :return: The path, or None for names that are absolute or escape the destination.
+    :rtype: str | None
+    """
+    path = posixpath.normpath(name)
+    if path == "." or path.startswith("/") or path == ".." or path.startswith("../"):
+        return None
+    return path
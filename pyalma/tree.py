@@ -0,0 +1,216 @@
+import logging
+import os
+import posixpath
+import re
+import shlex
+import stat
+
+# Fields printed by `find` for every entry: type letter, size, mtime and path relative to the start point
+FIND_FORMAT = "%y\\t%s\\t%T@\\t%P\\0"
+TREE_COLUMNS = ("path", "type", "size", "mtime")
+# Error message of `find` (C locale) about an entry it could not read
+FIND_ERROR = re.compile(r"find: '(.+)': [^:]+$")
+
+
+def new_tree():
+    """
+    Returns an empty tree listing: a dictionary of parallel lists ('path', 'type', 'size', 'mtime').
+
+    Types use the letters of `find -printf %y`: 'f' file, 'd' directory, 'l' symbolic link,
+    'p' FIFO, 's' socket, 'c'/'b' character/block device.
+
+    :rtype: dict
+    """
+    return {column: [] for column in TREE_COLUMNS}
+
+
+def add_entry(tree, path, type, size, mtime):
+    tree["path"].append(path)
+    tree["type"].append(type)
+    tree["size"].append(size)
+    tree["mtime"].append(mtime)
+
+
+def sort_tree(tree):
+    """
+    Returns `tree` with its entries sorted by path.
+    """
+    order = sorted(range(len(tree["path"])), key=tree["path"].__getitem__)
+    return {column: [values[i] for i in order] for column, values in tree.items()}
+
+
+def tree_to_dataframe(tree):
+    """
+    Converts a tree listing into a DataFrame with one row per entry.
+
+    :rtype: pd.DataFrame
+    """
+    import pandas as pd
+
+    df = pd.DataFrame(tree, columns=list(TREE_COLUMNS))
+    df["mtime"] = pd.to_datetime(df["mtime"], unit="s")
+    return df
+
+
+def mode_type(mode):
+    """
+    Maps a `st_mode` value to its `find -printf %y` letter.
+    """
+    if stat.S_ISLNK(mode):
+        return "l"
+    if stat.S_ISDIR(mode):
+        return "d"
+    if stat.S_ISREG(mode):
+        return "f"
+    if stat.S_ISFIFO(mode):
+        return "p"
+    if stat.S_ISSOCK(mode):
+        return "s"
+    if stat.S_ISCHR(mode):
+        return "c"
+    if stat.S_ISBLK(mode):
+        return "b"
+    return "U"
+
+
+def scan_tree(path, max_depth=None):
+    """
+    Lists a local directory tree with `os.scandir`, without following symbolic links.
+    Unreadable subdirectories are skipped.
+
+    :return: Tree listing sorted by path (see `new_tree`), paths relative to `path` using '/'.
+    :rtype: dict
+    :raises OSError: If `path` itself cannot be listed.
+    """
+    tree = new_tree()
+    stack = [("", 1)]
+    while stack:
+        relative, depth = stack.pop()
+        try:
+            with os.scandir(os.path.join(path, relative)) as entries:
+                for entry in entries:
+                    child = f"{relative}/{entry.name}" if relative else entry.name
+                    attrs = entry.stat(follow_symlinks=False)
+                    type = mode_type(attrs.st_mode)
+                    add_entry(tree, child, type, attrs.st_size, attrs.st_mtime)
+                    if type == "d" and (max_depth is None or depth < max_depth):
+                        stack.append((child, depth + 1))
+        except OSError as e:
+            if not relative:
+                raise
+            logging.warning(f"⚠️ [scan_tree]: Skipping unreadable directory {relative}: {e}")
+    return sort_tree(tree)
+
+
+def find_command(path, max_depth=None):
+    """
+    Returns the remote command listing the tree under `path` in one round trip (GNU find).
+    The exit status of `find` and its error messages are appended after the last record.
+    """
+    depth = f" -maxdepth {int(max_depth)}" if max_depth is not None else ""
+    # Records go to stdout through fd 3 while the messages are captured, so they cannot interleave
+    script = (f"{{ errors=$(LC_ALL=C find {shlex.quote(path)} -mindepth 1{depth} -printf {shlex.quote(FIND_FORMAT)} "
+              f"2>&1 >&3); status=$?; }} 3>&1; printf '\\0%d\\0%s' \"$status\" \"$errors\"")
+    return f"sh -c {shlex.quote(script)}"
+
+
+def parse_find_output(data, path):
+    """
+    Parses the NUL-separated records printed by `find_command`.
+
+    :param data: Raw command output.
+    :type data: bytes
+    :param path: Directory the command listed.
+    :type path: str
+    :return: Tree listing (see `new_tree`), and the set of directories (relative paths) that
+        `find` could not read.
+    :rtype: tuple[dict, set[str]]
+    :raises RuntimeError: If `find` failed. Exit status 1 with some output means that only
+        unreadable subdirectories were skipped, and is accepted.
+    """
+    data, _, errors = data.rpartition(b"\0")
+    records, _, status = data.rpartition(b"\0")
+    status = int(status or -1)
+    records = records.split(b"\0")[:-1] if records else []
+    if status != 0 and not (status == 1 and records):
+        raise RuntimeError(f"❌ [parse_find_output]: find failed with exit status {status}")
+    tree = new_tree()
+    for record in records:
+        type, size, mtime, relative = record.decode("utf-8", errors="surrogateescape").split("\t", 3)
+        add_entry(tree, relative, type, int(size), float(mtime))
+    prefix = path if path.endswith("/") else path + "/"
+    unreadable = set()
+    for line in errors.decode("utf-8", errors="surrogateescape").splitlines():
+        # e.g. "find: '/data/run1/private': Permission denied"
+        match = FIND_ERROR.match(line)
+        if match and match.group(1).startswith(prefix):
+            unreadable.add(match.group(1)[len(prefix):])
+    return tree, unreadable
+
+
+def split_glob(pattern):
+    """
+    Splits a glob pattern into the directory to walk and the pattern relative to it.
+
+    :return: Tuple (base directory, relative pattern, maximum depth or None for '**').
+    :rtype: tuple[str, str, int | None]
+    """
+    parts = pattern.split("/")
+    literal = 0
+    while literal < len(parts) - 1 and not re.search(r"[*?\[]", parts[literal]):
+        literal += 1
+    base = "/".join(parts[:literal]) or ("/" if pattern.startswith("/") else ".")
+    rest = parts[literal:]
+    depth = None if "**" in rest else len(rest)
+    return base, "/".join(rest), depth
+
+
+def glob_to_regex(pattern):
+    """
+    Translates a relative glob pattern into a compiled regex. `*`, `?` and `[...]` do not match
+    '/', while a `**` path component matches any number of directories.
+    """
+    regex = ""
+    parts = pattern.split("/")
+    for index, part in enumerate(parts):
+        last = index == len(parts) - 1
+        if part == "**":
+            regex += ".*" if last else "(?:.*/)?"
+            continue
+        i = 0
+        while i < len(part):
+            char = part[i]
+            if char == "*":
+                regex += "[^/]*"
+            elif char == "?":
+                regex += "[^/]"
+            elif char == "[":
+                end = part.find("]", i + 2)
+                if end == -1:
+                    regex += re.escape(char)
+                else:
+                    body = part[i + 1:end]
+                    if body.startswith("!"):
+                        body = "^" + body[1:]
+                    regex += f"[{body}]"
+                    i = end
+            else:
+                regex += re.escape(char)
+            i += 1
+        if not last:
+            regex += "/"
+    return re.compile(regex + r"\Z")
+
+
+def filter_tree(tree, pattern, base):
+    """
+    Keeps the entries of a tree walked from `base` whose relative path matches `pattern`,
+    with paths made relative to the caller's (i.e. prefixed with `base`).
+    """
+    regex = glob_to_regex(pattern)
+    matched = new_tree()
+    for i, path in enumerate(tree["path"]):
+        if regex.match(path):
+            full_path = path if base == "." else posixpath.join(base, path)
+            add_entry(matched, full_path, tree["type"][i], tree["size"][i], tree["mtime"][i])
+    return matched
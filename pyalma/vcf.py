@@ -0,0 +1,330 @@
+import codecs
+import csv
+import gzip
+import io
+import struct
+import zlib
+
+# Fixed VCF columns; sample columns follow FORMAT
+VCF_COLUMNS = ("CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO")
+# Largest compressed BGZF block
+BGZF_MAX_BLOCK = 65536
+# End coordinate used for regions without one ("chr1", "chr1:1000")
+MAX_POSITION = 2 ** 31 - 1
+# Tabix (.tbi) binning: 16 kb windows, 5 levels
+TBI_MIN_SHIFT, TBI_DEPTH = 14, 5
+# Suffixes of bgzipped VCFs, and the index files tabix writes next to them
+BGZIP_SUFFIXES = (".vcf.gz", ".vcf.bgz")
+INDEX_SUFFIXES = (".tbi", ".csi")
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def parse_region(region):
+    """
+    Parses a samtools-style region.
+
+    :param region: "chr1", "chr1:1000" or "chr1:1,000-2,000" (1-based, inclusive).
+    :type region: str
+    :return: Tuple (chromosome, 0-based start, end), a half-open interval.
+    :rtype: tuple[str, int, int]
+    """
+    chrom, _, span = region.rpartition(":")
+    if not chrom or not span.replace(",", "").replace("-", "").isdigit():
+        return region, 0, MAX_POSITION
+    start, _, end = span.replace(",", "").partition("-")
+    return chrom, max(int(start) - 1, 0), int(end) if end else MAX_POSITION
+
+
+def text_stream(stream, compressed):
+    """
+    Wraps a binary VCF stream (plain or bgzipped) into a text stream.
+    """
+    if compressed:
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+    return codecs.getreader("utf-8")(stream)
+
+
+def read_vcf(stream):
+    """
+    Parses a VCF text stream into a DataFrame with one row per record.
+
+    'POS' is an integer column and 'QUAL' a float column ('.' becomes NaN); the other columns,
+    including one per sample, hold the raw strings.
+
+    :param stream: Text stream positioned at the start of the header.
+    :rtype: pd.DataFrame
+    :raises ValueError: If the `#CHROM` header line is missing.
+    """
+    columns = None
+    while columns is None:
+        line = stream.readline()
+        if not line or not line.startswith("#"):
+            raise ValueError("❌ [read_vcf]: Missing #CHROM header line")
+        if line.startswith("#CHROM"):
+            columns = line[1:].rstrip("\r\n").split("\t")
+    return read_records(stream, columns)
+
+
+def read_records(stream, columns):
+    """
+    Parses tab-separated VCF records (no header) into a DataFrame, typed as in `read_vcf`.
+
+    :param stream: Text or binary stream.
+    :param columns: Column names, from the `#CHROM` line.
+    :type columns: list[str]
+    :rtype: pd.DataFrame
+    """
+    import pandas as pd
+
+    dtype = {column: str for column in columns}
+    dtype.update({"POS": "int64", "QUAL": "float64"})
+    try:
+        return pd.read_csv(stream, sep="\t", header=None, names=columns, dtype=dtype, quoting=csv.QUOTE_NONE,
+                           na_values={"QUAL": ["."]}, keep_default_na=False)
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame({column: pd.Series(dtype=dtype[column]) for column in columns})
+
+
+def read_index(data):
+    """
+    Parses a tabix (.tbi) or CSI (.csi) index.
+
+    :param data: Raw content of the index file (BGZF-compressed).
+    :type data: bytes
+    :return: Dictionary with 'names' (sequence names), 'min_shift', 'depth' and 'refs', one
+        dictionary per sequence with 'bins' (bin -> list of (start, end) virtual offsets) and
+        'linear' (linear index, tabix only).
+    :rtype: dict
+    """
+    data = gzip.decompress(data)
+    magic = data[:4]
+    if magic == b"TBI\1":
+        n_ref, = struct.unpack_from("<i", data, 4)
+        offset, (min_shift, depth) = 8, (TBI_MIN_SHIFT, TBI_DEPTH)
+        header = data[offset:offset + 28]
+        offset += 28
+    elif magic == b"CSI\1":
+        min_shift, depth, l_aux = struct.unpack_from("<iii", data, 4)
+        header = data[16:16 + l_aux]
+        offset = 16 + l_aux
+        n_ref, = struct.unpack_from("<i", data, offset)
+        offset += 4
+    else:
+        raise ValueError("❌ [read_index]: Not a tabix or CSI index")
+
+    names = []
+    if len(header) >= 28:  # tabix header: format, columns, meta char, skip, names
+        l_nm, = struct.unpack_from("<i", header, 24)
+        if magic == b"TBI\1":
+            names_data = data[offset:offset + l_nm]
+            offset += l_nm
+        else:
+            names_data = header[28:28 + l_nm]
+        names = [name.decode("utf-8") for name in names_data.split(b"\0") if name]
+
+    refs = []
+    for _ in range(n_ref):
+        n_bin, = struct.unpack_from("<i", data, offset)
+        offset += 4
+        bins = {}
+        for _ in range(n_bin):
+            if magic == b"TBI\1":
+                bin, n_chunk = struct.unpack_from("<Ii", data, offset)
+                offset += 8
+            else:
+                bin, _, n_chunk = struct.unpack_from("<IQi", data, offset)
+                offset += 16
+            chunks = struct.unpack_from(f"<{2 * n_chunk}Q", data, offset)
+            offset += 16 * n_chunk
+            bins[bin] = list(zip(chunks[::2], chunks[1::2]))
+        linear = None
+        if magic == b"TBI\1":
+            n_intv, = struct.unpack_from("<i", data, offset)
+            offset += 4
+            linear = struct.unpack_from(f"<{n_intv}Q", data, offset)
+            offset += 8 * n_intv
+        refs.append({"bins": bins, "linear": linear})
+    return {"names": names, "min_shift": min_shift, "depth": depth, "refs": refs}
+
+
+def region_bins(start, end, min_shift, depth):
+    """
+    Lists the bins that may hold records overlapping [start, end) (`hts_reg2bins`).
+    """
+    end -= 1
+    bins, first_bin, shift = [], 0, min_shift + depth * 3
+    for level in range(depth + 1):
+        bins.extend(range(first_bin + (start >> shift), first_bin + (end >> shift) + 1))
+        shift -= 3
+        first_bin += 1 << (level * 3)
+    return bins
+
+
+def region_chunks(index, chrom, start, end):
+    """
+    Virtual offset ranges of the BGZF file to read for a region, sorted and merged.
+
+    :return: List of (start, end) virtual offsets; empty if the sequence is not indexed.
+    :rtype: list[tuple[int, int]]
+    """
+    if chrom not in index["names"]:
+        return []
+    ref = index["refs"][index["names"].index(chrom)]
+    end = min(end, 1 << (index["min_shift"] + index["depth"] * 3))
+    minimum = 0
+    if ref["linear"]:
+        window = min(start >> TBI_MIN_SHIFT, len(ref["linear"]) - 1)
+        minimum = ref["linear"][window]
+    chunks = sorted(chunk for bin in region_bins(start, end, index["min_shift"], index["depth"])
+                    for chunk in ref["bins"].get(bin, []) if chunk[1] > minimum)
+    merged = []
+    for chunk_start, chunk_end in chunks:
+        if merged and chunk_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], chunk_end))
+        else:
+            merged.append((chunk_start, chunk_end))
+    return merged
+
+
+def bgzf_block_size(data, offset=0):
+    """
+    Compressed size of the BGZF block whose header starts at `offset` in `data` (BSIZE + 1).
+
+    :raises ValueError: If the header carries no BGZF 'BC' field.
+    """
+    extra_length, = struct.unpack_from("<H", data, offset + 10)
+    position = offset + 12
+    while position < offset + 12 + extra_length:
+        length, = struct.unpack_from("<H", data, position + 2)
+        if data[position:position + 2] == b"BC":
+            return struct.unpack_from("<H", data, position + 4)[0] + 1
+        position += 4 + length
+    raise ValueError("❌ [bgzf_block_size]: Not a BGZF file")
+
+
+def bgzf_blocks(data, offset=0):
+    """
+    Yields (compressed offset relative to `data`, compressed size, decompressed block) for
+    the complete BGZF blocks in `data`, starting at `offset`.
+    """
+    view = memoryview(data)
+    while offset + 18 <= len(data):
+        size = bgzf_block_size(data, offset)
+        if offset + size > len(data):
+            return
+        yield offset, size, zlib.decompress(view[offset:offset + size], wbits=31)
+        offset += size
+
+
+def read_block_size(source, offset):
+    """
+    Reads the header of the BGZF block at `offset` of a file and returns its compressed size,
+    or 0 past the end of the file.
+
+    :param source: Seekable binary file object.
+    :rtype: int
+    """
+    source.seek(offset)
+    header = source.read(18)
+    return bgzf_block_size(header) if len(header) == 18 else 0
+
+
+def iter_chunk(source, chunk_start, chunk_end, read_size=BGZF_MAX_BLOCK * 16):
+    """
+    Yields the decompressed bytes between two virtual offsets of a BGZF file, one block at a
+    time, reading at most about `read_size` compressed bytes at once.
+
+    :param source: Seekable binary file object.
+    """
+    first, last = chunk_start >> 16, chunk_end >> 16
+    end = last + (read_block_size(source, last) if chunk_end & 0xFFFF else 0)
+    data, offset = b"", first
+    while offset < end:
+        source.seek(offset + len(data))
+        more = source.read(min(read_size, end - offset - len(data)))
+        if not more:
+            return
+        data += more
+        consumed = 0
+        for relative, size, block in bgzf_blocks(data):
+            position = offset + relative
+            yield block[chunk_start & 0xFFFF if position == first else 0:
+                        chunk_end & 0xFFFF if position == last else None]
+            consumed = relative + size
+        data, offset = data[consumed:], offset + consumed
+
+
+def read_chunk(source, chunk_start, chunk_end):
+    """
+    Reads the decompressed bytes between two virtual offsets of a BGZF file.
+
+    :param source: Seekable binary file object.
+    """
+    return b"".join(iter_chunk(source, chunk_start, chunk_end))
+
+
+def contig_chunks(index):
+    """
+    Virtual offset range holding each indexed sequence, in file order.
+
+    :return: List of (name, start, end); sequences without records are left out.
+    :rtype: list[tuple[str, int, int]]
+    """
+    # Bin number tabix and CSI use for per-sequence metadata rather than records
+    pseudo_bin = ((1 << (3 * (index["depth"] + 1))) - 1) // 7 + 1
+    ranges = []
+    for name, ref in zip(index["names"], index["refs"]):
+        chunks = [chunk for bin, bin_chunks in ref["bins"].items() if bin != pseudo_bin for chunk in bin_chunks]
+        if chunks:
+            ranges.append((name, min(start for start, _ in chunks), max(end for _, end in chunks)))
+    return sorted(ranges, key=lambda item: item[1])
+
+
+def read_header(source):
+    """
+    Reads the header lines of a bgzipped VCF, up to and including `#CHROM`.
+
+    :param source: Seekable binary file object.
+    :rtype: str
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    text, offset = "", 0
+    while True:
+        size = read_block_size(source, offset)
+        if not size:
+            raise ValueError("❌ [read_header]: Missing #CHROM header line")
+        source.seek(offset)
+        text += decoder.decode(zlib.decompress(source.read(size), wbits=31))
+        offset += size
+        lines = text.split("\n")[:-1]
+        for i, line in enumerate(lines):
+            if line.startswith("#CHROM"):
+                return "\n".join(lines[:i + 1]) + "\n"
+            if not line.startswith("#"):
+                raise ValueError("❌ [read_header]: Missing #CHROM header line")
+
+
+def read_vcf_region(source, index, region):
+    """
+    Reads the records of a bgzipped, indexed VCF overlapping a region, transferring only the
+    BGZF blocks the index points to.
+
+    :param source: Seekable binary file object (e.g. a `RemoteFile`).
+    :param index: Parsed index, see `read_index`.
+    :type index: dict
+    :param region: Region, see `parse_region`.
+    :type region: str
+    :rtype: pd.DataFrame
+    """
+    # Contig names may contain ':' (e.g. HLA alleles): a known name is taken whole, as tabix does
+    chrom, start, end = (region, 0, MAX_POSITION) if region in index["names"] else parse_region(region)
+    records = []
+    for chunk_start, chunk_end in region_chunks(index, chrom, start, end):
+        for line in read_chunk(source, chunk_start, chunk_end).decode("utf-8").split("\n"):
+            fields = line.split("\t", 4)
+            if len(fields) < 4 or fields[0] != chrom:
+                continue
+            position = int(fields[1]) - 1
+            if position < end and position + len(fields[3]) > start:
+                records.append(line)
+    return read_vcf(io.StringIO(read_header(source) + "".join(line + "\n" for line in records)))
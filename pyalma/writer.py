@@ -0,0 +1,73 @@
+from .transfer import compressing_writer
+
+# Rows serialised at a time: memory use is bounded by one chunk, not by the whole table
+DEFAULT_CHUNK_ROWS = 100_000
+SEPARATORS = {"csv": ",", "tsv": "\t"}
+# Codec used inside each format when none is requested
+DEFAULT_COMPRESSION = {"csv": None, "tsv": None, "parquet": "snappy", "feather": "lz4"}
+
+
+def write_dataframe(df, handle, file_format="csv", chunk_size=DEFAULT_CHUNK_ROWS, compression=None, **kwargs):
+    """
+    Serialises a DataFrame into a writable binary file object, `chunk_size` rows at a time.
+
+    :param df: Table to write.
+    :type df: pd.DataFrame
+    :param handle: Writable binary file object (e.g. an open `paramiko.SFTPFile`).
+    :param file_format: "csv", "tsv", "parquet" or "feather".
+    :type file_format: str
+    :param chunk_size: Rows serialised at a time (one row group per chunk for Parquet,
+        one record batch for Feather).
+    :type chunk_size: int
+    :param compression: "gzip" for CSV/TSV; a Parquet codec ("snappy", "zstd", "gzip", ...) or a
+        Feather codec ("lz4", "zstd"); None for the format's default, "none" for no compression.
+    :type compression: str | None
+    :param kwargs: Extra arguments for `DataFrame.to_csv` (CSV/TSV only).
+    :raises ValueError: If the format is not supported.
+    """
+    if file_format not in DEFAULT_COMPRESSION:
+        raise ValueError(f"❌ [write_dataframe]: Unsupported file format {file_format!r}. "
+                         f"Use one of {', '.join(DEFAULT_COMPRESSION)}.")
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be a positive number of rows")
+    if compression is None:
+        compression = DEFAULT_COMPRESSION[file_format]
+    if compression == "none":
+        compression = None
+    if file_format in SEPARATORS:
+        _write_delimited(df, handle, SEPARATORS[file_format], chunk_size, compression, **kwargs)
+    else:
+        _write_arrow(df, handle, file_format, chunk_size, compression)
+
+
+def _write_delimited(df, handle, sep, chunk_size, compression, **kwargs):
+    writer = compressing_writer(handle, compression)
+    kwargs.setdefault("index", False)
+    # The header (True, False or a list of aliases) goes with the first chunk only
+    header = kwargs.pop("header", True)
+    for start in range(0, max(len(df), 1), chunk_size):
+        chunk = df.iloc[start:start + chunk_size].to_csv(sep=sep, header=header if start == 0 else False, **kwargs)
+        writer.write(chunk.encode("utf-8"))
+    if writer is not handle:
+        writer.close()
+
+
+def _write_arrow(df, handle, file_format, chunk_size, compression):
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError(f"❌ [write_dataframe]: Writing {file_format} requires the `pyarrow` package") from e
+
+    # One schema for the whole table, so that chunks with missing values keep their column types
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(handle, schema, compression=compression or "none")
+        write = writer.write_table
+    else:
+        import pyarrow.ipc as ipc
+        writer = ipc.new_file(handle, schema, options=ipc.IpcWriteOptions(compression=compression))
+        write = writer.write
+    with writer:
+        for start in range(0, max(len(df), 1), chunk_size):
+            write(pa.Table.from_pandas(df.iloc[start:start + chunk_size], schema=schema, preserve_index=False))
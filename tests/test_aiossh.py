@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from pyalma import SshClient, AsyncSshClient
+
+
+@pytest.fixture
+def ssh_client_real(mocker):
+    mocker.patch.object(SshClient, '_connect', return_value=None)
+    client = SshClient("host", "user", "pass")
+    client.ssh_client = mocker.MagicMock()
+    client.sftp_client = mocker.MagicMock()
+    client.sftp_ssh_client = mocker.Mock()
+    return client
+
+@pytest.fixture
+def channels(ssh_client_real, mocker):
+    opened = []
+
+    def open_channel(*args):
+        sftp = MagicMock()
+        sftp.stat.return_value = MagicMock(st_size=len(opened))
+        opened.append(sftp)
+        return sftp
+    mocker.patch.object(ssh_client_real, "_open_sftp_channel", side_effect=open_channel)
+    return opened
+
+
+def test_run_cmd(ssh_client_real):
+    stdout = MagicMock()
+    stdout.read.return_value = b"hello\n"
+    ssh_client_real.ssh_client.exec_command.return_value = (None, stdout, None)
+
+    async def main():
+        return await AsyncSshClient(ssh_client_real).run_cmd("echo hello")
+
+    assert asyncio.run(main()) == {"output": "hello", "err": None}
+
+def test_sftp_calls_share_bounded_channel_pool(ssh_client_real, channels):
+    async def main():
+        ssh = AsyncSshClient(ssh_client_real, sftp_channels=2)
+        return await asyncio.gather(*(ssh.get_file_size(f"/remote/{i}") for i in range(20)))
+
+    sizes = asyncio.run(main())
+    assert len(sizes) == 20
+    assert 1 <= len(channels) <= 2
+    ssh_client_real.sftp_client.stat.assert_not_called()
+
+def test_concurrency_limit(ssh_client_real, channels):
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def slow_listdir(path):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return [], []
+
+    async def main():
+        ssh = AsyncSshClient(ssh_client_real, max_concurrency=3, sftp_channels=10)
+        ssh.client._channel_view = lambda sftp: MagicMock(listdir=slow_listdir, sftp_client=sftp)
+        await asyncio.gather(*(ssh.listdir("/remote") for _ in range(12)))
+
+    asyncio.run(main())
+    assert peak[0] == 3
+
+def test_timeout_closes_channel(ssh_client_real, channels):
+    release = threading.Event()
+    view = MagicMock()
+    view.sftp_client.close.side_effect = release.set
+    view.read_file.side_effect = lambda *args, **kwargs: release.wait(5)
+
+    async def main():
+        ssh = AsyncSshClient(ssh_client_real, sftp_channels=1)
+        ssh.client._channel_view = lambda sftp: view
+        with pytest.raises(asyncio.TimeoutError):
+            await ssh.read_file("/remote/slow.csv", timeout=0.05)
+
+    asyncio.run(main())
+    assert release.wait(1)
+    assert view.sftp_client.close.called
+
+def test_timed_out_read_keeps_shared_connection(ssh_client_real, mocker):
+    release = threading.Event()
+    sftp = MagicMock()
+
+    def close():
+        sftp.sock.closed = True
+        release.set()
+    sftp.close.side_effect = close
+
+    def blocked(*args, **kwargs):
+        release.wait(5)
+        raise OSError("Socket is closed")
+    sftp.stat.side_effect = sftp.lstat.side_effect = sftp.open.side_effect = blocked
+    mocker.patch.object(ssh_client_real, "_open_sftp_channel", return_value=sftp)
+    open_connection = mocker.patch.object(SshClient, "_open_connection")
+    shared = ssh_client_real.sftp_ssh_client
+
+    async def main():
+        ssh = AsyncSshClient(ssh_client_real, sftp_channels=1)
+        with pytest.raises(asyncio.TimeoutError):
+            await ssh.read_file("/remote/slow.csv", timeout=0.05)
+
+    asyncio.run(main())
+    time.sleep(0.1)
+    assert ssh_client_real.sftp_ssh_client is shared
+    shared.close.assert_not_called()
+    open_connection.assert_not_called()
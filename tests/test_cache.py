@@ -0,0 +1,205 @@
+import os
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from pyalma.cache import DiskCache
+
+
+def make_download(content, calls):
+    def download(part_path, offset):
+        calls.append(offset)
+        with open(part_path, "ab") as part:
+            part.write(content[offset:])
+    return download
+
+
+def test_fetch_miss_then_hit(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    calls = []
+    first = cache.fetch("ns", "/remote/a.csv", 5, 100, make_download(b"hello", calls))
+    second = cache.fetch("ns", "/remote/a.csv", 5, 100, make_download(b"hello", calls))
+    assert first == second
+    assert open(first, "rb").read() == b"hello"
+    assert calls == [0]
+    assert cache.get("ns", "/remote/a.csv", 5, 100) == first
+
+def test_changed_mtime_invalidates(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    calls = []
+    cache.fetch("ns", "/remote/a.csv", 5, 100, make_download(b"hello", calls))
+    assert cache.get("ns", "/remote/a.csv", 5, 200) is None
+    path = cache.fetch("ns", "/remote/a.csv", 5, 200, make_download(b"world", calls))
+    assert open(path, "rb").read() == b"world"
+    assert calls == [0, 0]
+
+def test_checksum_is_part_of_validation(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.fetch("ns", "/remote/a.csv", 5, 100, make_download(b"hello", []), checksum="abc")
+    assert cache.get("ns", "/remote/a.csv", 5, 100, checksum="abc") is not None
+    assert cache.get("ns", "/remote/a.csv", 5, 100, checksum="def") is None
+
+def test_interrupted_download_resumes(tmp_path):
+    cache = DiskCache(str(tmp_path))
+
+    def interrupted(part_path, offset):
+        with open(part_path, "ab") as part:
+            part.write(b"hel")
+        raise IOError("connection dropped")
+
+    with pytest.raises(IOError):
+        cache.fetch("ns", "/remote/a.csv", 5, 100, interrupted)
+    calls = []
+    path = cache.fetch("ns", "/remote/a.csv", 5, 100, make_download(b"hello", calls))
+    assert calls == [3]
+    assert open(path, "rb").read() == b"hello"
+
+def test_incomplete_download_raises(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    with pytest.raises(IOError, match="Incomplete download"):
+        cache.fetch("ns", "/remote/a.csv", 10, 100, make_download(b"short", []))
+
+def test_lru_eviction(tmp_path):
+    cache = DiskCache(str(tmp_path), max_size=10)
+    a = cache.fetch("ns", "/a", 6, 1, make_download(b"aaaaaa", []))
+    os.utime(a, (1, 1))
+    b = cache.fetch("ns", "/b", 6, 1, make_download(b"bbbbbb", []))
+    assert not os.path.exists(a)
+    assert os.path.exists(b)
+    assert cache.size() == 6
+
+def test_invalidate_and_clear(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.fetch("ns", "/a", 1, 1, make_download(b"a", []))
+    cache.fetch("ns", "/b", 1, 1, make_download(b"b", []))
+    cache.invalidate("ns", "/a")
+    assert cache.get("ns", "/a", 1, 1) is None
+    cache.clear()
+    assert cache.size() == 0
+
+def test_concurrent_fetches_download_once(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    calls = []
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        paths = list(pool.map(lambda _: cache.fetch("ns", "/a", 5, 1, make_download(b"hello", calls)), range(8)))
+    assert len(set(paths)) == 1
+    assert calls == [0]
+
+
+# ---------- ObjectCache ----------
+
+import threading
+import time
+import pandas as pd
+from pyalma.cache import ObjectCache, estimate_size
+
+
+def test_estimate_size():
+    assert estimate_size(b"abcd") == 4
+    df = pd.DataFrame({"a": range(100)})
+    assert estimate_size(df) == int(df.memory_usage(deep=True).sum())
+
+def test_object_cache_hit_skips_signature():
+    cache = ObjectCache(revalidate_after=60)
+    signature_calls, load_calls = [], []
+    load = lambda: load_calls.append(1) or "value"
+    signature = lambda: signature_calls.append(1) or (1, 1)
+    assert cache.get(("p",), signature, load) == "value"
+    assert cache.get(("p",), signature, load) == "value"
+    assert len(load_calls) == 1
+    assert len(signature_calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_object_cache_revalidates_with_signature():
+    cache = ObjectCache(revalidate_after=0)
+    current = {"sig": (1, 1)}
+    values = iter(["old", "new"])
+    load = lambda: next(values)
+    assert cache.get(("p",), lambda: current["sig"], load) == "old"
+    assert cache.get(("p",), lambda: current["sig"], load) == "old"
+    current["sig"] = (2, 2)
+    assert cache.get(("p",), lambda: current["sig"], load) == "new"
+
+def test_object_cache_evicts_lru():
+    cache = ObjectCache(max_bytes=10)
+    cache.get(("a",), lambda: 1, lambda: b"aaaaa")
+    cache.get(("b",), lambda: 1, lambda: b"bbbbb")
+    cache.get(("a",), lambda: 1, lambda: b"aaaaa")
+    cache.get(("c",), lambda: 1, lambda: b"ccccc")
+    assert set(cache._entries) == {("a",), ("c",)}
+    assert cache.total_bytes == 10
+
+def test_object_cache_does_not_store_none_or_oversized():
+    cache = ObjectCache(max_bytes=3)
+    cache.get(("a",), lambda: 1, lambda: None)
+    cache.get(("b",), lambda: 1, lambda: b"toolarge")
+    assert cache.total_bytes == 0
+
+def test_object_cache_single_flight():
+    cache = ObjectCache()
+    load_calls = []
+    started = threading.Event()
+
+    def slow_load():
+        load_calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(("p",), lambda: 1, slow_load)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 5
+    assert load_calls == [1]
+
+def test_object_cache_propagates_errors_to_waiters():
+    cache = ObjectCache()
+    with pytest.raises(ValueError):
+        cache.get(("p",), lambda: 1, lambda: (_ for _ in ()).throw(ValueError("bad")))
+    assert cache._inflight == {}
+
+def test_object_cache_invalidate_path():
+    cache = ObjectCache()
+    cache.get(("a", "csv"), lambda: 1, lambda: "x")
+    cache.get(("b", "csv"), lambda: 1, lambda: "y")
+    cache.invalidate("a")
+    assert list(cache._entries) == [("b", "csv")]
+
+
+# ---------- MetadataCache Tests ----------
+
+from pyalma.cache import MetadataCache
+
+
+def test_metadata_cache_listing_answers_lookups():
+    cache = MetadataCache(ttl=60)
+    cache.put_listing("/data/", {"a.csv": {"type": "f", "size": 3, "mtime": 1.0},
+                                 "sub": {"type": "d", "size": 0, "mtime": 2.0}})
+    assert cache.lookup("/data/a.csv") == (True, {"type": "f", "size": 3, "mtime": 1.0})
+    assert cache.lookup("/data/missing.csv") == (True, None)
+    assert cache.lookup("/other/a.csv") == (False, None)
+    assert set(cache.listing("/data")) == {"a.csv", "sub"}
+
+def test_metadata_cache_expires(mocker):
+    cache = MetadataCache(ttl=10)
+    clock = mocker.patch("pyalma.cache.time.monotonic", return_value=100.0)
+    cache.put("/data/a.csv", {"type": "f", "size": 3, "mtime": 1.0})
+    clock.return_value = 111.0
+    assert cache.lookup("/data/a.csv") == (False, None)
+
+def test_metadata_cache_size_bound():
+    cache = MetadataCache(max_entries=2)
+    for name in ("a", "b", "c"):
+        cache.put(f"/data/{name}", {"type": "f", "size": 1, "mtime": 1.0})
+    assert cache.lookup("/data/a") == (False, None)
+    assert cache.lookup("/data/c")[0]
+
+def test_metadata_cache_invalidate():
+    cache = MetadataCache()
+    cache.put_listing("/data", {"sub": {"type": "d", "size": 0, "mtime": 1.0}})
+    cache.put_listing("/data/sub", {"x": {"type": "f", "size": 1, "mtime": 1.0}})
+    cache.invalidate("/data/sub", recursive=True)
+    assert cache.lookup("/data/sub/x") == (False, None)
+    assert cache.listing("/data") is None  # parent listing dropped too
@@ -0,0 +1,92 @@
+import io
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import MagicMock
+from pyalma import LocalFileReader, SshClient
+from pyalma.columnar import read_columnar
+from pyalma.remotefile import RemoteFile
+
+
+class FakeHandle:
+    """Stands in for a paramiko.SFTPFile, serving `readv` from memory."""
+
+    def __init__(self, data):
+        self.data = data
+        self.requests = []
+
+    def readv(self, chunks):
+        for offset, length in chunks:
+            self.requests.append((offset, length))
+            yield self.data[offset:offset + length]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def table():
+    n = 40_000
+    return pd.DataFrame({"a": np.arange(n), "b": np.random.rand(n), "c": np.random.rand(n),
+                         "chrom": np.repeat(["chr1", "chr2"], n // 2)})
+
+@pytest.fixture
+def parquet_bytes(table):
+    pytest.importorskip("pyarrow")
+    buffer = io.BytesIO()
+    table.to_parquet(buffer, row_group_size=10_000)
+    return buffer.getvalue()
+
+
+def test_remote_file_seek_and_read():
+    source = RemoteFile(FakeHandle(b"0123456789"), size=10)
+    source.seek(-3, io.SEEK_END)
+    assert source.read() == b"789"
+    source.seek(2)
+    assert source.read(3) == b"234"
+    assert source.tell() == 5
+    assert source.bytes_read == 6
+
+def test_read_columnar_transfers_only_selected_columns(table, parquet_bytes):
+    handle = FakeHandle(parquet_bytes)
+    source = RemoteFile(handle, size=len(parquet_bytes))
+    df = read_columnar(source, "parquet", columns=["a"], row_groups=[1])
+    assert df["a"].tolist() == list(range(10_000, 20_000))
+    assert source.bytes_read < len(parquet_bytes) / 5
+
+def test_read_columnar_filters_and_arrow(parquet_bytes):
+    result = read_columnar(io.BytesIO(parquet_bytes), "parquet", columns=["a", "chrom"],
+                           filters=[("chrom", "==", "chr2")], as_arrow=True)
+    assert result.num_rows == 20_000
+    assert result.column_names == ["a", "chrom"]
+
+def test_local_read_feather(tmp_path, table):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "table.feather")
+    table.to_feather(path)
+    df = LocalFileReader().read_file(path, columns=["b", "chrom"])
+    assert df.equals(table[["b", "chrom"]])
+
+def test_ssh_read_parquet_through_seekable_handle(mocker, parquet_bytes, table):
+    mocker.patch.object(SshClient, "_connect", return_value=None)
+    client = SshClient("host", "user", "pass")
+    client.sftp_client = MagicMock()
+    handle = FakeHandle(parquet_bytes)
+    handle.stat = lambda: MagicMock(st_size=len(parquet_bytes))
+    client.sftp_client.open.return_value = handle
+    df = client.read_file_into_df("/remote/table.parquet", columns=["c"])
+    assert df.equals(table[["c"]])
+    assert client.last_transfer["bytes"] < len(parquet_bytes) / 2
+    client.sftp_client.open.assert_called_once_with("/remote/table.parquet", "rb")
+
+def test_remote_file_block_cache_coalesces_small_reads():
+    data = bytes(range(256)) * 64
+    handle = FakeHandle(data)
+    source = RemoteFile(handle, size=len(data), block_size=1024, cache_bytes=4096)
+    for offset in (10, 20, 1030, 15):
+        source.seek(offset)
+        assert source.read(8) == data[offset:offset + 8]
+    assert handle.requests == [(0, 1024), (1024, 1024)]
+    source.seek(0)
+    assert source.read() == data  # large reads bypass the cache
+    assert len(source._blocks) <= 4
@@ -53,3 +53,28 @@ def test_read_file_into_df_csv(local_file_reader, mocker):
     result = local_file_reader.read_file_into_df("file.csv")
     mock_read.assert_called_once_with("file.csv", None, as_dataframe=True, as_binary=False)
     assert result == "df_result"
+
+
+def test_read_file_object_cache(local_file_reader, tmp_path, mocker):
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\n1,2\n")
+    local_file_reader.enable_object_cache(revalidate_after=0)
+    spy = mocker.spy(local_file_reader, "decode_content_by_type")
+
+    first = local_file_reader.read_file_into_df(str(path))
+    second = local_file_reader.read_file_into_df(str(path))
+    assert first is second
+    assert spy.call_count == 1
+
+    path.write_text("a,b\n1,2\n3,4\n")
+    third = local_file_reader.read_file_into_df(str(path))
+    assert len(third) == 2
+    assert spy.call_count == 2
+
+
+def test_read_file_object_cache_keys_on_kwargs(local_file_reader, tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\n1,2\n")
+    local_file_reader.enable_object_cache()
+    assert list(local_file_reader.read_file_into_df(str(path), usecols=["a"]).columns) == ["a"]
+    assert list(local_file_reader.read_file_into_df(str(path)).columns) == ["a", "b"]
@@ -0,0 +1,107 @@
+import io
+import random
+import numpy as np
+import pytest
+from pyalma import LocalFileReader, SshClient
+from pyalma.genotypes import MISSING, line_batches, parse_batch, parse_header, read_genotypes
+
+HEADER = ("##fileformat=VCFv4.2\n"
+          '##INFO=<ID=DP,Number=1,Type=Integer,Description="Depth">\n'
+          '##INFO=<ID=AF,Number=A,Type=Float,Description="Frequency">\n'
+          '##INFO=<ID=DB,Number=0,Type=Flag,Description="dbSNP">\n'
+          "##contig=<ID=chr1>\n##contig=<ID=chr2>\n"
+          "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tS1\tS2\tS3\n")
+ALTS = ",".join(["C", "G", "T"] + ["A" * n for n in range(2, 12)])
+
+
+def test_parse_batch_calls():
+    records = (f"chr1\t1\t.\tA\t{ALTS}\t.\tPASS\tDP=3;DB\tGT:DP\t0/0:1\t0|1:2\t1/1:3\n"
+               f"chr1\t2\t.\tA\t{ALTS}\t9\tPASS\tAF=0.5\tGT\t./.\t1\t0\n"
+               f"chr1\t3\t.\tA\t{ALTS}\t9\tPASS\t.\tGT\t10/1\t0/1/2\t1/.\n"
+               f"chr1\t4\t.\tA\t{ALTS}\t9\tPASS\t.\tDP\t3\t4\t5\n")
+    columns, definitions = parse_header(HEADER)
+    variants, genotypes = parse_batch(records.encode(), columns, [0, 1, 2], ("DP", "AF", "DB"), definitions)
+    assert genotypes.dtype == np.int8
+    assert genotypes.tolist() == [[0, 1, 2], [MISSING, 1, 0], [2, 2, MISSING], [MISSING] * 3]
+    assert variants["DP"].tolist()[0] == 3 and variants["DP"].isna().tolist()[1:] == [True] * 3
+    assert variants["AF"].tolist()[1] == "0.5"
+    assert variants["DB"].tolist() == [True, False, False, False]
+    assert "INFO" not in variants.columns
+
+def test_parse_batch_rejects_ragged_records():
+    columns, _ = parse_header(HEADER)
+    with pytest.raises(ValueError):
+        parse_batch(b"chr1\t1\t.\tA\tC\t.\tPASS\t.\tGT\t0/1\t0/1\nchr1\t2\t.\tA\tC\t.\tPASS\t.\tGT\t0/1\t0/1\t1/1\t0/0\n",
+                    columns, [0, 1, 2])
+
+def test_line_batches_end_on_lines():
+    pieces = [b"a\tb\nc", b"d\te\nf\tg\n", b"h\ti"]
+    batches = list(line_batches(pieces, batch_bytes=4))
+    assert all(batch.endswith(b"\n") for batch in batches)
+    assert b"".join(batches) == b"a\tb\ncd\te\nf\tg\nh\ti\n"
+
+def test_read_genotypes_samples_and_empty():
+    records = "chr1\t5\t.\tA\tC\t.\tPASS\t.\tGT\t0/1\t1/1\t./.\n"
+    result = read_genotypes(io.BytesIO((HEADER + records).encode()), samples=["S3", "S1"])
+    assert result["samples"] == ["S3", "S1"]
+    assert result["genotypes"].tolist() == [[MISSING], [1]]
+    records += "chr1\t6\t.\tA\tC\t.\tPASS\t.\tGT\t1/1\t0/0\t0/1\n"
+    result = read_genotypes(io.BytesIO((HEADER + records).encode()), samples=["S3", "S1"])
+    assert result["genotypes"].tolist() == [[MISSING, 1], [1, 2]]
+    result = read_genotypes(io.BytesIO((HEADER + records).encode()), samples=["S1", "S2"])
+    assert result["genotypes"].tolist() == [[1, 2], [2, 0]]
+    empty = read_genotypes(io.BytesIO(HEADER.encode()), info=("DP",))
+    assert empty["genotypes"].shape == (3, 0) and list(empty["variants"].columns)[-1] == "DP"
+    with pytest.raises(ValueError):
+        read_genotypes(io.BytesIO(HEADER.encode()), samples=["S4"])
+
+
+@pytest.fixture
+def indexed_vcf(tmp_path):
+    pysam = pytest.importorskip("pysam")
+    random.seed(0)
+    calls = ["0/0", "0/1", "1|1", "./.", "1/2", "0", "1"]
+    records = []
+    for chrom in ("chr1", "chr2"):
+        for i in range(3000):
+            fields = "\t".join(f"{call}:{i % 7}" for call in random.choices(calls, k=3))
+            records.append(f"{chrom}\t{10 * i + 1}\t.\tA\tC,G\t30\tPASS\tDP={i}\tGT:DP\t{fields}\n")
+    path = tmp_path / "cohort.vcf"
+    path.write_text(HEADER + "".join(records))
+    return pysam.tabix_index(str(path), preset="vcf", force=True), pysam
+
+
+def expected_genotypes(pysam, path, region=None):
+    rows = []
+    with pysam.VariantFile(path) as variant_file:
+        for record in variant_file.fetch(region=region):
+            rows.append([MISSING if None in sample["GT"] else sum(allele != 0 for allele in sample["GT"])
+                         for sample in record.samples.values()])
+    return np.array(rows, dtype=np.int8).T
+
+
+def test_read_vcf_genotypes_matches_pysam(indexed_vcf):
+    path, pysam = indexed_vcf
+    result = LocalFileReader().read_vcf_genotypes(path, info=("DP",), batch_bytes=20_000)
+    assert np.array_equal(result["genotypes"], expected_genotypes(pysam, path))
+    assert result["variants"]["DP"].dtype == "Int64"
+    assert result["variants"]["CHROM"].cat.categories.tolist() == ["chr1", "chr2"]
+
+def test_read_vcf_genotypes_region_and_processes(indexed_vcf):
+    path, pysam = indexed_vcf
+    reader = LocalFileReader()
+    region = reader.read_vcf_genotypes(path, region="chr2:101-5000", samples=["S2"])
+    assert np.array_equal(region["genotypes"], expected_genotypes(pysam, path, "chr2:101-5000")[[1]])
+    assert region["variants"]["POS"].between(101, 5000).all()
+    parallel = reader.read_vcf_genotypes(path, processes=2)
+    assert np.array_equal(parallel["genotypes"], expected_genotypes(pysam, path))
+    assert parallel["variants"]["CHROM"].value_counts().to_dict() == {"chr1": 3000, "chr2": 3000}
+
+def test_ssh_read_vcf_genotypes_streams(mocker):
+    mocker.patch.object(SshClient, "_connect", return_value=None)
+    client = SshClient("host", "user", "pass")
+    records = "chr1\t5\t.\tA\tC\t.\tPASS\tDP=4\tGT\t0/1\t1/1\t0/0\n"
+    mocker.patch.object(client, "_open_stream", return_value=io.BytesIO((HEADER + records).encode()))
+    result = client.read_vcf_genotypes("/data/cohort.vcf", info=("DP",))
+    assert result["genotypes"].tolist() == [[1], [2], [0]]
+    assert result["variants"]["DP"].tolist() == [4]
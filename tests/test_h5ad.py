@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+from unittest.mock import MagicMock
+from pyalma import LocalFileReader, SshClient
+from pyalma.anndatareader import read_adata_subset
+
+
+@pytest.fixture
+def h5ad_path(tmp_path):
+    import anndata as ad
+
+    X = sp.random(50, 20, density=0.3, format="csr", dtype=np.float32, random_state=0)
+    adata = ad.AnnData(X=X, obs=pd.DataFrame({"cluster": list("ab") * 25}, index=[f"c{i}" for i in range(50)]),
+                       var=pd.DataFrame(index=[f"g{i}" for i in range(20)]))
+    adata.uns["note"] = "demo"
+    path = str(tmp_path / "demo.h5ad")
+    adata.write_h5ad(path)
+    return path
+
+
+def test_read_subset_metadata_only(h5ad_path):
+    adata = read_adata_subset(h5ad_path, elements=("obs",))
+    assert adata.shape == (50, 20)
+    assert adata.X is None
+    assert adata.obs["cluster"].tolist()[:2] == ["a", "b"]
+    assert list(adata.var.columns) == []
+
+def test_read_subset_slices_x(h5ad_path):
+    import anndata as ad
+
+    full = ad.read_h5ad(h5ad_path)
+    adata = read_adata_subset(h5ad_path, elements=("X", "uns"), obs=["c7", "c3"], var=slice(2, 5))
+    assert adata.obs_names.tolist() == ["c3", "c7"]
+    assert adata.uns["note"] == "demo"
+    np.testing.assert_array_equal(adata.X.toarray(), full[[3, 7], 2:5].X.toarray())
+
+def test_read_subset_unknown_names(h5ad_path):
+    with pytest.raises(KeyError):
+        read_adata_subset(h5ad_path, obs=["missing"])
+
+def test_local_read_h5ad_backed(h5ad_path):
+    adata = LocalFileReader().read_h5ad(h5ad_path, backed="r")
+    assert adata.isbacked
+    adata.file.close()
+
+def test_ssh_read_h5ad_subset_over_sftp(mocker, h5ad_path):
+    mocker.patch.object(SshClient, "_connect", return_value=None)
+    client = SshClient("host", "user", "pass")
+    client.sftp_client = MagicMock()
+    with open(h5ad_path, "rb") as file:
+        data = file.read()
+    handle = MagicMock()
+    handle.stat.return_value = MagicMock(st_size=len(data))
+    handle.readv.side_effect = lambda chunks: [data[offset:offset + length] for offset, length in chunks]
+    client.sftp_client.open.return_value = handle
+    adata = client.read_h5ad_subset("/remote/demo.h5ad", elements=("obs", "var"))
+    assert adata.shape == (50, 20)
+    client.sftp_client.open.assert_called_once_with("/remote/demo.h5ad", "rb")
+    assert client.last_transfer["file_size"] == len(data)
+    handle.close.assert_called_once()
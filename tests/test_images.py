@@ -0,0 +1,59 @@
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from pyalma import LocalFileReader, SshClient
+from pyalma.imageReader import read_image
+
+
+def encode(size, color, format="JPEG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def gallery(tmp_path):
+    paths = []
+    for i, (size, format) in enumerate([((800, 600), "JPEG"), ((300, 900), "PNG"), ((100, 50), "JPEG")]):
+        path = tmp_path / f"plot{i}.{format.lower().replace('jpeg', 'jpg')}"
+        path.write_bytes(encode(size, (10 * i, 100, 200), format))
+        paths.append(str(path))
+    return paths
+
+
+def test_read_image_thumbnail_uses_draft():
+    image = read_image(encode((1600, 1200), (255, 0, 0)), max_size=(100, 100), mode="L")
+    assert image.size == (100, 75) and image.mode == "L"
+    assert read_image(encode((20, 10), (0, 0, 0))).size == (20, 10)
+
+def test_read_images_keeps_order_and_skips_failures(gallery, tmp_path):
+    images = LocalFileReader().read_images(gallery + [str(tmp_path / "missing.jpg")], max_size=(200, 200))
+    assert [image.size for image in images[:3]] == [(200, 150), (67, 200), (100, 50)]
+    assert images[3] is None
+
+def test_read_images_as_array(gallery):
+    reader = LocalFileReader()
+    batch = reader.read_images(gallery, max_size=(200, 200), as_array=True)
+    assert batch["images"].shape == (3, 200, 200, 3) and batch["images"].dtype == np.uint8
+    assert batch["sizes"].tolist() == [[200, 150], [67, 200], [100, 50]]
+    assert np.allclose(batch["images"][2, :50, :100].reshape(-1, 3).mean(axis=0), [20, 100, 200], atol=3)
+    assert not batch["images"][2, 50:].any() and not batch["images"][2, :, 100:].any()
+    full = reader.read_images(gallery, mode="L", as_array=True)
+    assert full["images"].shape == (3, 900, 800, 1)
+    with pytest.raises(ValueError):
+        reader.read_images(gallery, mode="CMYK", as_array=True)
+
+def test_read_file_forwards_image_options(gallery):
+    assert LocalFileReader().read_file(gallery[0], max_size=(80, 80)).size == (80, 60)
+
+def test_ssh_read_images_borrows_channels(mocker):
+    mocker.patch.object(SshClient, "_connect", return_value=None)
+    client = SshClient("host", "user", "pass")
+    channels = []
+    mocker.patch.object(client, "_open_sftp_channel", side_effect=lambda: channels.append(mocker.MagicMock()) or channels[-1])
+    contents = {f"/plots/{i}.jpg": encode((64, 64), (i, i, i)) for i in range(6)}
+    mocker.patch.object(client, "_read_file_content", side_effect=lambda path, mode, is_text: contents[path])
+    batch = client.read_images(list(contents), max_size=(32, 32), as_array=True, workers=3)
+    assert batch["images"].shape == (6, 32, 32, 3)
+    assert 1 <= len(channels) <= 3 and all(channel.close.called for channel in channels)
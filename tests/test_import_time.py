@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Budget (seconds) for a cold `python -c "import pyalma"`; override on slow CI runners.
+IMPORT_BUDGET = float(os.environ.get("PYALMA_IMPORT_BUDGET", "2.0"))
+
+HEAVY_MODULES = ["pandas", "pysam", "scanpy", "anndata", "pymupdf", "fitz", "PIL", "pypdf"]
+
+def _run_python(code):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return result.stdout, time.perf_counter() - start
+
+def test_import_does_not_load_format_backends():
+    code = (
+        "import sys, json, pyalma; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    stdout, _ = _run_python(code)
+    assert json.loads(stdout.strip().splitlines()[-1]) == []
+
+def test_import_ssh_client_does_not_load_format_backends():
+    code = (
+        "import sys, json; from pyalma import SshClient; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    stdout, _ = _run_python(code)
+    assert json.loads(stdout.strip().splitlines()[-1]) == []
+
+def test_import_time_budget():
+    # Best of three, so a single cold filesystem cache does not fail the run
+    elapsed = min(_run_python("import pyalma")[1] for _ in range(3))
+    assert elapsed < IMPORT_BUDGET, f"import pyalma took {elapsed:.2f}s (budget {IMPORT_BUDGET}s)"
@@ -0,0 +1,115 @@
+import io
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from pyalma import LocalFileReader, SshClient
+from pyalma.intervals import INDEX_SUFFIX, BedIndex, read_bed
+
+BED = ("track name=genes\n#comment\n"
+       "chr1\t100\t200\tA\t5\t+\n"
+       "chr1\t150\t300\tB\t.\t-\n"
+       "chr1\t500\t600\tC\t1\t+\n"
+       "chr2\t0\t50\tD\t2\t+\n")
+
+
+@pytest.fixture
+def random_index():
+    rng = np.random.default_rng(0)
+    n = 2000
+    start = rng.integers(0, 50_000, n)
+    # A few long intervals, which go to further components of the index
+    length = np.where(rng.random(n) < 0.05, rng.integers(2000, 20_000, n), rng.integers(0, 200, n))
+    intervals = pd.DataFrame({"chrom": rng.choice(["chr1", "chr2"], n), "start": start, "end": start + length})
+    queries = pd.DataFrame({"chrom": rng.choice(["chr1", "chr2", "chr3"], 500)})
+    queries["start"] = rng.integers(0, 60_000, 500)
+    queries["end"] = queries["start"] + rng.integers(0, 1000, 500)
+    return BedIndex(intervals), intervals, queries
+
+
+def brute_force_overlaps(intervals, chrom, start, end):
+    return np.flatnonzero((intervals["chrom"] == chrom) & (intervals["start"] < end) & (intervals["end"] > start))
+
+
+def test_read_bed_types():
+    bed = read_bed(io.BytesIO(BED.encode()))
+    assert list(bed.columns) == ["chrom", "start", "end", "name", "score", "strand"]
+    assert bed["start"].dtype == "int64" and bed["score"].dtype == "float64"
+    assert bed["score"].isna().tolist() == [False, True, False, False]
+    assert read_bed(io.StringIO("track name=empty\n")).columns.tolist() == ["chrom", "start", "end"]
+    assert read_bed(io.StringIO("#header\nchr1\t1\t5\tgene#1\n"))["name"].tolist() == ["gene#1"]
+    assert read_bed(io.StringIO("chrom\tstart\tend\nchr1\t1\t5\n"))["end"].tolist() == [5]
+
+def test_queries_on_small_index():
+    index = BedIndex(read_bed(io.StringIO(BED)))
+    assert index.count_overlaps(["chr1", "chr1", "chr2", "chrX"], [160, 300, 10, 0], [170, 500, 20, 10]).tolist() == [2, 0, 1, 0]
+    assert index.coverage("chr1", [0, 250], [1000, 550]).tolist() == [300, 100]
+    rows, distances = index.nearest(["chr1", "chr1", "chrX"], [320, 160, 0], [330, 161, 1])
+    assert rows.tolist() == [1, 0, -1] and distances.tolist() == [20, 0, -1]
+    joined = index.intersect(pd.DataFrame({"chrom": ["chr1"], "start": [180], "end": [190], "id": ["q"]}))
+    assert joined["id"].tolist() == ["q", "q"] and joined["name_b"].tolist() == ["A", "B"]
+
+def test_queries_match_brute_force(random_index):
+    index, intervals, queries = random_index
+    assert max(len(chromosome["bounds"]) - 1 for chromosome in index.chromosomes.values()) > 1
+    query, row = index.overlaps(queries["chrom"], queries["start"], queries["end"])
+    expected = [(i, r) for i, q in queries.iterrows()
+                for r in brute_force_overlaps(intervals, q["chrom"], q["start"], q["end"])]
+    assert list(zip(query.tolist(), row.tolist())) == expected
+    counts = index.count_overlaps(queries["chrom"], queries["start"], queries["end"])
+    assert counts.tolist() == np.bincount(query, minlength=len(queries)).tolist()
+    rows, distances = index.nearest(queries["chrom"], queries["start"], queries["end"])
+    for i, q in queries.iterrows():
+        same = intervals[intervals["chrom"] == q["chrom"]]
+        if same.empty:
+            assert rows[i] == -1
+            continue
+        gaps = np.maximum(np.maximum(q["start"] - same["end"], same["start"] - q["end"]), 0)
+        overlapping = (same["start"] < q["end"]) & (same["end"] > q["start"])
+        assert distances[i] == (0 if overlapping.any() else gaps.min())
+
+def test_coverage_matches_brute_force(random_index):
+    index, intervals, queries = random_index
+    covered = index.coverage(queries["chrom"], queries["start"], queries["end"])
+    for i, q in queries.head(100).iterrows():
+        bases = np.zeros(q["end"] - q["start"], dtype=bool)
+        for r in brute_force_overlaps(intervals, q["chrom"], q["start"], q["end"]):
+            bases[max(intervals["start"][r] - q["start"], 0):intervals["end"][r] - q["start"]] = True
+        assert covered[i] == bases.sum()
+
+def test_save_and_load(random_index):
+    index, intervals, queries = random_index
+    buffer = io.BytesIO()
+    BedIndex(intervals, (1, 2)).save(buffer)
+    buffer.seek(0)
+    loaded = BedIndex.load(buffer)
+    assert loaded.signature == (1, 2)
+    assert loaded.coverage(queries["chrom"], queries["start"], queries["end"]).tolist() == \
+        index.coverage(queries["chrom"], queries["start"], queries["end"]).tolist()
+
+def test_local_index_is_cached_next_to_the_file(tmp_path, mocker):
+    path = tmp_path / "genes.bed"
+    path.write_text(BED)
+    reader = LocalFileReader()
+    assert reader.read_bed(str(path))["start"].dtype == "int64"
+    assert list(reader.read_file(str(path)).columns) == ["track name=genes"]  # plain read_csv
+    built = reader.read_bed_index(str(path))
+    assert os.path.isfile(str(path) + INDEX_SUFFIX) and len(built) == 4
+    spy = mocker.spy(BedIndex, "__init__")
+    assert len(reader.read_bed_index(str(path))) == 4
+    assert spy.call_count == 0
+    path.write_text(BED + "chr3\t1\t2\tE\t0\t+\n")
+    assert len(reader.read_bed_index(str(path))) == 5
+
+def test_ssh_index_is_saved_remotely(mocker):
+    mocker.patch.object(SshClient, "_connect", return_value=None)
+    client = SshClient("host", "user", "pass")
+    mocker.patch.object(client, "_file_signature", return_value=(len(BED), 1700000000))
+    mocker.patch.object(client, "_read_sidecar", side_effect=FileNotFoundError)
+    mocker.patch.object(client, "_open_stream", return_value=io.BytesIO(BED.encode()))
+    write = mocker.patch.object(client, "_write_sidecar")
+    index = client.read_bed_index("/data/genes.bed")
+    assert index.count_overlaps("chr1", 120, 130).tolist() == [1]
+    remote_path, data = write.call_args[0]
+    assert remote_path == "/data/genes.bed" + INDEX_SUFFIX
+    assert BedIndex.load(io.BytesIO(data)).signature == (len(BED), 1700000000)
@@ -65,3 +65,35 @@ def test_run_cmd_success(local_file_reader):
 
 
 
+
+def test_read_file_into_df_chunksize(csv_file):
+    reader = LocalFileReader()
+    chunks = list(reader.read_file_into_df(path=csv_file, type="csv", chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert pd.concat(chunks).equals(pd.read_csv(csv_file))
+
+def test_read_file_into_df_iterator(tsv_file):
+    reader = LocalFileReader()
+    chunks = list(reader.read_file_into_df(path=tsv_file, type="tsv", sep="\t", iterator=True))
+    assert len(chunks) == 1
+    assert chunks[0].shape == (3, 2)
+
+def test_read_file_into_df_chunksize_missing_file():
+    reader = LocalFileReader()
+    chunks = reader.read_file_into_df(path="/does/not/exist.csv", chunksize=2)
+    with pytest.raises(FileNotFoundError):
+        next(chunks)
+
+def test_read_file_into_df_chunksize_opens_lazily(csv_file, mocker):
+    reader = LocalFileReader()
+    opened = []
+
+    def open_stream(path):
+        opened.append(open(path, "rb"))
+        return opened[-1]
+    mocker.patch.object(reader, "_open_stream", side_effect=open_stream)
+    chunks = reader.read_file_into_df(path=csv_file, type="csv", chunksize=2)
+    assert opened == []
+    next(chunks)
+    chunks.close()
+    assert opened[0].closed
@@ -0,0 +1,73 @@
+import io
+import pytest
+from pyalma import LocalFileReader
+from pyalma.pdfreader import PdfImage, read_pdf_to_dataframe
+
+
+@pytest.fixture
+def report(tmp_path):
+    pymupdf = pytest.importorskip("pymupdf")
+    from PIL import Image
+
+    def png(color):
+        buffer = io.BytesIO()
+        Image.new("RGB", (40, 30), color).save(buffer, "PNG")
+        return buffer.getvalue()
+
+    doc = pymupdf.open()
+    logo = png((200, 0, 0))
+    for i in range(6):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page text {i + 1}")
+        page.insert_image(pymupdf.Rect(400, 700, 440, 730), stream=logo)
+        if i == 2:
+            page.insert_image(pymupdf.Rect(100, 400, 140, 430), stream=png((0, 0, 200)))
+    path = tmp_path / "report.pdf"
+    doc.save(str(path))
+    return str(path)
+
+
+def test_images_are_shared_references(report):
+    df = read_pdf_to_dataframe(report)
+    assert list(df.columns) == ["Page", "Content", "Images"]
+    assert df["Page"].tolist() == [1, 2, 3, 4, 5, 6]
+    assert "Page text 3" in df["Content"][2]
+    logos = [images[0] for images in df["Images"]]
+    assert all(isinstance(image, PdfImage) and image is logos[0] for image in logos)
+    assert len(df["Images"][2]) == 2
+    assert logos[0].read().startswith(b"\x89PNG")
+
+def test_page_selection_and_text_only(report):
+    df = read_pdf_to_dataframe(report, pages=range(2, 4), images=None)
+    assert list(df.columns) == ["Page", "Content"]
+    assert df["Page"].tolist() == [2, 3]
+    with pytest.raises(ValueError):
+        read_pdf_to_dataframe(report, pages=[7])
+
+def test_bytes_mode_extracts_each_image_once(report):
+    df = read_pdf_to_dataframe(report, images="bytes")
+    assert isinstance(df["Images"][0][0], bytes)
+    assert df["Images"][0][0] is df["Images"][5][0]
+
+def test_process_pool_matches_single_process(report):
+    with open(report, "rb") as handle:
+        content = handle.read()
+    serial = read_pdf_to_dataframe(content, processes=1)
+    parallel = read_pdf_to_dataframe(content, processes=3)
+    assert parallel["Content"].tolist() == serial["Content"].tolist()
+    assert [[image.xref for image in images] for images in parallel["Images"]] == \
+        [[image.xref for image in images] for images in serial["Images"]]
+    assert parallel["Images"][0][0] is parallel["Images"][4][0]
+
+def test_single_process_by_default(report, monkeypatch):
+    import pyalma.pdfreader as pdfreader
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("process pool started without processes > 1")
+
+    monkeypatch.setattr(pdfreader, "ProcessPoolExecutor", no_pool)
+    assert read_pdf_to_dataframe(report, images=None)["Page"].tolist() == [1, 2, 3, 4, 5, 6]
+
+def test_read_file_forwards_pdf_options(report):
+    df = LocalFileReader().read_file(report, pages=[1], images=None)
+    assert df["Page"].tolist() == [1]
@@ -0,0 +1,137 @@
+import time
+import paramiko
+import pytest
+from unittest.mock import MagicMock
+from pyalma import SshClient
+from pyalma.pool import ConnectionPool
+
+
+def fake_connection(active=True):
+    client = MagicMock()
+    client.get_transport.return_value.is_active.return_value = active
+    return client
+
+
+def test_acquire_reuses_live_connection():
+    pool = ConnectionPool(keepalive=15)
+    connect = MagicMock(side_effect=lambda: fake_connection())
+    first = pool.acquire(("host", 22, "user", "x"), connect)
+    second = pool.acquire(("host", 22, "user", "x"), connect)
+    assert first is second
+    connect.assert_called_once()
+    first.get_transport.return_value.set_keepalive.assert_called_once_with(15)
+    assert pool.stats()["reused"] == 1
+    assert pool.stats()["in_use"] == 1
+
+def test_credentials_are_part_of_the_key():
+    pool = ConnectionPool()
+    connect = MagicMock(side_effect=lambda: fake_connection())
+    assert pool.acquire(("host", 22, "user", "a"), connect) is not pool.acquire(("host", 22, "user", "b"), connect)
+
+def test_dead_connection_is_replaced():
+    pool = ConnectionPool()
+    dead = pool.acquire(("host", 22, "user", "x"), lambda: fake_connection())
+    dead.get_transport.return_value.is_active.return_value = False
+    fresh = pool.acquire(("host", 22, "user", "x"), lambda: fake_connection())
+    assert fresh is not dead
+    dead.close.assert_called_once()
+    assert pool.stats()["reconnects"] == 1
+
+def test_idle_connections_are_closed():
+    pool = ConnectionPool(max_idle=0)
+    client = pool.acquire(("host", 22, "user", "x"), lambda: fake_connection())
+    pool.release(client)
+    assert pool.stats()["in_use"] == 0
+    pool.acquire(("other", 22, "user", "x"), lambda: fake_connection())
+    client.close.assert_called_once()
+    assert pool.stats()["connections"] == 1
+
+
+def test_pooled_clients_share_connections(mocker):
+    opened = []
+
+    def open_connection(self, host):
+        opened.append(host)
+        return fake_connection()
+    mocker.patch.object(SshClient, "_open_connection", open_connection)
+    pool = ConnectionPool()
+    first = SshClient("alma", "user", "pass", "alma-app", pooled=True, pool=pool)
+    second = SshClient("alma", "user", "pass", "alma-app", pooled=True, pool=pool)
+    assert opened == ["alma", "alma-app"]
+    assert second.ssh_client is first.ssh_client
+    first.disconnect()
+    second.disconnect()
+    assert pool.stats()["in_use"] == 0
+    assert pool.stats()["closed"] == 0
+
+def test_sftp_operation_retried_after_connection_loss(mocker):
+    mocker.patch.object(SshClient, "_open_connection", lambda self, host: fake_connection())
+    client = SshClient("alma", "user", "pass", "alma-app", pooled=True, pool=ConnectionPool())
+    broken = client.sftp_client
+    broken.stat.side_effect = EOFError()
+    client.sftp_ssh_client.get_transport.return_value.is_active.return_value = False
+    client.sftp_ssh_client.open_sftp.return_value = broken
+    mocker.patch.object(client, "_replace_connection", return_value=fake_connection())
+    client._replace_connection.return_value.open_sftp.return_value.stat.return_value = MagicMock(st_size=7)
+    assert client.get_file_size("/remote/file") == 7
+
+def test_non_idempotent_errors_are_not_retried(mocker):
+    mocker.patch.object(SshClient, "_open_connection", lambda self, host: fake_connection())
+    client = SshClient("alma", "user", "pass", "alma-app", pooled=True, pool=ConnectionPool())
+    client.sftp_client.stat.side_effect = FileNotFoundError("missing")
+    reconnect = mocker.patch.object(client, "_reconnect_sftp")
+    assert client.get_file_size("/remote/missing") is None
+    reconnect.assert_not_called()
+
+
+# ---------- Deferred connection Tests ----------
+
+def test_lazy_connects_each_host_on_first_use(mocker):
+    opened = []
+
+    def open_connection(self, host):
+        opened.append(host)
+        return fake_connection()
+    mocker.patch.object(SshClient, "_open_connection", open_connection)
+    client = SshClient("alma", "user", "pass", "alma-app", connect="lazy")
+    assert opened == []
+    client.ssh_client.exec_command.return_value = (None, MagicMock(), None)
+    client.run_cmd("ls")
+    assert opened == ["alma"]
+    client.get_file_size("/remote/file")
+    assert opened == ["alma", "alma-app"]
+
+def test_channel_view_connects_through_its_client(mocker):
+    opened = []
+
+    def open_connection(self, host):
+        opened.append(host)
+        return fake_connection()
+    mocker.patch.object(SshClient, "_open_connection", open_connection)
+    client = SshClient("alma", "user", "pass", "alma-app", connect="lazy")
+    view = client._channel_view(MagicMock())
+    assert view.ssh_client is client.ssh_client
+    assert opened == ["alma"]
+
+def test_background_handshakes_run_in_parallel(mocker):
+    def open_connection(self, host):
+        time.sleep(0.3)
+        return fake_connection()
+    mocker.patch.object(SshClient, "_open_connection", open_connection)
+    start = time.perf_counter()
+    client = SshClient("alma", "user", "pass", "alma-app", connect="background")
+    assert time.perf_counter() - start < 0.2
+    assert client.ssh_client is not None and client.sftp_client is not None
+    assert time.perf_counter() - start < 0.55
+
+def test_deferred_connection_error_raised_on_first_use(mocker):
+    mocker.patch.object(SshClient, "_open_connection", side_effect=paramiko.AuthenticationException())
+    client = SshClient("alma", "user", "pass", "alma-app", connect="background")
+    with pytest.raises(ConnectionError, match="Authentication failed for user@alma-app"):
+        client.sftp_client
+    client.disconnect()
+
+def test_disconnect_does_not_connect(mocker):
+    open_connection = mocker.patch.object(SshClient, "_open_connection")
+    SshClient("alma", "user", "pass", "alma-app", connect="lazy").disconnect()
+    open_connection.assert_not_called()
@@ -0,0 +1,81 @@
+import shutil
+import subprocess
+import pytest
+import pandas as pd
+from io import BytesIO
+from pyalma import LocalFileReader
+from pyalma.query import apply_query, build_remote_count, build_remote_query
+
+pytestmark = pytest.mark.skipif(shutil.which("awk") is None, reason="awk is required")
+
+CSV = "gene,chrom,score,label\nA,chr1,1.5,x\nB,chr2,7,y\nC,chr1,,z\nD,chr1,12,x y\nE,chr3,3,\"q\"\n"
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_text(CSV)
+    return str(path)
+
+
+def run_remote(command, names):
+    output = subprocess.run(command, shell=True, capture_output=True, check=True).stdout
+    if not output.strip():
+        return pd.DataFrame(columns=names)
+    return pd.read_csv(BytesIO(output), header=None, names=names)
+
+
+@pytest.mark.parametrize("usecols, where, nrows", [
+    (None, None, None),
+    (["score", "gene"], None, None),
+    (["gene"], [("chrom", "==", "chr1")], None),
+    (None, [("score", ">", 2)], None),
+    (["gene", "score"], [("score", "<=", 7), ("chrom", "!=", "chr3")], None),
+    (["gene"], [("score", ">=", 1.5)], 2),
+    (["gene"], [("chrom", "==", "nothing")], None),
+])
+def test_remote_pipeline_matches_pandas(table, usecols, where, nrows):
+    columns = ["gene", "chrom", "score", "label"]
+    command = build_remote_query(table, columns, ",", usecols, where, nrows)
+    remote = run_remote(command, usecols or columns)
+    local = apply_query(pd.read_csv(table), usecols, where, nrows)
+    # Values match; dtypes may differ where the reduced rows no longer contain NaNs
+    pd.testing.assert_frame_equal(remote, local, check_dtype=False, check_index_type=False)
+
+def test_remote_count_matches_pandas(table):
+    columns = ["gene", "chrom", "score", "label"]
+    command = build_remote_count(table, columns, ",", [("chrom", "==", "chr1")])
+    assert int(subprocess.run(command, shell=True, capture_output=True, check=True).stdout) == 3
+    assert int(subprocess.run(build_remote_count(table, columns, ","), shell=True,
+                              capture_output=True, check=True).stdout) == 5
+
+def test_remote_sample_size(table):
+    command = build_remote_query(table, ["gene", "chrom", "score", "label"], ",", ["gene"], sample=2)
+    assert len(run_remote(command, ["gene"])) == 2
+
+def test_tab_separated_without_header(tmp_path):
+    path = tmp_path / "regions.bed"
+    path.write_text("chr1\t10\t20\nchr2\t5\t8\nchr1\t30\t40\n")
+    command = build_remote_query(str(path), [0, 1, 2], "\t", [2, 0], [(1, ">", 6)], header=False)
+    output = subprocess.run(command, shell=True, capture_output=True, check=True).stdout
+    assert output == b"20\tchr1\n40\tchr1\n"
+
+def test_string_values_are_escaped(tmp_path):
+    path = tmp_path / "quotes.csv"
+    path.write_text('a,b\nit\'s,1\n"x",2\n')
+    command = build_remote_query(str(path), ["a", "b"], ",", ["b"], [("a", "==", "it's")])
+    assert subprocess.run(command, shell=True, capture_output=True, check=True).stdout == b"1\n"
+
+def test_invalid_predicate():
+    with pytest.raises(ValueError, match="Invalid predicate"):
+        build_remote_query("f", ["a"], ",", where=[("a", "~", 1)])
+    with pytest.raises(KeyError, match="Unknown column"):
+        build_remote_query("f", ["a"], ",", usecols=["b"])
+
+def test_local_query_table(table):
+    reader = LocalFileReader()
+    df = reader.query_table(table, usecols=["gene"], where=[("chrom", "==", "chr1"), ("score", ">", 1)])
+    assert df["gene"].tolist() == ["A", "D"]
+    assert reader.count_rows(table, where=[("chrom", "==", "chr1")]) == 3
+    assert reader.count_rows(table) == 5
+    assert len(reader.query_table(table, sample=2, seed=0)) == 2
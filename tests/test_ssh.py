@@ -1,12 +1,15 @@
+import os
 import pytest
 import paramiko
 import yaml
 import sys
 from unittest import mock
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 from importlib.metadata import PackageNotFoundError
 from pyalma import SshClient, SecureSshClient
 import tempfile
+import gzip
+import io
 import pandas as pd
 # ---------- Connection Tests ----------
 
@@ -150,10 +153,11 @@ def test_read_file_error(ssh_client2, mocker):
 # ---------- read_file_into_df Tests ----------
 
 def test_read_file_into_df_vcf(ssh_client2, mocker):
-    ssh_client2.read_vcf_file_into_df = lambda path: "df"
-    ssh_client2.sftp_client.get = mocker.Mock()
+    vcf = b"##fileformat=VCFv4.2\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\nchr1\t5\trs1\tA\tT\t.\tPASS\tDP=3\n"
+    mocker.patch.object(ssh_client2, "_open_stream", return_value=io.BytesIO(vcf))
     result = ssh_client2.read_file_into_df("remote/file.vcf", "vcf")
-    assert result == "df"
+    assert result["POS"].tolist() == [5]
+    assert result["QUAL"].isna().all()
 
 def test_read_file_into_df_other(ssh_client2, mocker):
     mock_file = mocker.Mock()
@@ -319,8 +323,10 @@ def test_write_to_remote_file_with_string(ssh_client_real):
     path = "/remote/path/file.txt"
     ssh_client_real.write_to_remote_file(data, path)
 
-    ssh_client_real.sftp_client.open.assert_called_once_with(path, "w")
-    mock_file.write.assert_called_once_with(data)
+    ssh_client_real.sftp_client.open.assert_called_once_with(path + ".pyalma-part", "wb")
+    mock_file.set_pipelined.assert_called_once_with(True)
+    mock_file.write.assert_called_once_with(data.encode())
+    ssh_client_real.sftp_client.posix_rename.assert_called_once_with(path + ".pyalma-part", path)
 
 
 def test_write_to_remote_file_with_dataframe(ssh_client_real):
@@ -331,9 +337,9 @@ def test_write_to_remote_file_with_dataframe(ssh_client_real):
     path = "/remote/path/data.csv"
     ssh_client_real.write_to_remote_file(df, path, file_format="csv")
 
-    ssh_client_real.sftp_client.open.assert_called_once_with(path, "w")
+    ssh_client_real.sftp_client.open.assert_called_once_with(path + ".pyalma-part", "wb")
     # Ensure that the write call received CSV content (we check partial content)
-    assert "col1,col2" in mock_file.write.call_args[0][0]
+    assert b"col1,col2" in mock_file.write.call_args[0][0]
 
 
 def test_write_to_remote_file_invalid_format(ssh_client_real):
@@ -348,6 +354,67 @@ def test_write_to_remote_file_invalid_data_type(ssh_client_real):
         ssh_client_real.write_to_remote_file(invalid_data, "/remote/file.txt")
 
 
+def test_write_to_remote_file_chunked_gzip(ssh_client_real):
+    remote_file = io.BytesIO()
+    remote_file.set_pipelined = MagicMock()
+    remote_file.close = MagicMock()
+    ssh_client_real.sftp_client.open.return_value.__enter__.return_value = remote_file
+    df = pd.DataFrame({"col1": range(10), "col2": list("abcdefghij")})
+    ssh_client_real.write_to_remote_file(df, "/remote/data.tsv.gz", file_format="tsv", chunk_size=3)
+    remote_file.seek(0)
+    assert pd.read_csv(remote_file, sep="\t", compression="gzip").equals(df)
+
+def test_write_to_remote_file_custom_header(ssh_client_real):
+    remote_file = io.BytesIO()
+    remote_file.set_pipelined = MagicMock()
+    remote_file.close = MagicMock()
+    ssh_client_real.sftp_client.open.return_value.__enter__.return_value = remote_file
+    df = pd.DataFrame({"col1": range(5), "col2": list("abcde")})
+    ssh_client_real.write_to_remote_file(df, "/remote/data.csv", chunk_size=2, header=["x", "y"])
+    assert remote_file.getvalue().decode().splitlines() == ["x,y", "0,a", "1,b", "2,c", "3,d", "4,e"]
+    remote_file.seek(0)
+    remote_file.truncate()
+    ssh_client_real.write_to_remote_file(df, "/remote/data.csv", chunk_size=2, header=False)
+    assert remote_file.getvalue().decode().splitlines()[0] == "0,a"
+
+def test_write_to_remote_file_parquet(ssh_client_real):
+    pytest.importorskip("pyarrow")
+    remote_file = io.BytesIO()
+    remote_file.set_pipelined = MagicMock()
+    remote_file.close = MagicMock()
+    ssh_client_real.sftp_client.open.return_value.__enter__.return_value = remote_file
+    df = pd.DataFrame({"col1": range(10), "col2": [None] * 5 + list("abcde")})
+    ssh_client_real.write_to_remote_file(df, "/remote/data.parquet", file_format="parquet", chunk_size=4)
+    remote_file.seek(0)
+    assert pd.read_parquet(remote_file).equals(df)
+
+def test_write_to_remote_file_rename_fallback(ssh_client_real):
+    ssh_client_real.sftp_client.posix_rename.side_effect = IOError("Operation unsupported")
+    ssh_client_real.write_to_remote_file("text", "/remote/a.txt")
+    assert ssh_client_real.sftp_client.rename.call_args_list == [
+        call("/remote/a.txt", "/remote/a.txt.pyalma-old"), call("/remote/a.txt.pyalma-part", "/remote/a.txt")]
+    ssh_client_real.sftp_client.remove.assert_called_once_with("/remote/a.txt.pyalma-old")
+
+def test_write_to_remote_file_rename_fallback_keeps_destination(ssh_client_real):
+    sftp = ssh_client_real.sftp_client
+    sftp.posix_rename.side_effect = IOError("Operation unsupported")
+    sftp.rename.side_effect = [None, IOError("quota exceeded"), None]
+    assert ssh_client_real.write_to_remote_file("text", "/remote/a.txt") is None
+    sftp.rename.assert_called_with("/remote/a.txt.pyalma-old", "/remote/a.txt")
+    assert call("/remote/a.txt") not in sftp.remove.call_args_list
+
+def test_write_to_remote_file_rename_failure_is_not_retried(ssh_client_real):
+    ssh_client_real.sftp_client.posix_rename.side_effect = IOError("Failure")
+    assert ssh_client_real.write_to_remote_file("text", "/remote/a.txt") is None
+    ssh_client_real.sftp_client.rename.assert_not_called()
+    ssh_client_real.sftp_client.remove.assert_called_once_with("/remote/a.txt.pyalma-part")
+
+def test_write_to_remote_file_failure_removes_part_file(ssh_client_real):
+    ssh_client_real.sftp_client.open.return_value.__enter__.return_value.write.side_effect = IOError("disk full")
+    assert ssh_client_real.write_to_remote_file("text", "/remote/a.txt") is None
+    ssh_client_real.sftp_client.remove.assert_called_once_with("/remote/a.txt.pyalma-part")
+    ssh_client_real.sftp_client.posix_rename.assert_not_called()
+
 def test_write_to_remote_file_write_failure(ssh_client_real, caplog):
     ssh_client_real.sftp_client.open.side_effect = Exception("Write failed")
     data = "error case"
@@ -439,3 +506,417 @@ def test_secure_ssh_client_init(mocker):
     mock_log_info.assert_called_once_with("🔐 Secure mode: only key-based login allowed.")
    #mock_super_init.assert_called_once_with(server, username, None, port, sftp)
     assert isinstance(client, SecureSshClient)
+
+
+def test_download_remote_file_parallel(ssh_client_real, mocker):
+    stats = {"bytes": 10, "seconds": 1.0, "mb_per_s": 0.0, "streams": 4}
+    mock_parallel = mocker.patch.object(ssh_client_real, "_parallel_download", return_value=stats)
+
+    ssh_client_real.download_remote_file("/remote/big.h5ad", "local.h5ad", streams=4, chunk_size=1024)
+
+    mock_parallel.assert_called_once_with("/remote/big.h5ad", "local.h5ad", 4, 1024, False)
+    ssh_client_real.sftp_client.get.assert_not_called()
+
+def test_load_h5ad_file_parallel(ssh_client_real, mocker):
+    mock_parallel = mocker.patch.object(ssh_client_real, "_parallel_download")
+
+    assert ssh_client_real.load_h5ad_file("/remote/big.h5ad", "local.h5ad", streams=2) == "local.h5ad"
+    mock_parallel.assert_called_once_with("/remote/big.h5ad", "local.h5ad", 2, None, False)
+    ssh_client_real.sftp_client.open.assert_not_called()
+
+
+def test_read_file_served_from_cache(ssh_client_real, tmp_path, mocker):
+    ssh_client_real.enable_cache(str(tmp_path / "cache"))
+    ssh_client_real.sftp_client.stat.return_value = MagicMock(st_size=8, st_mtime=1)
+    remote_file = MagicMock()
+    remote_file.read.side_effect = [b"a,b\n1,2\n", b""]
+    ssh_client_real.sftp_client.open.return_value.__enter__.return_value = remote_file
+
+    first = ssh_client_real.read_file("/remote/data.csv")
+    second = ssh_client_real.read_file("/remote/data.csv")
+
+    assert first.equals(second)
+    assert list(first.columns) == ["a", "b"]
+    ssh_client_real.sftp_client.open.assert_called_once_with("/remote/data.csv", "rb")
+    assert ssh_client_real.sftp_client.stat.call_count == 2
+
+def test_load_h5ad_file_from_cache(ssh_client_real, tmp_path):
+    ssh_client_real.enable_cache(str(tmp_path / "cache"))
+    ssh_client_real.sftp_client.stat.return_value = MagicMock(st_size=6, st_mtime=1)
+    remote_file = MagicMock()
+    remote_file.read.side_effect = [b"h5data", b""]
+    ssh_client_real.sftp_client.open.return_value.__enter__.return_value = remote_file
+    local_file = tmp_path / "copy.h5ad"
+
+    assert ssh_client_real.load_h5ad_file("/remote/x.h5ad", str(local_file)) == str(local_file)
+    assert local_file.read_bytes() == b"h5data"
+    remote_file.seek.assert_called_once_with(0)
+
+def test_read_file_object_cache_skips_transfer(ssh_client_real):
+    ssh_client_real.enable_object_cache(revalidate_after=60)
+    ssh_client_real.sftp_client.stat.return_value = MagicMock(st_size=8, st_mtime=1)
+    remote_file = MagicMock()
+    remote_file.read.return_value = b"a,b\n1,2\n"
+    ssh_client_real.sftp_client.open.return_value.__enter__.return_value = remote_file
+
+    first = ssh_client_real.read_file_into_df("/remote/data.csv")
+    second = ssh_client_real.read_file_into_df("/remote/data.csv")
+
+    assert first is second
+    ssh_client_real.sftp_client.open.assert_called_once()
+    ssh_client_real.sftp_client.stat.assert_called_once_with("/remote/data.csv")
+
+def test_read_file_into_df_chunked_streams_remote_handle(ssh_client_real):
+    import io
+    remote_file = io.BytesIO(b"a,b\n1,2\n3,4\n5,6\n")
+    remote_file.prefetch = MagicMock()
+    ssh_client_real.sftp_client.open.return_value = remote_file
+
+    chunks = list(ssh_client_real.read_file_into_df("/remote/data.csv", chunksize=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    ssh_client_real.sftp_client.open.assert_called_once_with("/remote/data.csv", "rb")
+    remote_file.prefetch.assert_called_once()
+    assert remote_file.closed
+
+def test_decode_csv_from_bytes(ssh_client_real):
+    df = ssh_client_real.decode_content_by_type(b"a,b\n1,2\n", "csv")
+    assert df.to_dict("list") == {"a": [1], "b": [2]}
+
+
+# ---------- Pushdown query Tests ----------
+
+def _fake_command(out, err=b"", status=0):
+    """
+    Returns the (stdin, stdout, stderr) of a finished command whose output is only readable
+    from the channel, in pieces.
+    """
+    def pieces(data):
+        return [data[i:i + 65536] for i in range(0, len(data), 65536)]
+
+    pending = {"stdout": pieces(out), "stderr": pieces(err)}
+    stdin, stdout = MagicMock(), MagicMock()
+    channel = stdout.channel
+    channel.recv_ready.side_effect = lambda: bool(pending["stdout"])
+    channel.recv_stderr_ready.side_effect = lambda: bool(pending["stderr"])
+    channel.recv.side_effect = lambda size: pending["stdout"].pop(0)
+    channel.recv_stderr.side_effect = lambda size: pending["stderr"].pop(0)
+    channel.exit_status_ready.return_value = True
+    channel.recv_exit_status.return_value = status
+    return stdin, stdout, MagicMock()
+
+def test_exec_checked_strips_marker_and_noise(ssh_client_real):
+    ssh_client_real.ssh_client.exec_command.return_value = _fake_command(
+        b"SLURM: Your account, banner\n__PYALMA_EXEC__\nrow1\n")
+    assert ssh_client_real._exec_checked("cat x") == b"row1\n"
+
+def test_exec_checked_sftp_only_account(ssh_client_real):
+    ssh_client_real.ssh_client.exec_command.return_value = _fake_command(
+        b"This service allows sftp connections only.\n")
+    with pytest.raises(RuntimeError, match="Remote command failed"):
+        ssh_client_real._exec_checked("cat x")
+
+def test_exec_checked_reports_stderr(ssh_client_real):
+    ssh_client_real.ssh_client.exec_command.return_value = _fake_command(
+        b"__PYALMA_EXEC__\n", b"warning\n" * 500_000 + b"awk: syntax error", 2)
+    with pytest.raises(RuntimeError, match="exit status 2.*awk: syntax error"):
+        ssh_client_real._exec_checked("awk x")
+
+def test_query_table_pushdown(ssh_client_real, mocker):
+    mock_exec = mocker.patch.object(ssh_client_real, "_exec_checked",
+                                    side_effect=[b"gene,chrom,score\n", b"A,1.5\nD,12\n"])
+    df = ssh_client_real.query_table("/remote/t.csv", usecols=["gene", "score"], where=[("chrom", "==", "chr1")])
+    assert df.to_dict("list") == {"gene": ["A", "D"], "score": [1.5, 12.0]}
+    assert "awk" in mock_exec.call_args_list[1][0][0]
+    ssh_client_real.sftp_client.open.assert_not_called()
+
+def test_query_table_seeded_sample_is_drawn_locally(ssh_client_real, mocker):
+    rows = b"".join(f"G{i},{i}\n".encode() for i in range(50))
+    mock_exec = mocker.patch.object(ssh_client_real, "_exec_checked",
+                                    side_effect=lambda command: b"gene,score\n" if "head -n 1" in command else rows)
+    first = ssh_client_real.query_table("/remote/t.csv", sample=5, seed=7, nrows=3)
+    second = ssh_client_real.query_table("/remote/t.csv", sample=5, seed=7, nrows=3)
+    assert first.equals(second) and len(first) == 3
+    assert all("shuf" not in call[0][0] and "| head" not in call[0][0] for call in mock_exec.call_args_list)
+
+def test_query_table_falls_back_to_local(ssh_client_real, mocker):
+    mocker.patch.object(ssh_client_real, "_exec_checked", side_effect=RuntimeError("sftp only"))
+    remote_file = MagicMock()
+    remote_file.read.return_value = b"gene,chrom\nA,chr1\nB,chr2\n"
+    ssh_client_real.sftp_client.open.return_value.__enter__.return_value = remote_file
+    df = ssh_client_real.query_table("/remote/t.csv", usecols=["gene"], where=[("chrom", "==", "chr2")])
+    assert df["gene"].tolist() == ["B"]
+
+def test_count_rows_pushdown(ssh_client_real, mocker):
+    mocker.patch.object(ssh_client_real, "_exec_checked", return_value=b"42\n")
+    assert ssh_client_real.count_rows("/remote/t.tsv") == 42
+
+
+# ---------- Compressed transfer Tests ----------
+
+def test_download_remote_file_compressed(ssh_client_real, mocker, tmp_path):
+    content = b"a,b\n" + b"1,2\n" * 500_000
+    mocker.patch.object(ssh_client_real, "_exec_checked", return_value=b"/usr/bin/gzip\n")
+    ssh_client_real.sftp_client.stat.return_value = MagicMock(st_size=len(content))
+    ssh_client_real.ssh_client.exec_command.return_value = _fake_command(gzip.compress(content, 1))
+    ssh_client_real.enable_compression()
+
+    local = tmp_path / "t.csv"
+    ssh_client_real.download_remote_file("/remote/t.csv", str(local))
+
+    assert local.read_bytes() == content
+    assert "gzip -1 -c" in ssh_client_real.ssh_client.exec_command.call_args[0][0]
+    assert ssh_client_real.last_transfer["wire_bytes"] < len(content)
+    ssh_client_real.sftp_client.get.assert_not_called()
+
+def test_compression_skips_small_files(ssh_client_real, mocker):
+    mocker.patch.object(ssh_client_real, "_exec_checked", return_value=b"/usr/bin/gzip\n")
+    ssh_client_real.sftp_client.stat.return_value = MagicMock(st_size=100)
+    ssh_client_real.enable_compression()
+    assert ssh_client_real._transfer_codec("/remote/t.csv") is None
+
+
+# ---------- Batched command Tests ----------
+
+def _fake_exec(outputs):
+    def exec_command(command, timeout=None):
+        return _fake_command(*outputs[command])
+    return exec_command
+
+def test_run_cmds_keeps_order_and_status(ssh_client_real):
+    ssh_client_real.filtered_patterns = {"filters": ["NOTICE"]}
+    ssh_client_real.ssh_client.exec_command.side_effect = _fake_exec({
+        "ls": (b"NOTICE: maintenance\na\nb\n", b"", 0),
+        "md5sum x": (b"", b"md5sum: x: No such file\n", 1),
+    })
+    results = ssh_client_real.run_cmds(["md5sum x", "ls"], max_channels=2)
+    assert [r["command"] for r in results] == ["md5sum x", "ls"]
+    assert results[0]["exit_status"] == 1
+    assert "No such file" in results[0]["stderr"]
+    assert results[1]["output"] == "a\nb"
+    assert all(r["err"] is None and r["seconds"] >= 0 for r in results)
+
+def test_run_cmds_reads_stdout_and_stderr_together(ssh_client_real):
+    # stderr arrives first and keeps coming: reading stdout to the end first would stall the command
+    ssh_client_real.ssh_client.exec_command.side_effect = _fake_exec({"job": (b"done\n", b"x" * (4 << 20), 0)})
+    result = ssh_client_real.run_cmds(["job"])[0]
+    assert result["output"] == "done" and len(result["stderr"]) == 4 << 20
+    assert result["exit_status"] == 0
+
+def test_run_cmds_reports_errors(ssh_client_real):
+    ssh_client_real.ssh_client.exec_command.side_effect = Exception("channel closed")
+    results = ssh_client_real.run_cmds(["squeue"])
+    assert results[0]["err"] == "channel closed"
+    assert results[0]["output"] is None
+
+
+# ---------- Tree listing Tests ----------
+
+def test_walk_uses_remote_find(ssh_client_real, mocker):
+    mock_exec = mocker.patch.object(ssh_client_real, "_exec_checked",
+                                    return_value=b"f\t3\t1.0\tb.csv\0d\t0\t2.0\ta\0\x000\0")
+    tree = ssh_client_real.walk("/remote/project")
+    assert tree["path"] == ["a", "b.csv"]
+    assert "find /remote/project" in mock_exec.call_args[0][0]
+    ssh_client_real.sftp_client.listdir_attr.assert_not_called()
+
+def test_walk_falls_back_to_sftp(ssh_client_real, mocker):
+    mocker.patch.object(ssh_client_real, "_exec_checked", side_effect=RuntimeError("sftp only"))
+    listings = {
+        "/remote": [MagicMock(filename="sub", st_mode=0o040755, st_size=0, st_mtime=1),
+                    MagicMock(filename="x.csv", st_mode=0o100644, st_size=5, st_mtime=2)],
+        "/remote/sub": [MagicMock(filename="y.csv", st_mode=0o100644, st_size=7, st_mtime=3)],
+    }
+    channel = MagicMock()
+    channel.listdir_attr.side_effect = lambda path: listings[path]
+    mocker.patch.object(ssh_client_real, "_open_sftp_channel", return_value=channel)
+    matched = ssh_client_real.glob("/remote/**/*.csv")
+    assert matched["path"] == ["/remote/sub/y.csv", "/remote/x.csv"]
+    assert matched["size"] == [7, 5]
+
+
+# ---------- Metadata cache Tests ----------
+
+def test_metadata_cache_filled_from_listing(ssh_client_real):
+    ssh_client_real.enable_metadata_cache(ttl=60)
+    ssh_client_real.sftp_client.listdir_attr.return_value = [
+        MagicMock(filename="sub", st_mode=0o040755, st_size=0, st_mtime=1),
+        MagicMock(filename="x.csv", st_mode=0o100644, st_size=5, st_mtime=2)]
+    assert ssh_client_real.listdir("/remote") == (["sub"], ["x.csv"])
+    assert ssh_client_real.listdir("/remote") == (["sub"], ["x.csv"])
+    assert ssh_client_real.isfile("/remote/x.csv")
+    assert not ssh_client_real.isfile("/remote/sub")
+    assert ssh_client_real.get_file_size("/remote/x.csv") == 5
+    with pytest.raises(FileNotFoundError):
+        ssh_client_real.isfile("/remote/missing.csv")
+    ssh_client_real.sftp_client.listdir_attr.assert_called_once()
+    ssh_client_real.sftp_client.lstat.assert_not_called()
+    ssh_client_real.sftp_client.stat.assert_not_called()
+
+def test_walk_does_not_cache_unreadable_directories(ssh_client_real, mocker):
+    ssh_client_real.enable_metadata_cache(ttl=60)
+    mocker.patch.object(ssh_client_real, "_exec_checked", side_effect=RuntimeError("sftp only"))
+    listings = {"/remote": [MagicMock(filename="locked", st_mode=0o040700, st_size=0, st_mtime=1),
+                            MagicMock(filename="open", st_mode=0o040755, st_size=0, st_mtime=1)],
+                "/remote/open": []}
+
+    def listdir_attr(path):
+        if path not in listings:
+            raise PermissionError("Permission denied")
+        return listings[path]
+
+    channel = MagicMock()
+    channel.listdir_attr.side_effect = listdir_attr
+    mocker.patch.object(ssh_client_real, "_open_sftp_channel", return_value=channel)
+    assert ssh_client_real.walk("/remote")["path"] == ["locked", "open"]
+    ssh_client_real.sftp_client.listdir_attr.side_effect = listdir_attr
+    assert ssh_client_real.listdir("/remote/open") == ([], [])
+    ssh_client_real.sftp_client.listdir_attr.assert_not_called()
+    assert ssh_client_real.listdir("/remote/locked") == ([], [])
+    ssh_client_real.sftp_client.listdir_attr.assert_called_once_with("/remote/locked")
+
+def test_walk_does_not_cache_directories_find_could_not_read(ssh_client_real, mocker):
+    ssh_client_real.enable_metadata_cache(ttl=60)
+    mocker.patch.object(ssh_client_real, "_exec_checked", return_value=(
+        b"d\t0\t1.0\tlocked\0d\t0\t1.0\topen\0\x001\0find: '/remote/locked': Permission denied"))
+    assert ssh_client_real.walk("/remote")["path"] == ["locked", "open"]
+    assert ssh_client_real.listdir("/remote/open") == ([], [])
+    ssh_client_real.sftp_client.listdir_attr.assert_not_called()
+    ssh_client_real.sftp_client.listdir_attr.return_value = []
+    ssh_client_real.listdir("/remote/locked")
+    ssh_client_real.sftp_client.listdir_attr.assert_called_once_with("/remote/locked")
+
+def test_metadata_cache_invalidated_by_write(ssh_client_real):
+    ssh_client_real.enable_metadata_cache()
+    ssh_client_real.sftp_client.listdir_attr.return_value = []
+    ssh_client_real.listdir("/remote")
+    ssh_client_real.write_to_remote_file("new", "/remote/new.txt")
+    ssh_client_real.sftp_client.lstat.return_value = MagicMock(st_mode=0o100644, st_size=3, st_mtime=5)
+    assert ssh_client_real.isfile("/remote/new.txt")
+    ssh_client_real.sftp_client.lstat.assert_called_once_with("/remote/new.txt")
+
+
+# ---------- Directory sync Tests ----------
+
+def _remote_tree(*entries):
+    from pyalma.tree import new_tree, add_entry
+    tree = new_tree()
+    for entry in entries:
+        add_entry(tree, *entry)
+    return tree
+
+def test_sync_down_copies_only_changed_files(ssh_client_real, mocker, tmp_path):
+    (tmp_path / "same.txt").write_bytes(b"abc")
+    os.utime(tmp_path / "same.txt", (100, 100))
+    mocker.patch.object(ssh_client_real, "walk", return_value=_remote_tree(
+        ("same.txt", "f", 3, 100.0), ("sub", "d", 0, 1.0), ("sub/new.txt", "f", 4, 200.0)))
+    channel = MagicMock()
+    channel.get.side_effect = lambda remote, local: open(local, "wb").write(b"data")
+    mocker.patch.object(ssh_client_real, "_open_sftp_channel", return_value=channel)
+
+    report = ssh_client_real.sync_down("/remote", str(tmp_path))
+    assert (report["files"], report["skipped"], report["bytes"], report["failed"]) == (1, 1, 4, {})
+    channel.get.assert_called_once_with("/remote/sub/new.txt", str(tmp_path / "sub" / "new.txt.pyalma-part"))
+    assert (tmp_path / "sub" / "new.txt").read_bytes() == b"data"
+    assert os.stat(tmp_path / "sub" / "new.txt").st_mtime == 200
+    assert not (tmp_path / "sub" / "new.txt.pyalma-part").exists()
+
+def test_sync_down_reports_failed_files(ssh_client_real, mocker, tmp_path):
+    mocker.patch.object(ssh_client_real, "walk", return_value=_remote_tree(("x.txt", "f", 4, 1.0)))
+    channel = MagicMock()
+    channel.get.side_effect = IOError("denied")
+    mocker.patch.object(ssh_client_real, "_open_sftp_channel", return_value=channel)
+    report = ssh_client_real.sync_down("/remote", str(tmp_path))
+    assert report["files"] == 0
+    assert report["failed"] == {"x.txt": "denied"}
+    assert list(tmp_path.iterdir()) == []
+
+def test_sync_up_creates_destination_and_renames(ssh_client_real, mocker, tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "x.txt").write_bytes(b"hello")
+    ssh_client_real.sftp_client.stat.side_effect = FileNotFoundError
+    walk = mocker.patch.object(ssh_client_real, "walk")
+    channel = MagicMock()
+    mocker.patch.object(ssh_client_real, "_open_sftp_channel", return_value=channel)
+
+    report = ssh_client_real.sync_up(str(tmp_path), "/remote/out")
+    assert (report["files"], report["bytes"]) == (1, 5)
+    walk.assert_not_called()
+    ssh_client_real.sftp_client.mkdir.assert_any_call("/remote/out/sub")
+    channel.put.assert_called_once_with(str(tmp_path / "sub" / "x.txt"), "/remote/out/sub/x.txt.pyalma-part")
+    channel.posix_rename.assert_called_once_with("/remote/out/sub/x.txt.pyalma-part", "/remote/out/sub/x.txt")
+
+def test_sync_up_rename_fallback_and_part_cleanup(ssh_client_real, mocker, tmp_path):
+    (tmp_path / "a.txt").write_bytes(b"aa")
+    (tmp_path / "b.txt").write_bytes(b"bb")
+    ssh_client_real.sftp_client.stat.side_effect = FileNotFoundError
+    mocker.patch.object(ssh_client_real, "walk")
+    channel = MagicMock()
+    channel.posix_rename.side_effect = IOError("Operation unsupported")
+
+    def utime(path, times):
+        if "b.txt" in path:
+            raise IOError("quota exceeded")
+
+    channel.utime.side_effect = utime
+    mocker.patch.object(ssh_client_real, "_open_sftp_channel", return_value=channel)
+
+    report = ssh_client_real.sync_up(str(tmp_path), "/remote/out", streams=1)
+    assert report["files"] == 1 and list(report["failed"]) == ["b.txt"]
+    channel.rename.assert_called_with("/remote/out/a.txt.pyalma-part", "/remote/out/a.txt")
+    channel.remove.assert_any_call("/remote/out/b.txt.pyalma-part")
+
+
+# ---------- Tar stream Tests ----------
+
+def _tar_stream(files, codec=None):
+    import tarfile
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as archive:
+        for name, data in files.items():
+            member = tarfile.TarInfo(name)
+            member.size, member.mtime, member.mode = len(data), 1000, 0o640
+            archive.addfile(member, io.BytesIO(data))
+    data = buffer.getvalue()
+    return gzip.compress(data) if codec == "gzip" else data
+
+def _fake_tar_exec(ssh_client, payload, status=0):
+    ssh_client.ssh_client.exec_command.return_value = _fake_command(payload, status=status)
+    return ssh_client.ssh_client.exec_command.return_value[0]
+
+def test_download_files_unpacks_tar_stream(ssh_client_real, tmp_path):
+    stdin = _fake_tar_exec(ssh_client_real, _tar_stream({"./a.out": b"done", "./logs/b.out": b"ok"}))
+    report = ssh_client_real.download_files("/scratch/jobs", str(tmp_path))
+    assert (report["files"], report["bytes"], report["codec"]) == (2, 6, None)
+    assert (tmp_path / "logs" / "b.out").read_bytes() == b"ok"
+    assert os.stat(tmp_path / "a.out").st_mtime == 1000
+    stdin.write.assert_called_once_with(b".\0")
+    command = ssh_client_real.ssh_client.exec_command.call_args[0][0]
+    assert "cd /scratch/jobs && tar cf - --null -T -" in command
+
+def test_read_files_decodes_members_in_memory(ssh_client_real, mocker):
+    mocker.patch.object(ssh_client_real, "_remote_codecs", return_value=["gzip"])
+    payload = _tar_stream({"s1/qc.csv": b"a,b\n1,2\n", "s2/qc.csv": b"a,b\n3,4\n"}, codec="gzip")
+    stdin = _fake_tar_exec(ssh_client_real, payload)
+    contents = ssh_client_real.read_files(["/data/s1/qc.csv", "/data/s2/qc.csv", "/data/s3/qc.csv"],
+                                          compression="gzip")
+    assert list(contents) == ["s1/qc.csv", "s2/qc.csv"]
+    assert contents["s2/qc.csv"]["b"].tolist() == [4]
+    assert ssh_client_real.last_transfer["failed"] == {"s3/qc.csv": "not received"}
+    stdin.write.assert_called_once_with(b"s1/qc.csv\0s2/qc.csv\0s3/qc.csv\0")
+
+def test_upload_files_streams_tar(ssh_client_real, tmp_path):
+    import tarfile
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "x.txt").write_bytes(b"hello")
+    sent = io.BytesIO()
+    stdin = MagicMock(write=sent.write)
+    stdout = MagicMock()
+    stdout.channel.recv_exit_status.return_value = 0
+    ssh_client_real.ssh_client.exec_command.return_value = (stdin, stdout, io.BytesIO(b""))
+    report = ssh_client_real.upload_files(str(tmp_path), "/remote/in", compression="off")
+    assert (report["files"], report["bytes"]) == (1, 5)
+    stdin.channel.shutdown_write.assert_called_once()
+    sent.seek(0)
+    with tarfile.open(fileobj=sent) as archive:
+        assert archive.getnames() == ["sub", "sub/x.txt"]
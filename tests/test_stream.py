@@ -0,0 +1,111 @@
+import os
+import pytest
+from pyalma import SshClient
+from pyalma.stream import ChannelReader, CommandStream
+
+
+class FakeChannel:
+    def __init__(self, stdout=(), stderr=(), exit_status=0, finished=True):
+        self.stdout = list(stdout)
+        self.stderr = list(stderr)
+        self.status = exit_status
+        self.finished = finished
+        self.closed = False
+        self.command = None
+        self._pipe = os.pipe()
+
+    def exec_command(self, command):
+        self.command = command
+
+    def recv_ready(self):
+        return bool(self.stdout)
+
+    def recv_stderr_ready(self):
+        return bool(self.stderr)
+
+    def recv(self, size):
+        return self.stdout.pop(0)
+
+    def recv_stderr(self, size):
+        return self.stderr.pop(0)
+
+    def exit_status_ready(self):
+        return self.finished
+
+    def recv_exit_status(self):
+        return self.status
+
+    def fileno(self):
+        return self._pipe[0]
+
+    def close(self):
+        if not self.closed:
+            os.close(self._pipe[0])
+            os.close(self._pipe[1])
+        self.closed = True
+
+
+def test_lines_split_across_chunks():
+    channel = FakeChannel(stdout=[b"alpha\nbe", b"ta\r\ngam", "ma é".encode()[:-1], "ma é".encode()[-1:]],
+                          stderr=[b"warn\n"], exit_status=3)
+    stream = CommandStream(channel)
+    lines = list(stream)
+    assert ("stdout", "alpha") in lines and ("stdout", "beta") in lines
+    assert ("stdout", "gamma é") in lines
+    assert ("stderr", "warn") in lines
+    assert stream.exit_status == 3
+    assert channel.closed
+
+def test_output_arriving_with_the_exit_status_is_read():
+    class LateChannel(FakeChannel):
+        # The last output reaches the buffers just before the exit status becomes known
+        def exit_status_ready(self):
+            if not self.finished and not self.stdout:
+                self.finished = True
+                self.stdout.append(b"tail\n")
+                self.stderr.append(b"last warning")
+            return self.finished
+
+    channel = LateChannel(stdout=[b"head\n"], finished=False)
+    lines = list(CommandStream(channel))
+    assert lines == [("stdout", "head"), ("stdout", "tail"), ("stderr", "last warning")]
+
+def test_channel_reader_drains_stderr_while_reading():
+    class WindowChannel(FakeChannel):
+        # Like a full channel window: stdout stalls while stderr is left unread
+        def recv_ready(self):
+            return bool(self.stdout) and not self.stderr
+
+    channel = WindowChannel(stdout=[b"ab", b"cdef"], stderr=[b"warn", b"ing"])
+    reader = ChannelReader(channel)
+    assert reader.read(3) == b"ab"
+    assert reader.read() == b"cdef"
+    assert reader.finish() == "warning"
+
+def test_filters_and_stderr_toggle():
+    channel = FakeChannel(stdout=[b"SLURM: Your account, notice\nresult\n"], stderr=[b"noise\n"])
+    assert list(CommandStream(channel, ("SLURM: Your account,",), stderr=False)) == [("stdout", "result")]
+
+def test_timeout_closes_channel():
+    channel = FakeChannel(stdout=[b"partial\n"], finished=False)
+    stream = CommandStream(channel, timeout=0.05)
+    iterator = iter(stream)
+    assert next(iterator) == ("stdout", "partial")
+    with pytest.raises(TimeoutError):
+        next(iterator)
+    assert channel.closed
+    assert stream.exit_status is None
+
+def test_ssh_stream_cmd(mocker):
+    mocker.patch.object(SshClient, "_connect", return_value=None)
+    client = SshClient("host", "user", "pass")
+    client.ssh_client = mocker.MagicMock()
+    client.sftp_client = mocker.MagicMock()
+    client.sftp_ssh_client = mocker.Mock()
+    channel = FakeChannel(stdout=[b"SLURM: Your account, is over quota\nstep 1\nstep 2\n"], exit_status=0)
+    client.filtered_patterns = {"filters": ["SLURM: Your account,"]}
+    client.ssh_client.get_transport.return_value.open_session.return_value = channel
+    with client.stream_cmd("./job.sh") as lines:
+        assert [line for _, line in lines] == ["step 1", "step 2"]
+    assert lines.exit_status == 0
+    assert channel.command == "./job.sh"
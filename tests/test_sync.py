@@ -0,0 +1,32 @@
+import hashlib
+from pyalma.sync import changed_files, index_files, local_checksum, sync_report
+from pyalma.tree import new_tree, add_entry
+
+
+def test_index_files_keeps_regular_files():
+    tree = new_tree()
+    add_entry(tree, "a", "d", 0, 1.0)
+    add_entry(tree, "a/x.csv", "f", 3, 2.0)
+    add_entry(tree, "link", "l", 4, 3.0)
+    assert index_files(tree) == {"a/x.csv": (3, 2.0)}
+
+def test_changed_files_compares_size_and_mtime():
+    source = {"new": (1, 1.0), "grown": (5, 1.0), "touched": (2, 9.0), "same": (2, 1.7)}
+    destination = {"grown": (4, 1.0), "touched": (2, 1.0), "same": (2, 1.0), "extra": (1, 1.0)}
+    changed, same_size = changed_files(source, destination)
+    assert changed == ["grown", "new", "touched"]
+    assert same_size == ["same"]
+
+def test_changed_files_ignoring_mtime():
+    changed, same_size = changed_files({"touched": (2, 9.0)}, {"touched": (2, 1.0)}, compare_mtime=False)
+    assert changed == []
+    assert same_size == ["touched"]
+
+def test_local_checksum(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"x" * 3000)
+    assert local_checksum(str(path)) == hashlib.sha256(b"x" * 3000).hexdigest()
+
+def test_sync_report():
+    report = sync_report(["a", "b"], 3, {"c": "denied"}, {"bytes": 10, "seconds": 1.0})
+    assert report == {"bytes": 10, "seconds": 1.0, "files": 2, "skipped": 3, "failed": {"c": "denied"}}
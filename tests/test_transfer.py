@@ -0,0 +1,118 @@
+import pytest
+from unittest.mock import MagicMock
+import gzip
+import io
+from pyalma.transfer import (split_ranges, parallel_download, transfer_stats, choose_codec, copy_decompressed,
+                             compressing_writer, decompressing_reader, member_path, tar_create_command,
+                             tar_extract_command)
+
+
+class FakeRemoteFile:
+    def __init__(self, content):
+        self.content = content
+        self.position = 0
+
+    def seek(self, offset):
+        self.position = offset
+
+    def prefetch(self, file_size=None):
+        pass
+
+    def read(self, size):
+        data = self.content[self.position:self.position + size]
+        self.position += len(data)
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+def fake_channel_factory(content, opened):
+    def open_channel():
+        sftp = MagicMock()
+        sftp.open.side_effect = lambda *args: FakeRemoteFile(content)
+        opened.append(sftp)
+        return sftp
+    return open_channel
+
+
+def test_split_ranges_covers_file():
+    assert split_ranges(10, 4) == [(0, 4), (4, 4), (8, 2)]
+    assert split_ranges(0, 4) == []
+
+def test_split_ranges_invalid_chunk():
+    with pytest.raises(ValueError):
+        split_ranges(10, 0)
+
+def test_transfer_stats():
+    stats = transfer_stats(2_000_000, 2.0, 3)
+    assert stats == {"bytes": 2_000_000, "seconds": 2.0, "mb_per_s": 1.0, "streams": 3}
+
+def test_parallel_download_reassembles_ranges(tmp_path):
+    content = bytes(range(256)) * 1000
+    opened = []
+    local = tmp_path / "out.bin"
+    stats = parallel_download(fake_channel_factory(content, opened), "remote.bin", str(local),
+                              len(content), streams=4, chunk_size=10_000)
+    assert local.read_bytes() == content
+    assert stats["bytes"] == len(content)
+    assert stats["streams"] == 4
+    assert len(opened) == 4
+    for sftp in opened:
+        sftp.close.assert_called_once()
+
+def test_parallel_download_empty_file(tmp_path):
+    local = tmp_path / "empty.bin"
+    stats = parallel_download(fake_channel_factory(b"", []), "remote.bin", str(local), 0)
+    assert local.read_bytes() == b""
+    assert stats["bytes"] == 0
+
+def test_parallel_download_short_transfer(tmp_path):
+    with pytest.raises(IOError, match="Short transfer"):
+        parallel_download(fake_channel_factory(b"abc", []), "remote.bin", str(tmp_path / "x"), 10, streams=2, chunk_size=4)
+
+def test_choose_codec_auto():
+    mb = 1024 * 1024
+    assert choose_codec("auto", "csv", 10 * mb, ["gzip"]) == "gzip"
+    assert choose_codec("auto", "csv", 1000, ["gzip"]) is None
+    assert choose_codec("auto", "h5ad", 10 * mb, ["gzip"]) is None
+    assert choose_codec("auto", "csv", 10 * mb, ["gzip"], bandwidth=500e6) is None
+    assert choose_codec("auto", "csv", 10 * mb, []) is None
+    assert choose_codec(None, "csv", 10 * mb, ["gzip"]) is None
+
+def test_choose_codec_explicit():
+    assert choose_codec("gzip", "h5ad", 10, ["gzip"]) == "gzip"
+    assert choose_codec("gzip", "csv", 10, ["zstd"]) is None
+
+def test_copy_decompressed_gzip():
+    content = b"chrom,pos\n" + b"chr1,12345\n" * 50_000
+    destination = io.BytesIO()
+    written, received = copy_decompressed(io.BytesIO(gzip.compress(content, 1)), destination, "gzip", chunk_size=4096)
+    assert destination.getvalue() == content
+    assert written == len(content)
+    assert received < len(content)
+
+def test_tar_commands():
+    assert tar_create_command("/data/qc") == "cd /data/qc && tar cf - --null -T -"
+    assert tar_create_command("/data/qc", "gzip").endswith("| gzip -1 -c")
+    assert tar_extract_command("/data/out dir", "zstd") == \
+        "mkdir -p '/data/out dir' && cd '/data/out dir' && zstd -q -d -c | tar xf -"
+
+def test_compressing_round_trip():
+    buffer = io.BytesIO()
+    writer = compressing_writer(buffer, "gzip")
+    writer.write(b"sample\n" * 1000)
+    writer.close()
+    assert not buffer.closed
+    buffer.seek(0)
+    assert decompressing_reader(buffer, "gzip").read() == b"sample\n" * 1000
+    assert compressing_writer(buffer) is buffer
+
+def test_member_path_rejects_escapes():
+    assert member_path("./qc/a.txt") == "qc/a.txt"
+    assert member_path(".") is None
+    assert member_path("/etc/passwd") is None
+    assert member_path("qc/../../x") is None
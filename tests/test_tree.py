@@ -0,0 +1,63 @@
+import os
+import subprocess
+import pytest
+from pyalma import LocalFileReader
+from pyalma.tree import find_command, glob_to_regex, parse_find_output, split_glob
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "a" / "b" / "x.csv").write_text("1,2\n")
+    (tmp_path / "a" / "y.csv").write_text("3\n")
+    (tmp_path / "z.txt").write_text("hello")
+    return tmp_path
+
+
+def test_parse_find_output():
+    data = b"d\t4096\t1700000000.5\ta\0f\t10\t1700000001.0\ta/x.csv\0\x000\0"
+    tree, unreadable = parse_find_output(data, "/data")
+    assert unreadable == set()
+    assert tree == {"path": ["a", "a/x.csv"], "type": ["d", "f"], "size": [4096, 10],
+                    "mtime": [1700000000.5, 1700000001.0]}
+
+def test_parse_find_output_status():
+    data = b"d\t1\t1.0\tx\0\x001\0find: '/data/x': Permission denied"
+    tree, unreadable = parse_find_output(data, "/data")  # unreadable subdirectories only
+    assert tree["path"] == ["x"] and unreadable == {"x"}
+    with pytest.raises(RuntimeError):
+        parse_find_output(b"\x001\0find: '/data': Permission denied", "/data")
+
+def test_find_command_matches_local_walk(project):
+    output = subprocess.run(find_command(str(project)), shell=True, capture_output=True, check=True).stdout
+    remote, unreadable = parse_find_output(output, str(project))
+    assert unreadable == set()
+    local = LocalFileReader().walk(str(project))
+    assert sorted(remote["path"]) == local["path"]
+    assert sorted(zip(remote["path"], remote["type"])) == list(zip(local["path"], local["type"]))
+
+def test_split_glob():
+    assert split_glob("data/run1/*.csv") == ("data/run1", "*.csv", 1)
+    assert split_glob("/scratch/**/*.vcf") == ("/scratch", "**/*.vcf", None)
+    assert split_glob("*.txt") == (".", "*.txt", 1)
+
+def test_glob_to_regex():
+    assert glob_to_regex("*.csv").match("x.csv")
+    assert not glob_to_regex("*.csv").match("a/x.csv")
+    assert glob_to_regex("**/*.csv").match("x.csv")
+    assert glob_to_regex("**/*.csv").match("a/b/x.csv")
+    assert glob_to_regex("sample_[0-9].txt").match("sample_3.txt")
+
+def test_local_walk_and_glob(project):
+    reader = LocalFileReader()
+    tree = reader.walk(str(project), max_depth=1)
+    assert tree["path"] == ["a", "z.txt"]
+    assert tree["type"] == ["d", "f"]
+    matched = reader.glob(f"{project}/**/*.csv")
+    assert matched["path"] == [f"{project}/a/b/x.csv", f"{project}/a/y.csv"]
+    df = reader.walk(str(project), as_dataframe=True)
+    assert list(df.columns) == ["path", "type", "size", "mtime"]
+    assert df.loc[df["path"] == "z.txt", "size"].item() == 5
+
+def test_local_walk_missing_directory(tmp_path):
+    assert LocalFileReader().walk(str(tmp_path / "missing")) is None
@@ -0,0 +1,94 @@
+import io
+import random
+import pytest
+from unittest.mock import MagicMock
+from pyalma import LocalFileReader, SshClient
+from pyalma.vcf import parse_region, read_index, read_vcf, read_vcf_region, region_chunks
+
+HEADER = ("##fileformat=VCFv4.2\n##contig=<ID=chr1>\n##contig=<ID=chr2>\n"
+          "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tS1\n")
+
+
+@pytest.fixture
+def indexed_vcf(tmp_path):
+    pysam = pytest.importorskip("pysam")
+    random.seed(0)
+    records = []
+    for chrom in ("chr1", "chr2"):
+        position = 0
+        for i in range(20_000):
+            position += random.randint(1, 40)
+            records.append(f"{chrom}\t{position}\trs{i}\t{random.choice(['A', 'GTT'])}\tC\t30\tPASS\tDP=4\tGT\t0/1\n")
+    path = tmp_path / "calls.vcf"
+    path.write_text(HEADER + "".join(records))
+    return pysam.tabix_index(str(path), preset="vcf", force=True), pysam
+
+
+def test_parse_region():
+    assert parse_region("chr1:1,001-2,000") == ("chr1", 1000, 2000)
+    assert parse_region("chr2:500")[:2] == ("chr2", 499)
+    assert parse_region("chrX")[:2] == ("chrX", 0)
+
+def test_read_vcf_types():
+    df = read_vcf(io.StringIO(HEADER + "chr1\t10\t.\tA\tG\t.\tPASS\t.\tGT\t1/1\n"))
+    assert list(df.columns) == ["CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT", "S1"]
+    assert df["POS"].dtype == "int64"
+    assert df["S1"].tolist() == ["1/1"]
+    assert read_vcf(io.StringIO(HEADER)).empty
+
+def test_read_vcf_region_matches_tabix(indexed_vcf):
+    path, pysam = indexed_vcf
+    with open(path + ".tbi", "rb") as index_file:
+        index = read_index(index_file.read())
+    for region in ("chr1:100000-150000", "chr2", "chr2:1-1", "chr3:1-100"):
+        with open(path, "rb") as source:
+            df = read_vcf_region(source, index, region)
+        expected = list(pysam.TabixFile(path).fetch(region=region)) if region != "chr3:1-100" else []
+        assert len(df) == len(expected)
+        assert df["POS"].tolist() == [int(line.split("\t")[1]) for line in expected]
+
+def test_region_chunks_read_a_fraction_of_the_file(indexed_vcf):
+    path, _ = indexed_vcf
+    with open(path + ".tbi", "rb") as index_file:
+        index = read_index(index_file.read())
+    chunks = region_chunks(index, "chr1", 10_000, 11_000)
+    assert len(chunks) == 1
+    assert (chunks[0][1] >> 16) - (chunks[0][0] >> 16) < 70_000
+
+def test_local_read_file_region(indexed_vcf):
+    path, _ = indexed_vcf
+    df = LocalFileReader().read_file(path, region="chr1:1-1000")
+    assert set(df["CHROM"]) == {"chr1"}
+    assert df["POS"].max() <= 1000
+
+def test_ssh_region_falls_back_to_index(indexed_vcf, mocker):
+    path, _ = indexed_vcf
+    mocker.patch.object(SshClient, "_connect", return_value=None)
+    client = SshClient("host", "user", "pass")
+    client.sftp_client = MagicMock()
+    mocker.patch.object(client, "_exec_command", side_effect=RuntimeError("no exec access"))
+    mocker.patch.object(client, "_read_remote", side_effect=lambda remote, mode: open(remote, mode).read())
+    with open(path, "rb") as file:
+        data = file.read()
+    handle = MagicMock()
+    handle.stat.return_value = MagicMock(st_size=len(data))
+    handle.readv.side_effect = lambda chunks: [data[offset:offset + length] for offset, length in chunks]
+    client.sftp_client.open.return_value = handle
+    df = client.read_file(path, region="chr2:1000-5000")
+    assert len(df) > 0 and set(df["CHROM"]) == {"chr2"}
+    assert client.last_transfer["bytes"] < len(data) / 4
+
+def test_ssh_region_uses_remote_tabix(mocker):
+    mocker.patch.object(SshClient, "_connect", return_value=None)
+    client = SshClient("host", "user", "pass")
+    pending = [(HEADER + "chr1\t7\t.\tA\tG\t9\tPASS\t.\tGT\t0/1\n").encode()]
+    stdout = MagicMock()
+    stdout.channel.recv_ready.side_effect = lambda: bool(pending)
+    stdout.channel.recv.side_effect = lambda size: pending.pop()
+    stdout.channel.recv_stderr_ready.return_value = False
+    stdout.channel.exit_status_ready.return_value = True
+    stdout.channel.recv_exit_status.return_value = 0
+    mock_exec = mocker.patch.object(client, "_exec_command", return_value=(None, stdout, MagicMock()))
+    df = client.read_file("/data/calls.vcf.gz", region="chr1:1-10")
+    assert df["POS"].tolist() == [7]
+    mock_exec.assert_called_once_with("tabix -h /data/calls.vcf.gz chr1:1-10")
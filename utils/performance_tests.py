@@ -1,58 +1,319 @@
+"""
+Transfer and decoding benchmarks against a local SSH/SFTP server (see `sftp_server.py`).
+
+Synthetic CSV, VCF, h5ad, PDF, image and binary fixtures are generated in a temporary
+directory at several sizes, and each operation is timed against a server running in a child
+process, optionally behind a simulated slow link. Results are saved as JSON, and a previous
+results file can be passed with `--compare` to report regressions.
+
+    python utils/performance_tests.py --sizes small medium --latency 20 --bandwidth 50
+    python utils/performance_tests.py --compare baseline.json --output current.json
+
+Times are the median of `--repeat` runs. Peak memory is measured with `tracemalloc` in an extra
+run, so it covers Python and NumPy allocations of the client, but not native buffers of other
+libraries (Pillow, HDF5). Note that paramiko's SFTP server returns 16 directory entries per
+READDIR reply (OpenSSH sends more), so `listdir` pays more round trips here than on a real server.
+"""
+import argparse
+import json
+import logging
 import os
+import platform
+import statistics
+import sys
+import tempfile
 import time
-import pandas as pd
-from pyalma import SshClient
-from memory_profiler import memory_usage
+import tracemalloc
+from datetime import datetime, timezone
+from sftp_server import BenchmarkServer
 
-MY_FReader = SshClient("alma-app.icr.ac.uk", "msarkis", "lol")
+# Fixture sizes; the number of rows, cells, pages and files scales with the factor
+SIZES = {"small": 1, "medium": 10, "large": 100}
+OPERATIONS = ("run_cmd", "listdir", "read_file", "load_h5ad_file", "download_remote_file",
+              "write_to_remote_file")
+# A case counts as a regression when it is this much slower than in the baseline
+REGRESSION_RATIO = 1.2
 
-DATA_DIR = "/data/scratch/DCO/DIGOPS/SCIENCOM/msarkis/from_lewis/"
 
-sizes = ["20000", "50000", "100000", "200000"]
+def make_csv(path, scale):
+    import numpy as np
+    import pandas as pd
 
-# measure execution time and memory usage
-def measure_performance(func, *args, **kwargs):
-    """Measures execution time and peak memory usage of a function."""
-    
-    start_time = time.time()
-    mem_usage = memory_usage((func, args, kwargs), max_usage=True)
-    end_time = time.time()
+    rng = np.random.default_rng(0)
+    rows = 20_000 * scale
+    pd.DataFrame({
+        "gene": [f"GENE{i}" for i in rng.integers(0, 20_000, rows)],
+        "chrom": rng.choice([f"chr{i}" for i in range(1, 23)], rows),
+        "pos": rng.integers(1, 250_000_000, rows),
+        "score": rng.random(rows),
+    }).to_csv(path, index=False)
 
-    return {
-        "time_sec": round(end_time - start_time, 4),
-        "memory_MB": round(mem_usage, 2)
-    }
 
-if __name__ == "__main__": 
-    results = []
+def make_vcf(path, scale):
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    samples = [f"S{i}" for i in range(20)]
+    calls = np.array(["0/0", "0/1", "1/1", "./."])
+    with open(path, "w") as vcf:
+        vcf.write("##fileformat=VCFv4.2\n##contig=<ID=chr1>\n"
+                  '##INFO=<ID=DP,Number=1,Type=Integer,Description="Depth">\n'
+                  '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">\n')
+        vcf.write("\t".join(["#CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT"] + samples) + "\n")
+        for i in range(5_000 * scale):
+            genotypes = "\t".join(calls[rng.integers(0, 4, len(samples))])
+            vcf.write(f"chr1\t{100 * i + 1}\t.\tA\tG\t50\tPASS\tDP={i % 90}\tGT\t{genotypes}\n")
+
+
+def make_h5ad(path, scale):
+    import anndata
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    cells, genes = 2_000 * scale, 200
+    adata = anndata.AnnData(
+        X=rng.poisson(1.0, (cells, genes)).astype(np.float32),
+        obs=pd.DataFrame({"cluster": rng.choice(["a", "b", "c"], cells)}, index=[f"cell{i}" for i in range(cells)]),
+        var=pd.DataFrame(index=[f"gene{i}" for i in range(genes)]))
+    adata.write_h5ad(path)
+
+
+def make_pdf(path, scale):
+    import pymupdf
+    from PIL import Image
+    from io import BytesIO
+
+    logo = BytesIO()
+    Image.new("RGB", (120, 60), (30, 90, 160)).save(logo, "PNG")
+    doc = pymupdf.open()
+    for i in range(10 * scale):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Quality control report, page {i + 1}\n" + "Metric value 0.97\n" * 30)
+        page.insert_image(pymupdf.Rect(450, 20, 570, 80), stream=logo.getvalue())
+    doc.save(path)
+
+
+def make_image(path, scale):
+    import numpy as np
+    from PIL import Image
+
+    width, height = int(640 * scale ** 0.5), int(480 * scale ** 0.5)
+    y, x = np.mgrid[0:height, 0:width]
+    pixels = np.stack([x * 255 // width, y * 255 // height, (x + y) % 256], axis=-1).astype(np.uint8)
+    Image.fromarray(pixels).save(path, quality=90)
+
+
+def make_blob(path, scale):
+    with open(path, "wb") as blob:
+        blob.write(os.urandom(2 * 1024 * 1024 * scale))
+
+
+def make_directory(path, scale):
+    os.makedirs(path)
+    for i in range(200 * scale):
+        with open(os.path.join(path, f"file{i}.txt"), "w") as file:
+            file.write(str(i))
+
+
+FIXTURES = {"csv": ("table.csv", make_csv), "vcf": ("calls.vcf", make_vcf), "h5ad": ("cells.h5ad", make_h5ad),
+            "pdf": ("report.pdf", make_pdf), "image": ("plot.jpg", make_image), "blob": ("blob.bin", make_blob),
+            "directory": ("listing", make_directory)}
+
+
+def make_fixtures(root, sizes):
+    """
+    Writes every fixture at every size below `root`; fixtures whose backend is not installed are skipped.
+
+    :return: Dictionary mapping (fixture, size) to the fixture's path.
+    :rtype: dict
+    """
+    fixtures = {}
     for size in sizes:
-        path = os.path.join(DATA_DIR, f"adata_subsample_{size}.h5ad")
-        local_path = f"adata_local_copy_{size}.h5ad"
+        os.makedirs(os.path.join(root, size), exist_ok=True)
+        for name, (filename, make) in FIXTURES.items():
+            path = os.path.join(root, size, filename)
+            try:
+                make(path, SIZES[size])
+                fixtures[name, size] = path
+            except ImportError as e:
+                logging.warning(f"⚠️ [make_fixtures]: Skipping {name} fixtures: {e}")
+    return fixtures
+
+
+def fixture_bytes(path):
+    if os.path.isdir(path):
+        return sum(entry.stat().st_size for entry in os.scandir(path))
+    return os.path.getsize(path)
+
+
+def stream_chunk_size(nbytes, streams):
+    """
+    Chunk size that spreads a file of `nbytes` over `streams`: the fixtures are smaller than the
+    default chunk size, which would leave all but one stream idle.
+    """
+    from pyalma.transfer import DEFAULT_CHUNK_SIZE
+
+    return max(1, min(DEFAULT_CHUNK_SIZE, -(-nbytes // streams)))
+
+
+def measure(function, repeat):
+    """
+    Times `repeat` calls of `function`, then measures its peak memory in one more call.
+
+    :return: Dictionary with 'seconds' (median), 'seconds_min', 'seconds_max' and 'peak_mb'.
+    :rtype: dict
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(statistics.median(times), 6), "seconds_min": round(min(times), 6),
+            "seconds_max": round(max(times), 6), "peak_mb": round(peak / 1e6, 3)}
+
+
+def benchmark_cases(client, fixtures, scratch):
+    """
+    Yields (operation, fixture, size, variant, bytes, function) for every benchmark that the
+    available fixtures allow.
+    """
+    yield "run_cmd", None, None, "true", 0, lambda: client.run_cmd("true")
+    for (name, size), path in sorted(fixtures.items()):
+        nbytes = fixture_bytes(path)
+        local_path = os.path.join(scratch, f"{size}-{os.path.basename(path)}")
+        if name == "directory":
+            yield "listdir", name, size, None, nbytes, lambda path=path: client.listdir(path)
+        elif name in ("csv", "vcf", "pdf"):
+            yield "read_file", name, size, None, nbytes, lambda path=path: client.read_file(path)
+        elif name == "image":
+            yield "read_file", name, size, None, nbytes, lambda path=path: client.read_file(path).load()
+        elif name == "h5ad":
+            for streams in (1, 4):
+                yield ("load_h5ad_file", name, size, f"streams={streams}", nbytes,
+                       lambda path=path, local_path=local_path, streams=streams,
+                       chunk_size=stream_chunk_size(nbytes, streams):
+                       client.load_h5ad_file(path, local_path, streams=streams, chunk_size=chunk_size))
+        elif name == "blob":
+            for streams in (1, 4):
+                yield ("download_remote_file", name, size, f"streams={streams}", nbytes,
+                       lambda path=path, local_path=local_path, streams=streams,
+                       chunk_size=stream_chunk_size(nbytes, streams):
+                       client.download_remote_file(path, local_path, streams=streams, chunk_size=chunk_size))
+        if name == "csv":
+            import pandas as pd
+
+            table = pd.read_csv(path)
+            remote_path = os.path.join(os.path.dirname(path), "written.csv")
+            yield ("write_to_remote_file", name, size, None, nbytes,
+                   lambda table=table, remote_path=remote_path: client.write_to_remote_file(table, remote_path))
+
+
+def run_benchmarks(sizes=("small", "medium"), operations=OPERATIONS, repeat=3, latency=0.0, bandwidth=None):
+    """
+    Generates the fixtures, starts the server and measures every operation.
+
+    :param sizes: Fixture sizes, keys of `SIZES`.
+    :type sizes: list[str]
+    :param operations: Operations to measure, from `OPERATIONS`.
+    :type operations: list[str]
+    :param repeat: Number of timed runs per case.
+    :type repeat: int
+    :param latency: One-way network delay in seconds.
+    :type latency: float
+    :param bandwidth: Link capacity in bytes per second, None for unlimited.
+    :type bandwidth: float | None
+    :return: Dictionary with 'meta' (versions, platform and settings) and 'results' (one dictionary per case).
+    :rtype: dict
+    """
+    import pyalma
+    from pyalma import SshClient
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="pyalma-bench-") as root:
+        fixtures = make_fixtures(os.path.join(root, "remote"), sizes)
+        scratch = os.path.join(root, "local")
+        os.makedirs(scratch)
+        with BenchmarkServer(latency, bandwidth) as server:
+            client = SshClient("127.0.0.1", "bench", "bench", None, server.port)
+            client.set_clean_on_dest(False)  # the temporary directory is removed as a whole
+            try:
+                for operation, fixture, size, variant, nbytes, function in benchmark_cases(client, fixtures, scratch):
+                    if operation not in operations:
+                        continue
+                    result = {"operation": operation, "fixture": fixture, "size": size, "variant": variant,
+                              "bytes": nbytes, **measure(function, repeat)}
+                    result["mb_per_s"] = round(nbytes / 1e6 / result["seconds"], 3) if nbytes else None
+                    results.append(result)
+                    print(f"✅ {case_name(result)}: {result['seconds']:.4f} s, "
+                          f"{result['mb_per_s'] or '-'} MB/s, peak {result['peak_mb']} MB")
+            finally:
+                client.disconnect()
+    meta = {"pyalma": pyalma.__version__, "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "repeat": repeat, "latency": latency, "bandwidth": bandwidth}
+    return {"meta": meta, "results": results}
+
+
+def case_name(result):
+    return "/".join(str(result[key]) for key in ("operation", "fixture", "size", "variant") if result[key])
 
-        print(f"\n📂 Testing dataset size: {size} ({path})")
 
-        # perf for loading the file remotely
-        load_perf = measure_performance(MY_FReader.load_h5ad_file, path, local_path)
+def compare(results, baseline, threshold=REGRESSION_RATIO):
+    """
+    Compares the median times of two result sets, case by case.
 
-        # perf for reading the file locally
-        read_perf = measure_performance(MY_FReader.read_h5ad, local_path)
+    :return: Names of the cases that are more than `threshold` times slower than in `baseline`.
+    :rtype: list[str]
+    """
+    previous = {case_name(result): result for result in baseline["results"]}
+    regressions = []
+    print(f"{'case':<50} {'baseline s':>12} {'current s':>12} {'ratio':>7}")
+    for result in results["results"]:
+        name = case_name(result)
+        if name not in previous:
+            continue
+        ratio = result["seconds"] / max(previous[name]["seconds"], 1e-9)
+        flag = "  ⚠️" if ratio > threshold else ""
+        print(f"{name:<50} {previous[name]['seconds']:>12.4f} {result['seconds']:>12.4f} {ratio:>7.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
 
-        # Store results
-        results.append({
-            "Dataset Size": size,
-            "Load Time (s)": load_perf["time_sec"],
-            "Load Memory (MB)": load_perf["memory_MB"],
-            "Read Time (s)": read_perf["time_sec"],
-            "Read Memory (MB)": read_perf["memory_MB"]
-        })
-        print("In progress results... ",results)
 
-    df_results = pd.DataFrame(results)
-    print(df_results)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="pyalma transfer benchmarks against a local SSH/SFTP server")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="one-way network delay in milliseconds")
+    parser.add_argument("--bandwidth", type=float, default=None, help="link capacity in MB/s")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="previous results file to compare with")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_RATIO)
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("paramiko").setLevel(logging.WARNING)
 
-    # Save results to CSV
-    df_results.to_csv("performance_results.csv", index=False)
-    print("\n✅ Performance results saved to 'performance_results.csv'")
+    results = run_benchmarks(args.sizes, args.operations, args.repeat, args.latency / 1000,
+                             args.bandwidth * 1e6 if args.bandwidth else None)
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+    print(f"\n✅ Results saved to {args.output}")
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(results, json.load(baseline), args.threshold)
+        if regressions:
+            print(f"\n⚠️ {len(regressions)} regressions above {args.threshold}x")
+            return 1
+    return 0
 
 
-#/Users/msarkis/Documents/pyalma/.env-py/bin/python -m streamlit run stindex.py
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+Local SSH/SFTP server for benchmarks and manual testing, built on paramiko.
+
+Accepts any username and password, runs exec requests through the local shell and serves the
+local filesystem over SFTP. Network conditions can be simulated with a one-way `latency` and a
+`bandwidth` limit, applied in both directions by a delay line between the client socket and the
+server transport.
+
+Run it on its own with `python utils/sftp_server.py --latency 20 --bandwidth 50`, which
+prints the port, or start it from Python with `BenchmarkServer`.
+"""
+import argparse
+import logging
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+import paramiko
+from paramiko import (AUTH_SUCCESSFUL, OPEN_SUCCEEDED, SFTP_OK, SFTPAttributes, SFTPHandle, SFTPServer,
+                      SFTPServerInterface, ServerInterface)
+
+# Largest piece forwarded at once by the delay line, so that bandwidth limits stay smooth
+RELAY_CHUNK = 16 * 1024
+
+
+class Server(ServerInterface):
+    def check_auth_password(self, username, password):
+        return AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        return OPEN_SUCCEEDED
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=run_command, args=(channel, command.decode()), daemon=True).start()
+        return True
+
+
+def run_command(channel, command):
+    """
+    Runs `command` in the local shell, connecting its stdin, stdout and stderr to `channel`.
+    """
+    process = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+
+    def pump_stdin():
+        try:
+            for data in iter(lambda: channel.recv(65536), b""):
+                process.stdin.write(data)
+        except OSError:
+            pass
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+
+    def pump_stderr():
+        for data in iter(lambda: process.stderr.read1(65536), b""):
+            channel.sendall_stderr(data)
+
+    threading.Thread(target=pump_stdin, daemon=True).start()
+    stderr = threading.Thread(target=pump_stderr, daemon=True)
+    stderr.start()
+    for data in iter(lambda: process.stdout.read1(65536), b""):
+        channel.sendall(data)
+    stderr.join()
+    channel.send_exit_status(process.wait())
+    channel.close()
+
+
+class Handle(SFTPHandle):
+    def stat(self):
+        try:
+            return SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def chattr(self, attr):
+        return SFTP_OK
+
+
+class Filesystem(SFTPServerInterface):
+    """
+    Serves the local filesystem; paths are used as given.
+    """
+    def list_folder(self, path):
+        try:
+            entries = []
+            for name in os.listdir(path):
+                attrs = SFTPAttributes.from_stat(os.lstat(os.path.join(path, name)))
+                attrs.filename = name
+                entries.append(attrs)
+            return entries
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.stat(path))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def lstat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.lstat(path))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def open(self, path, flags, attr):
+        try:
+            fd = os.open(path, flags, 0o666)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        if flags & os.O_WRONLY:
+            file_mode = "ab" if flags & os.O_APPEND else "wb"
+        elif flags & os.O_RDWR:
+            file_mode = "a+b" if flags & os.O_APPEND else "r+b"
+        else:
+            file_mode = "rb"
+        handle = Handle(flags)
+        handle.filename = path
+        handle.readfile = handle.writefile = os.fdopen(fd, file_mode)
+        return handle
+
+    def _apply(self, operation, *args):
+        try:
+            operation(*args)
+            return SFTP_OK
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def remove(self, path):
+        return self._apply(os.remove, path)
+
+    def rename(self, oldpath, newpath):
+        return self._apply(os.rename, oldpath, newpath)
+
+    def posix_rename(self, oldpath, newpath):
+        return self._apply(os.replace, oldpath, newpath)
+
+    def mkdir(self, path, attr):
+        return self._apply(os.mkdir, path)
+
+    def rmdir(self, path):
+        return self._apply(os.rmdir, path)
+
+    def chattr(self, path, attr):
+        if attr.st_mtime is not None:
+            return self._apply(os.utime, path, (attr.st_atime, attr.st_mtime))
+        return SFTP_OK
+
+
+def delay_line(source, destination, latency, bandwidth):
+    """
+    Forwards bytes from `source` to `destination` (sockets) as a network link would: each piece
+    arrives `latency` seconds after it was sent, and no faster than `bandwidth` bytes per second.
+    Pieces in flight do not wait for each other, so throughput is not limited by the latency.
+    """
+    pending = queue.Queue()
+
+    def receive():
+        try:
+            for data in iter(lambda: source.recv(RELAY_CHUNK), b""):
+                pending.put((time.monotonic(), data))
+        except OSError:
+            pass
+        pending.put((time.monotonic(), b""))
+
+    threading.Thread(target=receive, daemon=True).start()
+    link_free = 0.0
+    while True:
+        sent, data = pending.get()
+        # The piece leaves once the link has finished the previous one, and takes len/bandwidth to send
+        link_free = max(link_free, sent) + (len(data) / bandwidth if bandwidth else 0.0)
+        delay = link_free + latency - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        if not data:
+            break
+        try:
+            destination.sendall(data)
+        except OSError:
+            break
+    for sock in (source, destination):
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+def start_transport(sock, host_key):
+    transport = paramiko.Transport(sock)
+    transport.add_server_key(host_key)
+    transport.set_subsystem_handler("sftp", SFTPServer, Filesystem)
+    transport.start_server(server=Server())
+
+
+def serve(port=0, latency=0.0, bandwidth=None):
+    """
+    Starts the server in background threads.
+
+    :param port: Port to listen on, 0 for any free port.
+    :type port: int
+    :param latency: One-way delay in seconds added in each direction.
+    :type latency: float
+    :param bandwidth: Link capacity in bytes per second in each direction, None for unlimited.
+    :type bandwidth: float | None
+    :return: The port the server listens on.
+    :rtype: int
+    """
+    host_key = paramiko.RSAKey.generate(2048)
+    listener = socket.socket()
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(("127.0.0.1", port))
+    listener.listen(100)
+
+    def accept():
+        while True:
+            client, _ = listener.accept()
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if not latency and not bandwidth:
+                start_transport(client, host_key)
+                continue
+            near, far = socket.socketpair()
+            threading.Thread(target=delay_line, args=(client, near, latency, bandwidth), daemon=True).start()
+            threading.Thread(target=delay_line, args=(near, client, latency, bandwidth), daemon=True).start()
+            start_transport(far, host_key)
+
+    threading.Thread(target=accept, daemon=True).start()
+    return listener.getsockname()[1]
+
+
+class BenchmarkServer:
+    """
+    Runs the server in a child process, so that its CPU time and memory are not counted in the
+    measurements of the client. Use as a context manager; `port` is set once it has started.
+    """
+    def __init__(self, latency=0.0, bandwidth=None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.port = None
+        self.process = None
+
+    def __enter__(self):
+        command = [sys.executable, os.path.abspath(__file__), "--latency", str(self.latency * 1000)]
+        if self.bandwidth:
+            command += ["--bandwidth", str(self.bandwidth / 1e6)]
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        line = self.process.stdout.readline()
+        if not line.strip().isdigit():
+            self.process.kill()
+            raise RuntimeError(f"❌ [BenchmarkServer]: Server failed to start: {line!r}")
+        self.port = int(line)
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SSH/SFTP server with simulated network conditions")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="one-way delay in milliseconds")
+    parser.add_argument("--bandwidth", type=float, default=None, help="link capacity in MB/s")
+    args = parser.parse_args()
+    logging.getLogger("paramiko").setLevel(logging.WARNING)
+    print(serve(args.port, args.latency / 1000, args.bandwidth * 1e6 if args.bandwidth else None), flush=True)
+    threading.Event().wait()